@@ -0,0 +1,292 @@
+import hashlib
+import json
+import struct
+import sys
+import time
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+import pygame
+from simulation import GAME_WIDTH, GAME_HEIGHT, BIRD_WIDTH, BIRD_HEIGHT, PIPE_WIDTH, PIPE_HEIGHT, BASE_HEIGHT
+
+# Sprites pre-scaled to their in-game sizes and packed into one surface per
+# group ("sprites" for what the first frame needs, "late" for art that can
+# arrive after it, one group per theme). The
+# packed pixels are cached on disk (zlib'd RGBA) under a key that hashes the
+# source PNGs and the group's sprite table, so loading a group is one file
+# read + one inflate instead of a PNG decode (the pipes are 384x3072, the score
+# badge 1500x1500) and a scale per sprite.
+#
+#   python asset_atlas.py    -> bake every group ahead of time (the web build does this)
+#
+# Baking also writes atlas/index.json (group -> key), which is how a packaged
+# build that leaves the source PNGs out finds its atlases.
+
+ROOT = Path(__file__).parent
+ASSETS = ROOT / "assets"
+CACHE_DIR = ASSETS / "atlas"
+INDEX_NAME = "index.json"
+ATLAS_VERSION = 2
+
+# name -> (source file, size in game, has alpha[, crop rect in the scaled image]);
+# theme sprites come from themes.json
+SPRITES = {
+    "bird_up":     ("redbird-upflap.png",      (BIRD_WIDTH, BIRD_HEIGHT), True),
+    "bird_mid":    ("redbird-midflap.png",     (BIRD_WIDTH, BIRD_HEIGHT), True),
+    "bird_down":   ("redbird-downflap.png",    (BIRD_WIDTH, BIRD_HEIGHT), True),
+    "emoji":       ("score.png",               (75, 75), True),
+}
+
+# not needed until the first game over
+LATE_SPRITES = {
+    "gameover":    ("gameover.png",            (192, 42), True),
+}
+
+# in-game size and alpha of each theme slot
+THEME_SLOTS = {
+    "background":  ((GAME_WIDTH, GAME_HEIGHT), False),
+    "top_pipe":    ((PIPE_WIDTH, PIPE_HEIGHT), True),
+    "bottom_pipe": ((PIPE_WIDTH, PIPE_HEIGHT), True),
+    "base":        ((GAME_WIDTH, BASE_HEIGHT), True),
+}
+
+# Pipe art is cut into a cap and a short body strip when baked; the game tiles
+# the body out to whatever length a pipe needs (theme_changer.PipeSkin), so the
+# full 64x512 pipes never sit in memory.
+PIPE_CAP_HEIGHT = 32   # cap rows at the gap end, including the lip under it
+PIPE_BODY_ROWS = 16    # a whole number of the body texture's repeats
+PIPE_BODY_INSET = 4    # the body is this much narrower than the cap on each side
+_BODY_WIDTH = PIPE_WIDTH - 2 * PIPE_BODY_INSET
+# slot -> {sprite: (crop rect, has alpha)}; the body is opaque once cropped
+PIPE_PARTS = {
+    "top_pipe": {
+        "top_cap":     ((0, PIPE_HEIGHT - PIPE_CAP_HEIGHT, PIPE_WIDTH, PIPE_CAP_HEIGHT), True),
+        "top_body":    ((PIPE_BODY_INSET, PIPE_HEIGHT - PIPE_CAP_HEIGHT - PIPE_BODY_ROWS, _BODY_WIDTH, PIPE_BODY_ROWS), False),
+    },
+    "bottom_pipe": {
+        "bottom_cap":  ((0, 0, PIPE_WIDTH, PIPE_CAP_HEIGHT), True),
+        "bottom_body": ((PIPE_BODY_INSET, PIPE_CAP_HEIGHT, _BODY_WIDTH, PIPE_BODY_ROWS), False),
+    },
+}
+
+
+def theme_sprites(files):
+    """SPRITES-style table for one theme's {slot: file} manifest entry (pipes as their parts)."""
+    table = {}
+    for slot, (size, alpha) in THEME_SLOTS.items():
+        if slot in PIPE_PARTS:
+            for name, (crop, part_alpha) in PIPE_PARTS[slot].items():
+                table[name] = (files[slot], size, part_alpha, crop)
+        else:
+            table[slot] = (files[slot], size, alpha)
+    return table
+
+_MAGIC = b"FBA"
+_HEADER = struct.Struct("<3sBHHI")  # magic, version, width, height, index json length
+
+
+def source_key(assets=ASSETS, sprites=SPRITES):
+    """Hash of the sprite table and every source file's bytes (a missing file hashes as a marker)."""
+    h = hashlib.sha1(f"{ATLAS_VERSION}:{sorted(sprites.items())}".encode())
+    for name in sorted(sprites):
+        try:
+            h.update((Path(assets) / sprites[name][0]).read_bytes())
+        except OSError:
+            h.update(b"missing")
+    return h.hexdigest()[:16]
+
+
+def groups():
+    """Every atlas group: {group: sprite table}, themes from themes.json."""
+    import theme_changer
+    out = {"sprites": SPRITES, "late": LATE_SPRITES}
+    for name, files in theme_changer.load_manifest()["themes"].items():
+        out["theme-" + name] = theme_sprites(files)
+    return out
+
+
+def read_index(cache_dir=CACHE_DIR):
+    try:
+        return json.loads((Path(cache_dir) / INDEX_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def group_key(assets=ASSETS, sprites=SPRITES, cache_dir=CACHE_DIR, group="sprites"):
+    """source_key() when the source PNGs are here, else the key the bake recorded in the index."""
+    if all((Path(assets) / entry[0]).exists() for entry in sprites.values()):
+        return source_key(assets, sprites)
+    return read_index(cache_dir).get(group) or source_key(assets, sprites)
+
+
+def _load_source(path, size):
+    try:
+        return pygame.transform.scale(pygame.image.load(str(path)), size)
+    except Exception as e:
+        print(f"Failed to load {path}: {e}")
+        surf = pygame.Surface(size)
+        if "bird" in str(path):
+            surf.fill((255, 255, 0))
+        elif "pipe" in str(path):
+            surf.fill((0, 255, 0))
+        elif "bg" in str(path):
+            surf.fill((135, 206, 235))
+        else:
+            surf.fill((255, 0, 255))
+        return surf
+
+
+def _pack_width(sizes, width):
+    places = {}
+    x = y = shelf_h = 0
+    for name in sorted(sizes, key=lambda n: (-sizes[n][1], n)):
+        w, h = sizes[name]
+        if x + w > width:
+            x, y = 0, y + shelf_h
+            shelf_h = 0
+        places[name] = (x, y)
+        x += w
+        shelf_h = max(shelf_h, h)
+    return places, y + shelf_h
+
+
+def _pack(sizes):
+    """
+    Shelf packing, tallest first, at whichever width (in 8 px steps) wastes the
+    least area. Returns ({name: (x, y)}, width, height).
+    """
+    widest = max(w for w, _ in sizes.values())
+    total = sum(w for w, _ in sizes.values())
+    best = None
+    for width in range(widest, total + 8, 8):
+        places, height = _pack_width(sizes, width)
+        if best is None or width * height < best[1] * best[2]:
+            best = (places, width, height)
+    return best
+
+
+class SpriteAtlas:
+    """One RGBA surface plus {name: (x, y, w, h, alpha)}. Built without a display."""
+
+    def __init__(self, surface, index, source="baked", load_ms=0.0):
+        self.surface = surface
+        self.index = index
+        self.source = source   # "cache" or "baked"
+        self.load_ms = load_ms
+
+    @classmethod
+    def bake(cls, assets=ASSETS, sprites=SPRITES):
+        sources = {}  # (file, size) -> scaled image; pipe parts share theirs
+        scaled = {}
+        for name, entry in sprites.items():
+            f, size = entry[0], entry[1]
+            img = sources.get((f, size))
+            if img is None:
+                img = sources[(f, size)] = _load_source(Path(assets) / f, size)
+            scaled[name] = img.subsurface(entry[3]) if len(entry) > 3 else img
+        places, width, height = _pack({name: s.get_size() for name, s in scaled.items()})
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill((0, 0, 0, 0))
+        index = {}
+        for name, img in scaled.items():
+            x, y = places[name]
+            if img.get_flags() & pygame.SRCALPHA:
+                # MAX against the cleared atlas copies pixels (and alpha) as-is
+                surface.blit(img, (x, y), special_flags=pygame.BLEND_RGBA_MAX)
+            else:
+                surface.blit(img, (x, y))  # opaque, or colorkeyed (the bird PNGs)
+            index[name] = (x, y) + img.get_size() + (sprites[name][2],)
+        return cls(surface, index)
+
+    def to_bytes(self):
+        meta = json.dumps(self.index).encode()
+        w, h = self.surface.get_size()
+        pixels = zlib.compress(pygame.image.tobytes(self.surface, "RGBA"), 6)
+        return _HEADER.pack(_MAGIC, ATLAS_VERSION, w, h, len(meta)) + meta + pixels
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, w, h, meta_len = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != ATLAS_VERSION:
+            raise ValueError("not a v%d atlas" % ATLAS_VERSION)
+        start = _HEADER.size
+        index = {k: tuple(v) for k, v in json.loads(data[start:start + meta_len]).items()}
+        pixels = zlib.decompress(data[start + meta_len:])
+        return cls(pygame.image.frombytes(pixels, (w, h), "RGBA"), index, "cache")
+
+    def sprites(self):
+        """{name: Surface} for blitting. Needs the display (convert); call after set_mode."""
+        atlas = self.surface.convert_alpha()
+        out = {}
+        for name, (x, y, w, h, alpha) in self.index.items():
+            sub = atlas.subsurface((x, y, w, h))
+            # opaque sprites (backgrounds) get their own opaque copy: much faster to blit
+            out[name] = sub if alpha else sub.convert()
+        return out
+
+
+def cache_path(key, cache_dir=CACHE_DIR, group="sprites"):
+    return Path(cache_dir) / f"{group}-{key}.bin"
+
+
+def load(assets=ASSETS, cache_dir=CACHE_DIR, write_cache=True, sprites=SPRITES, group="sprites"):
+    """Atlas from the on-disk cache, or baked from the PNGs (and cached) on a miss."""
+    start = time.perf_counter()
+    key = group_key(assets, sprites, cache_dir, group)
+    path = cache_path(key, cache_dir, group)
+    atlas = None
+    try:
+        atlas = SpriteAtlas.from_bytes(path.read_bytes())
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Atlas cache unreadable, rebaking: {e}")
+    if atlas is None:
+        atlas = SpriteAtlas.bake(assets, sprites)
+        if write_cache:
+            try:
+                Path(cache_dir).mkdir(parents=True, exist_ok=True)
+                for old in Path(cache_dir).glob(f"{group}-*.bin"):
+                    old.unlink()
+                path.write_bytes(atlas.to_bytes())
+            except Exception as e:
+                print(f"Atlas cache write failed: {e}")
+    atlas.load_ms = (time.perf_counter() - start) * 1000.0
+    return atlas
+
+
+def load_async(assets=ASSETS, cache_dir=CACHE_DIR, write_cache=True, sprites=SPRITES, group="sprites"):
+    """
+    Start load() on a worker thread so it overlaps other work (display setup,
+    gameplay). Returns a Future. The web build has no threads, so it loads
+    inline there.
+    """
+    if sys.platform == "emscripten":
+        future = Future()
+        try:
+            future.set_result(load(assets, cache_dir, write_cache, sprites, group))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    executor = ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(load, assets, cache_dir, write_cache, sprites, group)
+    executor.shutdown(wait=False)
+    return future
+
+
+def bake_all(assets=ASSETS, cache_dir=CACHE_DIR):
+    """Bake (or verify) every group and write the index. Returns {group: key}."""
+    index = {}
+    for group, sprites in groups().items():
+        atlas = load(assets, cache_dir, sprites=sprites, group=group)
+        index[group] = key = source_key(assets, sprites)
+        w, h = atlas.surface.get_size()
+        print(f"{group}: {w}x{h}, {len(atlas.index)} sprites, {atlas.source} in {atlas.load_ms:.1f} ms "
+              f"-> {cache_path(key, cache_dir, group)}")
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    (Path(cache_dir) / INDEX_NAME).write_text(json.dumps(index, indent=2, sort_keys=True))
+    return index
+
+
+if __name__ == "__main__":
+    bake_all()
@@ -0,0 +1,350 @@
+import random
+import numpy as np
+from difficulty import get_profile
+import collision
+from simulation import (
+    BIRD_X, BIRD_Y, BIRD_WIDTH, BIRD_HEIGHT, PIPE_X, PIPE_WIDTH, PIPE_HEIGHT,
+    GROUND_Y, GRAVITY, FLAP_VELOCITY, CENTER_MARGIN, pair_capacity,
+    EVENT_SCORE, EVENT_CRASH, EVENT_GROUND, MASK64, PAIR_ID_BITS,
+    STREAM_CENTER, STREAM_SEED_VY, STREAM_FLIP, STREAM_FLIP_VY,
+)
+
+# NumPy batch version of simulation.Simulation: N independent games stepped
+# together. Bird, pipe and score state are arrays (lanes x pipe slots) and every
+# rule in Simulation.step() is applied as array ops. Random draws use the same
+# counter-based hash, so lane i with seed s matches Simulation(seed=s) exactly.
+# Lanes may run different difficulty profiles (A/B runs): the compiled tables
+# are stacked into one (profiles x scores) array per knob and gathered by
+# (lane profile, score index). Spawning runs the per-tick countdown that
+# simulation.PipeStream's course clock jumps through, so lanes lay out the
+# same courses as the scalar stream without building one per lane.
+# Needs NumPy (pip install .[sim]); the game itself never imports this.
+
+_U64 = np.uint64
+_INV_2_53 = 1.0 / (1 << 53)
+
+
+def mix64(x):
+    """Vectorized simulation.mix64 on a uint64 array (wraps like & MASK64)."""
+    x = x + _U64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> _U64(30))) * _U64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> _U64(27))) * _U64(0x94D049BB133111EB)
+    return x ^ (x >> _U64(31))
+
+
+def rand_u64(key, tick, pair_id, stream):
+    pair_bits = pair_id.astype(_U64) & _U64((1 << PAIR_ID_BITS) - 1)
+    counter = (tick.astype(_U64) << _U64(20)) + (pair_bits << _U64(4)) + _U64(stream)
+    return mix64(key + counter)
+
+
+def unit_float(u):
+    return (u >> _U64(11)).astype(np.float64) * _INV_2_53
+
+
+def random_vy(u, max_speed):
+    sign = np.where(u & _U64(1), -1.0, 1.0)
+    return sign * (0.3 + (max_speed - 0.3) * unit_float(u))
+
+
+class _ProfileTables:
+    """Difficulty tables of several profiles as (profiles x scores) arrays."""
+
+    def __init__(self, profiles):
+        self.profiles = profiles
+        width = max(p.size for p in profiles)
+
+        def stack(attr, dtype):
+            # pad short tables with their last entry (never indexed anyway)
+            rows = [getattr(p, attr) + [getattr(p, attr)[-1]] * (width - p.size) for p in profiles]
+            return np.array(rows, dtype=dtype)
+
+        self.gap = stack("gap", np.int64)
+        self.scroll_speed = stack("scroll_speed", np.int64)
+        self.max_vy = stack("max_vy", np.float64)
+        self.flip_chance = stack("flip_chance", np.float64)
+        self.vertical = stack("vertical", bool)
+        self.spawn_interval = stack("spawn_interval", np.int64)
+        self.size = np.array([p.size for p in profiles], dtype=np.int64)
+        self.period = np.array([p.period for p in profiles], dtype=np.int64)
+
+    def index(self, rows, scores):
+        """Per-lane score index (DifficultyProfile.index, vectorized)."""
+        size = self.size[rows]
+        folded = size - self.period[rows] + (scores - size) % self.period[rows]
+        return np.where(scores < size, scores, folded)
+
+
+class BatchSimulation:
+    def __init__(self, n, seeds=None, spawn_interval="profile", seed=None, profiles=None, precise=False):
+        """
+        n lanes. seeds: one run seed per lane (defaults come from `seed`).
+        profiles: one difficulty profile (or name) for every lane, or a list
+        with one per lane; None = the config default.
+        spawn_interval: "profile" follows each lane's profile, an int fixes it.
+        Pipes always auto-spawn.
+        precise: pixel-mask pipe collisions, as Simulation(precise=True).
+        """
+        self.n = n
+        self.spawn_interval = spawn_interval
+        self.precise = precise
+        if precise:
+            self._load_shapes()
+        if profiles is None or isinstance(profiles, str) or not hasattr(profiles, "__len__"):
+            profiles = [profiles] * n
+        if len(profiles) != n:
+            raise ValueError("need one profile per lane")
+        lane_profiles = [get_profile(p) for p in profiles]
+        unique = list({p.name: p for p in lane_profiles}.values())
+        self.tables = _ProfileTables(unique)
+        row_of = {p.name: i for i, p in enumerate(unique)}
+        self.profile_row = np.array([row_of[p.name] for p in lane_profiles], dtype=np.int64)
+
+        fixed = spawn_interval if spawn_interval != "profile" else None
+        self.slots = max(pair_capacity(p, fixed) for p in unique)
+        self._seed_source = random.Random(seed)
+
+        shape = (n, self.slots)
+        self.seeds = np.zeros(n, dtype=_U64)
+        self._key = np.zeros(n, dtype=_U64)
+        self.bird_y = np.zeros(n, dtype=np.int64)
+        self.velocity_y = np.zeros(n, dtype=np.float64)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.pairs_spawned = np.zeros(n, dtype=np.int64)
+        self._spawn_countdown = np.zeros(n, dtype=np.int64)
+
+        # pipe pairs, slot = pair id % slots (a ring per lane)
+        self.pipe_alive = np.zeros(shape, dtype=bool)
+        self.pipe_id = np.zeros(shape, dtype=np.int64)
+        self.pipe_x = np.zeros(shape, dtype=np.int64)
+        self.pipe_top_y = np.zeros(shape, dtype=np.int64)
+        self.pipe_bottom_y = np.zeros(shape, dtype=np.int64)
+        self.pipe_gap = np.zeros(shape, dtype=np.int64)
+        self.pipe_vy = np.zeros(shape, dtype=np.float64)
+        self.pipe_frozen = np.ones(shape, dtype=bool)
+        self.pipe_passed = np.zeros(shape, dtype=bool)
+
+        self.reset(seeds)
+
+    def _load_shapes(self):
+        """collision.py's shapes as arrays: poses (frame-major) x padded rows of uint64 bitsets."""
+        shapes = collision.shapes()
+        poses = [s for row in shapes.poses for s in row]
+        height = max(s.height for s in poses)
+        self._pose_rows = np.zeros((len(poses), height), dtype=_U64)
+        for i, s in enumerate(poses):
+            self._pose_rows[i, :s.height] = s.rows
+        self._pose_w = np.array([s.width for s in poses], dtype=np.int64)
+        self._pose_h = np.array([s.height for s in poses], dtype=np.int64)
+        self._pose_dx = np.array([s.dx for s in poses], dtype=np.int64)
+        self._pose_dy = np.array([s.dy for s in poses], dtype=np.int64)
+        self._pipe_rows = np.array([shapes.top_pipe.rows, shapes.bottom_pipe.rows], dtype=_U64)
+        self._pipe_h = shapes.top_pipe.height
+
+    def _pose(self, vel):
+        """collision.frame_index / pitch_index per lane, as a flat pose index."""
+        frame = np.where(vel < collision.FRAME_UP_VY, 2, np.where(vel > collision.FRAME_DOWN_VY, 0, 1))
+        angle = -vel * collision.PITCH_GAIN
+        pitch = np.trunc((angle - collision.MAX_PITCH_DOWN_DEG) / collision.PITCH_STEP_DEG + 0.5).astype(np.int64)
+        pitch = np.where(angle <= collision.MAX_PITCH_DOWN_DEG, 0,
+                         np.where(angle >= collision.MAX_PITCH_UP_DEG, collision.PITCH_STEPS - 1, pitch))
+        return frame * collision.PITCH_STEPS + pitch
+
+    def _mask_hits(self, pose, left, top, kind, px, py):
+        """Narrowphase for K candidates: pose rows at (left, top) vs pipe `kind` rows at (px, py)."""
+        rows = np.arange(self._pose_rows.shape[1])
+        bird = self._pose_rows[pose]
+        pipe_row = top[:, None] + rows - py[:, None]
+        valid = (pipe_row >= 0) & (pipe_row < self._pipe_h) & (rows < self._pose_h[pose][:, None])
+        pipe = np.where(valid, self._pipe_rows[kind[:, None], np.clip(pipe_row, 0, self._pipe_h - 1)], _U64(0))
+        # line both up on the left one; bits pushed past 64 are outside the other shape anyway
+        shift = left - px
+        bird_shift = np.clip(shift, 0, 63).astype(_U64)[:, None]
+        pipe_shift = np.clip(-shift, 0, 63).astype(_U64)[:, None]
+        return ((bird << bird_shift) & (pipe << pipe_shift)).any(axis=1)
+
+    def reset(self, seeds=None, lanes=None):
+        """Reset the given lanes (bool mask or indices; default all) to new runs."""
+        if lanes is None:
+            lanes = np.arange(self.n)
+        elif np.asarray(lanes).dtype == bool:
+            lanes = np.flatnonzero(lanes)
+        lanes = np.asarray(lanes, dtype=np.int64)
+        if seeds is None:
+            seeds = [self._seed_source.getrandbits(63) for _ in range(len(lanes))]
+        seeds = np.array([int(s) & MASK64 for s in seeds], dtype=_U64)
+
+        self.seeds[lanes] = seeds
+        self._key[lanes] = mix64(seeds)
+        self.bird_y[lanes] = BIRD_Y
+        self.velocity_y[lanes] = 0.0
+        self.score[lanes] = 0
+        self.game_over[lanes] = False
+        self.ticks[lanes] = 0
+        self.pairs_spawned[lanes] = 0
+        self._spawn_countdown[lanes] = 0  # set on the first tick, from the score then (like PipeStream)
+        self.pipe_alive[lanes] = False
+
+    def _next_spawn_interval(self, lanes):
+        if self.spawn_interval != "profile":
+            return self.spawn_interval
+        rows = self.profile_row[lanes]
+        return self.tables.spawn_interval[rows, self.tables.index(rows, self.score[lanes])]
+
+    def _spawn(self, lanes):
+        pair_id = self.pairs_spawned[lanes]
+        slot = pair_id % self.slots
+        rows = self.profile_row[lanes]
+        gap = self.tables.gap[rows, self.tables.index(rows, self.score[lanes])]
+        u = rand_u64(self._key[lanes], self.ticks[lanes], pair_id, STREAM_CENTER)
+        center_y = CENTER_MARGIN + (u % _U64(GROUND_Y - 2 * CENTER_MARGIN + 1)).astype(np.int64)
+
+        self.pipe_alive[lanes, slot] = True
+        self.pipe_id[lanes, slot] = pair_id
+        self.pipe_x[lanes, slot] = PIPE_X
+        self.pipe_top_y[lanes, slot] = center_y - gap // 2 - PIPE_HEIGHT
+        self.pipe_bottom_y[lanes, slot] = center_y + gap // 2
+        self.pipe_gap[lanes, slot] = gap
+        self.pipe_vy[lanes, slot] = 0.0
+        self.pipe_frozen[lanes, slot] = True
+        self.pipe_passed[lanes, slot] = False
+        self.pairs_spawned[lanes] += 1
+
+    def step(self, actions=None):
+        """
+        Advance every running lane one tick. actions: bool array, True = flap.
+        Lanes that are game over stay put. Returns per-lane EVENT_* bits (uint8).
+        """
+        active = ~self.game_over
+        events = np.zeros(self.n, dtype=np.uint8)
+        self.ticks += active
+        tick = self.ticks
+
+        # --- spawning ---
+        opening = active & (tick == 1)
+        if opening.any():
+            lanes = np.flatnonzero(opening)
+            self._spawn_countdown[lanes] = self._next_spawn_interval(lanes)
+        self._spawn_countdown -= active
+        spawn = active & (self._spawn_countdown <= 0)
+        if spawn.any():
+            lanes = np.flatnonzero(spawn)
+            self._spawn_countdown[lanes] = self._next_spawn_interval(lanes)
+            self._spawn(lanes)
+
+        # --- Bird physics ---
+        vel = self.velocity_y
+        if actions is not None:
+            vel = np.where(active & actions, float(FLAP_VELOCITY), vel)
+        vel = np.where(active, vel + GRAVITY, vel)
+        bird_y = np.where(active, self.bird_y + np.trunc(vel).astype(np.int64), self.bird_y)
+        np.maximum(bird_y, 0, out=bird_y)
+        ground = active & (bird_y + BIRD_HEIGHT > GROUND_Y)
+        bird_y[ground] = GROUND_Y - BIRD_HEIGHT
+        vel[ground] = 0.0
+        events[ground] |= EVENT_GROUND
+        self.velocity_y = vel
+        self.bird_y = bird_y
+        bird_top = bird_y[:, None]
+        bird_bottom = bird_top + BIRD_HEIGHT
+
+        # --- difficulty knobs (per lane table lookups) ---
+        score = self.score
+        tables = self.tables
+        rows = self.profile_row
+        k = tables.index(rows, score)
+        max_speed = tables.max_vy[rows, k][:, None]
+        flip_chance = tables.flip_chance[rows, k][:, None]
+        enable_vertical = tables.vertical[rows, k][:, None]
+        scroll = tables.scroll_speed[rows, k][:, None]
+
+        moving = active[:, None] & self.pipe_alive
+        key = self._key[:, None]
+        tick2 = tick[:, None]
+        pid = self.pipe_id
+
+        # horizontal scroll
+        x = self.pipe_x
+        x += np.where(moving, scroll, 0)
+
+        vert = moving & enable_vertical
+        vy = self.pipe_vy
+        if vert.any():
+            # unfreeze on first tick of enabled state, seed vy once
+            unfreeze = vert & self.pipe_frozen
+            if unfreeze.any():
+                lane_i, slot_i = np.nonzero(unfreeze)
+                u = rand_u64(self._key[lane_i], tick[lane_i], pid[lane_i, slot_i], STREAM_SEED_VY)
+                vy[lane_i, slot_i] = random_vy(u, max_speed[lane_i, 0])
+                self.pipe_frozen[unfreeze] = False
+
+            # vertical move + bounce: the gap stays between the top of the screen and the ground
+            top_y = np.trunc(self.pipe_top_y + vy).astype(np.int64)
+            low = top_y + PIPE_HEIGHT < 0
+            high = ~low & (top_y + PIPE_HEIGHT + self.pipe_gap > GROUND_Y)
+            top_y = np.where(low, -PIPE_HEIGHT, np.where(high, GROUND_Y - self.pipe_gap - PIPE_HEIGHT, top_y))
+            vy = np.where(vert & (low | high), -vy, vy)
+
+            # occasional chaos flips ONLY when enabled
+            roll = unit_float(rand_u64(key, tick2, pid, STREAM_FLIP))
+            flip = vert & (flip_chance > 0) & (roll < flip_chance)
+            if flip.any():
+                lane_i, slot_i = np.nonzero(flip)
+                u = rand_u64(self._key[lane_i], tick[lane_i], pid[lane_i, slot_i], STREAM_FLIP_VY)
+                vy[lane_i, slot_i] = random_vy(u, max_speed[lane_i, 0])
+
+            # follower keeps exact stored gap
+            self.pipe_top_y = np.where(vert, top_y, self.pipe_top_y)
+            self.pipe_bottom_y = np.where(vert, top_y + PIPE_HEIGHT + self.pipe_gap, self.pipe_bottom_y)
+
+        # hard pin: frozen pairs stay exactly where they stopped
+        pinned = moving & ~enable_vertical
+        self.pipe_frozen |= pinned
+        vy[pinned] = 0.0
+        self.pipe_vy = vy
+
+        # scoring
+        passed = moving & ~self.pipe_passed & (BIRD_X > x + PIPE_WIDTH)
+        self.pipe_passed |= passed
+        gained = passed.sum(axis=1)
+        self.score = score + gained
+        events[gained > 0] |= EVENT_SCORE
+
+        # collisions: AABB (of the rotated pose when precise), then masks
+        top = self.pipe_top_y
+        bottom = self.pipe_bottom_y
+        if self.precise:
+            pose = self._pose(vel)
+            left = BIRD_X + BIRD_WIDTH // 2 + self._pose_dx[pose]
+            bird_top = bird_y + BIRD_HEIGHT // 2 + self._pose_dy[pose]
+            bird_bottom = (bird_top + self._pose_h[pose])[:, None]
+            right = (left + self._pose_w[pose])[:, None]
+            bird_top = bird_top[:, None]
+            overlap_x = (left[:, None] < x + PIPE_WIDTH) & (x < right)
+        else:
+            overlap_x = (BIRD_X < x + PIPE_WIDTH) & (x < BIRD_X + BIRD_WIDTH)
+        # pipes run from their gap edge to the edge of the play area
+        hit_top = moving & overlap_x & (bird_top < top + PIPE_HEIGHT)
+        hit_bottom = moving & overlap_x & (bottom < bird_bottom)
+        if self.precise and (hit_top.any() or hit_bottom.any()):
+            lane_t, slot_t = np.nonzero(hit_top)
+            lane_b, slot_b = np.nonzero(hit_bottom)
+            lane_i = np.concatenate([lane_t, lane_b])
+            kind = np.concatenate([np.zeros(len(lane_t), np.int64), np.ones(len(lane_b), np.int64)])
+            py = np.concatenate([top[lane_t, slot_t] + PIPE_HEIGHT - self._pipe_h, bottom[lane_b, slot_b]])
+            px = np.concatenate([x[lane_t, slot_t], x[lane_b, slot_b]])
+            hits = self._mask_hits(pose[lane_i], left[lane_i], bird_top[lane_i, 0], kind, px, py)
+            crash = np.zeros(self.n, dtype=bool)
+            crash[lane_i[hits]] = True
+        else:
+            crash = (hit_top | hit_bottom).any(axis=1)
+        events[crash] |= EVENT_CRASH
+
+        self.game_over |= ground | crash
+
+        # purge off-screen pairs
+        self.pipe_alive &= ~(moving & (x + PIPE_WIDTH < -PIPE_WIDTH))
+
+        return events
@@ -0,0 +1,398 @@
+"""
+Headless frame-time benchmark for the real game loop.
+
+Runs main.py under SDL's dummy video/audio drivers with a virtual 60 Hz clock
+and scripted input, and times the update, draw and present phases of each
+frame for a few fixed scenarios (present includes the dirty-rect composite).
+Timings are the best of a few passes. One more pass counts the Surfaces made
+per frame and their pixel bytes (what the regression check gates on), plus
+the Python heap allocated per frame under tracemalloc, which can't see pixel
+buffers.
+
+    python benchmark.py --out bench.json
+    python benchmark.py --out new.json --baseline bench.json   # exit 1 on regression
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import runpy
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import simulation
+import theme_changer
+import replay
+import input_pipeline
+import capture
+import scores
+from dirty_render import DirtyRenderer
+
+ROOT = Path(__file__).parent
+PHASES = ("update", "draw", "present", "frame")
+WARMUP_FRAMES = 120  # lets pipes fill the screen before sampling
+
+# name -> (min score kept during the scenario, force game over)
+SCENARIOS = {
+    "early": (0, False),
+    "vertical": (11, False),    # vertical pipe motion enabled
+    "crossfade": (25, False),   # only frames drawn mid day/night crossfade count
+    "game_over": (0, True),     # game-over overlay
+}
+
+# a hair over one tick per frame so every frame runs exactly one sim tick
+_FRAME_MS = 1000.0 / simulation.TICKS_PER_SECOND + 1e-6
+
+# Surface methods that return a new pixel buffer (seen through sys.setprofile:
+# pygame's Surface type can't be patched)
+_SURFACE_METHODS = ("copy", "convert", "convert_alpha")
+
+
+async def _no_wait(pacer, inputs):
+    """FramePacer.wait without the sleep; drain() then polls input once per frame."""
+    await asyncio.sleep(0)  # background tasks (asset streaming) still get their turn
+
+
+def percentiles(values):
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    s = sorted(values)
+
+    def pick(q):
+        return s[min(len(s) - 1, int(q * len(s)))]
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99), "mean": sum(s) / len(s)}
+
+
+class SurfaceCounter:
+    """
+    Counts Surfaces made on this thread and their pixel bytes while installed:
+    pygame.Surface(...) (swapped for a counting subclass), copy()/convert()/
+    convert_alpha() on any surface, and every pygame.transform function that
+    returns a new surface.
+    """
+
+    def __init__(self):
+        self.surfaces = 0
+        self.bytes = 0
+        self._saved = []
+
+    def add(self, surf):
+        self.surfaces += 1
+        self.bytes += surf.get_pitch() * surf.get_height()
+
+    def _profile(self, frame, event, func):
+        if event != "c_call" or getattr(func, "__name__", None) not in _SURFACE_METHODS:
+            return
+        src = getattr(func, "__self__", None)
+        if isinstance(src, self._surface_type):
+            w, h = src.get_size()
+            self.surfaces += 1
+            self.bytes += src.get_pitch() * h if func.__name__ == "copy" else w * h * 4
+
+    def _wrap(self, fn):
+        counter, surface_type = self, self._surface_type
+
+        def counted(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            # skip the dest_surface= variants, which fill a surface passed in
+            if isinstance(result, surface_type) and not any(result is a for a in args + tuple(kwargs.values())):
+                counter.add(result)
+            return result
+        return counted
+
+    def install(self):
+        counter = self
+        surface_type = self._surface_type = pygame.Surface
+
+        class CountedSurface(surface_type):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                counter.add(self)
+
+        self._saved = [(pygame, "Surface", surface_type)]
+        pygame.Surface = CountedSurface
+        for name in dir(pygame.transform):
+            fn = getattr(pygame.transform, name)
+            if callable(fn) and not name.startswith(("_", "get_", "set_")):
+                self._saved.append((pygame.transform, name, fn))
+                setattr(pygame.transform, name, self._wrap(fn))
+        sys.setprofile(self._profile)
+
+    def uninstall(self):
+        sys.setprofile(None)
+        for obj, attr, value in self._saved:
+            setattr(obj, attr, value)
+        self._saved = []
+
+
+class Driver:
+    """Scripts input and scenario setup from inside pygame.event.get()."""
+
+    def __init__(self, frames, measure_alloc):
+        self.frames = frames
+        self.measure_alloc = measure_alloc
+        self.sim = None
+        self.clock_frames = 0
+        self.names = list(SCENARIOS)
+        self.index = 0
+        self.frame_in_scenario = 0
+        self.samples = {name: {key: [] for key in PHASES + ("alloc_bytes", "surfaces", "surface_bytes")}
+                        for name in self.names}
+        self._t_start = self._t_draw = self._t_present = self._t_end = None
+        self._alloc_start = 0
+        self._alloc = 0
+        self.counter = SurfaceCounter()
+        self._counted_start = self._counted = (0, 0)
+        self._crossfade_frame = False
+
+    # --- hooks ---
+    def get_ticks(self):
+        return self.clock_frames * _FRAME_MS
+
+    def begin(self, renderer, background):
+        self._t_draw = time.perf_counter()
+        self._crossfade_frame = background is None
+        return self._orig_begin(renderer, background)
+
+    def present(self, renderer):
+        self._t_present = time.perf_counter()
+        result = self._orig_present(renderer)
+        self._t_end = time.perf_counter()
+        if self.measure_alloc:
+            self._alloc = tracemalloc.get_traced_memory()[1] - self._alloc_start
+            c = self.counter
+            self._counted = (c.surfaces - self._counted_start[0], c.bytes - self._counted_start[1])
+        return result
+
+    def event_get(self, *args, **kwargs):
+        events = list(self._orig_get(*args, **kwargs))
+        self._record()
+        self.clock_frames += 1
+        events += self._script()
+        if self.measure_alloc:
+            tracemalloc.reset_peak()
+            self._alloc_start = tracemalloc.get_traced_memory()[0]
+            self._counted_start = (self.counter.surfaces, self.counter.bytes)
+        self._t_start = time.perf_counter()
+        return events
+
+    # --- scenario logic ---
+    def _record(self):
+        if self._t_end is None or self._t_start is None:
+            return
+        name = self.names[self.index]
+        keep = self.frame_in_scenario > WARMUP_FRAMES
+        if name == "crossfade":
+            keep = keep and self._crossfade_frame
+        if keep:
+            bucket = self.samples[name]
+            bucket["update"].append((self._t_draw - self._t_start) * 1000.0)
+            bucket["draw"].append((self._t_present - self._t_draw) * 1000.0)
+            bucket["present"].append((self._t_end - self._t_present) * 1000.0)
+            bucket["frame"].append((self._t_end - self._t_start) * 1000.0)
+            if self.measure_alloc:
+                bucket["alloc_bytes"].append(self._alloc)
+                bucket["surfaces"].append(self._counted[0])
+                bucket["surface_bytes"].append(self._counted[1])
+        self._t_end = None
+
+    def start_run(self, sim):
+        """A run just reset: start it at the scenario's score, before the first
+        step builds its pipe stream, so the course comes from that score's difficulty."""
+        if self.index < len(self.names):
+            sim.score = SCENARIOS[self.names[self.index]][0]
+
+    def _flap_event(self):
+        return pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE, mod=0, unicode=" ", scancode=44)
+
+    def _script(self):
+        sim = self.sim
+        if sim is None:
+            return []
+        name = self.names[self.index]
+        if len(self.samples[name]["frame"]) >= self.frames:
+            self.index += 1
+            self.frame_in_scenario = 0
+            if self.index == len(self.names):
+                return [pygame.event.Event(pygame.QUIT)]
+            name = self.names[self.index]
+        force_game_over = SCENARIOS[name][1]
+        self.frame_in_scenario += 1
+
+        if self.frame_in_scenario == 1:
+            # start from a fresh run: a key press on the game-over screen restarts
+            sim.game_over = True
+            return [self._flap_event()]
+
+        if force_game_over:
+            sim.game_over = True
+            return []
+        if sim.game_over:
+            return [self._flap_event()]  # died: restart and carry on
+        theme = theme_changer.state
+        if name == "crossfade" and not theme.transitioning and theme.current_theme != theme.first:
+            theme_changer.reset_theme()  # next update starts another crossfade
+
+        # autopilot: flap when sinking below the next gap
+        target = simulation.GROUND_Y - 120
+        for pair in sim.pipes:
+            if pair.x + simulation.PIPE_WIDTH >= simulation.BIRD_X:
+                target = pair.bottom_y - 30
+                break
+        if sim.bird_y + simulation.BIRD_HEIGHT > target and sim.velocity_y > -2:
+            return [self._flap_event()]
+        return []
+
+
+def run_pass(frames, measure_alloc):
+    driver = Driver(frames, measure_alloc)
+
+    orig_reset = simulation.Simulation.reset
+
+    def reset(sim, seed=None):
+        driver.sim = sim
+        result = orig_reset(sim, seed)
+        driver.start_run(sim)
+        return result
+
+    driver._orig_get = pygame.event.get
+    driver._orig_begin = DirtyRenderer.begin
+    driver._orig_present = DirtyRenderer.present
+    clip_dir = tempfile.TemporaryDirectory()
+    orig_export = capture.FrameCapture.export
+
+    def export(self, path, fmt="gif", seconds=None):
+        # the real export (child process and all), just not into clips/
+        return orig_export(self, Path(clip_dir.name) / Path(path).name, fmt, seconds)
+
+    patches = [
+        (pygame.event, "get", driver.event_get),
+        (pygame.time, "get_ticks", driver.get_ticks),
+        (input_pipeline.FramePacer, "wait", _no_wait),
+        (DirtyRenderer, "begin", lambda renderer, background: driver.begin(renderer, background)),
+        (DirtyRenderer, "present", lambda renderer: driver.present(renderer)),
+        (simulation.Simulation, "reset", reset),
+        (replay.Replay, "save", lambda self, path: None),  # don't litter replays/
+        (capture.FrameCapture, "export", export),
+        (scores, "open_store", scores.MemoryStore),  # or scores.db
+    ]
+    saved = [(obj, attr, getattr(obj, attr)) for obj, attr, _ in patches]
+    argv = sys.argv
+    try:
+        for obj, attr, value in patches:
+            setattr(obj, attr, value)
+        sys.argv = [str(ROOT / "main.py")]
+        theme_changer.reset_theme()
+        if measure_alloc:
+            tracemalloc.start()
+            driver.counter.install()
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(str(ROOT / "main.py"), run_name="__main__")
+    finally:
+        if measure_alloc:
+            driver.counter.uninstall()
+            tracemalloc.stop()
+        for obj, attr, value in saved:
+            setattr(obj, attr, value)
+        sys.argv = argv
+        clip_dir.cleanup()
+    return driver.samples
+
+
+def run(frames, repeat=3):
+    """Best (lowest) percentiles over `repeat` timing passes, plus one alloc pass."""
+    timings = [run_pass(frames, measure_alloc=False) for _ in range(repeat)]
+    alloc = run_pass(frames, measure_alloc=True)
+    scenarios = {}
+    for name in SCENARIOS:
+        result = {}
+        for phase in PHASES:
+            runs = [percentiles(t[name][phase]) for t in timings]
+            result[phase] = {key: min(r[key] for r in runs) for key in runs[0]}
+        for key in ("surfaces", "surface_bytes", "alloc_bytes"):
+            result[key] = percentiles(alloc[name][key])
+        result["frames"] = len(timings[0][name]["frame"])
+        scenarios[name] = result
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "frames": frames,
+            "repeat": repeat,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": scenarios,
+    }
+
+
+def compare(current, baseline, tolerance, min_ms=0.05, min_bytes=4096):
+    """
+    List of regression messages: p95 times, and p95 surface bytes made per
+    frame (any new per-frame surface over min_bytes, e.g. a 32x32 sprite).
+    The tracemalloc heap figure is reported but not gated on.
+    """
+    problems = []
+    for name, cur in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if base is None:
+            continue
+        for phase in PHASES:
+            c, b = cur[phase]["p95"], base[phase]["p95"]
+            if c > b * (1.0 + tolerance) and c - b > min_ms:
+                problems.append(f"{name}/{phase}: p95 {b:.3f} -> {c:.3f} ms")
+        if "surface_bytes" in base:
+            c, b = cur["surface_bytes"]["p95"], base["surface_bytes"]["p95"]
+            if c > b * (1.0 + tolerance) and c - b > min_bytes:
+                problems.append(f"{name}/surfaces: p95 {b} -> {c} pixel bytes/frame")
+    return problems
+
+
+def print_report(result):
+    print(f"{'scenario':<10} {'phase':<8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for name, res in result["scenarios"].items():
+        for phase in PHASES:
+            p = res[phase]
+            print(f"{name:<10} {phase:<8} {p['p50']:8.3f} {p['p95']:8.3f} {p['p99']:8.3f}")
+        for key, label, unit in (("surfaces", "surfaces", "made"), ("surface_bytes", "pixels", "bytes"),
+                                 ("alloc_bytes", "heap", "bytes")):
+            a = res[key]
+            print(f"{name:<10} {label:<8} {a['p50']:8.0f} {a['p95']:8.0f} {a['p99']:8.0f}  ({unit})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--frames", type=int, default=300, help="sampled frames per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="timing passes (best of)")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    result = run(args.frames, args.repeat)
+    print_report(result)
+    if args.out:
+        Path(args.out).write_text(json.dumps(result, indent=2))
+
+    if args.baseline:
+        problems = compare(result, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for p in problems:
+            print("REGRESSION", p)
+        if problems:
+            sys.exit(1)
+        print("no regressions vs", args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import json
+import subprocess
+import sys
+import threading
+import time
+from array import array
+from pathlib import Path
+import pygame
+import gif_writer
+from gif_writer import PALETTE_332
+
+# Always-on gameplay capture. The last few seconds of the window are kept in a
+# ring of preallocated 8-bit surfaces: each captured frame is one scale into a
+# reused scratch surface and one blit into the next ring slot, where SDL maps
+# it to a fixed RGB332 palette (3 bits red, 3 green, 2 blue) in C. No surfaces
+# or Python objects are made per frame, and the frames are already GIF-ready.
+#
+# export() freezes the ring and writes it from a background thread; capture()
+# skips frames until the writer is done, so nothing is copied on the main
+# thread. GIF encoding (gif_writer.py, a pure-Python LZW loop: a second or more
+# of CPU per clip) runs in a child process fed the frames over a pipe, so it
+# never holds the game's GIL. Raw rgb24 (for ffmpeg) is just C copies and is
+# written by the thread itself.
+
+CAPTURE_FPS = 30
+CLIP_SECONDS = 4
+CAPTURE_SCALE = 0.5
+
+
+class FrameCapture:
+    def __init__(self, source, seconds=CLIP_SECONDS, fps=CAPTURE_FPS, scale=CAPTURE_SCALE, enabled=True):
+        self.source = source
+        self.fps = fps
+        self.enabled = enabled
+        self.busy = False  # a writer thread owns the ring
+        self._writer = None
+        w, h = source.get_size()
+        self.size = (max(1, round(w * scale)), max(1, round(h * scale)))
+        n = max(1, round(seconds * fps)) if enabled else 0
+        self._frames = []
+        for _ in range(n):
+            frame = pygame.Surface(self.size, 0, 8)
+            frame.set_palette(PALETTE_332)
+            self._frames.append(frame)
+        # full-color scratch for the downscale (the palette mapping happens on the blit)
+        self._scratch = pygame.Surface(self.size, 0, 32) if self.size != (w, h) and enabled else None
+        self._times = array("q", bytes(8 * n))  # capture time (ms) per slot
+        self._count = 0
+        self._next = 0
+        self._interval = 1000.0 / fps
+
+    def capture(self, now_ms):
+        """Grab the source if a frame is due. Call right after present."""
+        if not self.enabled or self.busy or now_ms < self._next:
+            return
+        # stay on the fps grid, but don't try to catch up after a stall
+        self._next = max(self._next + self._interval, now_ms - self._interval)
+        slot = self._count % len(self._frames)
+        if self._scratch is not None:
+            pygame.transform.scale(self.source, self.size, self._scratch)
+            self._frames[slot].blit(self._scratch, (0, 0))
+        else:
+            self._frames[slot].blit(self.source, (0, 0))
+        self._times[slot] = int(now_ms)
+        self._count += 1
+
+    def clip(self, seconds=None):
+        """The buffered frames oldest first (the last `seconds` of them), with capture times."""
+        n = min(self._count, len(self._frames))
+        if seconds is not None:
+            n = min(n, max(1, round(seconds * self.fps)))
+        slots = [k % len(self._frames) for k in range(self._count - n, self._count)]
+        return [self._frames[s] for s in slots], [self._times[s] for s in slots]
+
+    def export(self, path, fmt="gif", seconds=None):
+        """
+        Write the buffered clip to `path` on a background thread. Returns the
+        thread, or None if there's nothing to write or a write is running.
+        """
+        if not self.enabled or self.busy or not self._count:
+            return None
+        frames, times = self.clip(seconds)
+        writer = write_gif_process if fmt == "gif" else write_raw
+        self.busy = True
+
+        def run():
+            start = time.perf_counter()
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                writer(path, frames, times)
+                print(f"Saved clip {path} ({len(frames)} frames, {time.perf_counter() - start:.1f}s)")
+            except Exception as e:
+                print(f"Clip export failed: {e}")
+            finally:
+                self._next = 0  # resume capturing right away
+                self.busy = False
+
+        self._writer = threading.Thread(target=run, name="clip-export", daemon=True)
+        self._writer.start()
+        return self._writer
+
+    def join(self):
+        """Wait for a running export (call before pygame.quit())."""
+        if self._writer is not None:
+            self._writer.join()
+
+
+def write_gif_process(path, frames, times):
+    """gif_writer.write_gif() in a child process; this side only copies the frames into its stdin."""
+    w, h = frames[0].get_size()
+    header = json.dumps({"size": [w, h], "count": len(frames), "times": list(times)})
+    proc = subprocess.Popen([sys.executable, gif_writer.__file__, str(path)], stdin=subprocess.PIPE)
+    try:
+        proc.stdin.write(header.encode() + b"\n")
+        for frame in frames:
+            proc.stdin.write(pygame.image.tobytes(frame, "P"))
+        proc.stdin.close()
+    finally:
+        code = proc.wait()
+    if code:
+        raise RuntimeError(f"GIF encoder exited with status {code}")
+
+
+def write_raw(path, frames, times):
+    """Raw rgb24 frames back to back; prints the ffmpeg line to turn them into a video."""
+    w, h = frames[0].get_size()
+    with open(path, "wb") as f:
+        for frame in frames:
+            f.write(pygame.image.tobytes(frame, "RGB"))
+    span = (times[-1] - times[0]) / 1000.0 if len(times) > 1 else 0
+    fps = (len(frames) - 1) / span if span else CAPTURE_FPS
+    print(f"  ffmpeg -f rawvideo -pix_fmt rgb24 -s {w}x{h} -r {fps:.2f} -i {path} clip.mp4")
+
@@ -0,0 +1,196 @@
+import struct
+import zlib
+from pathlib import Path
+
+# Pixel-accurate collision shapes, precomputed. The bird's pose is a pure
+# function of its velocity (the flap frame the renderer biases toward and the
+# pitch it eases toward), so every (frame, quantized pitch) pose gets a mask of
+# its rotated sprite, baked once from the same RotationCache the game draws
+# with. Masks are stored as one int per row (bit x = opaque pixel at column x),
+# so testing a pose against a pipe is a few ANDs per overlapping row and needs
+# neither pygame nor NumPy: the headless and batch simulations use the same
+# file. Pipes are shapes too (their caps are wider than the body), baked at the
+# full height of the play area and placed against their gap edge, so a pipe of
+# any length is covered.
+#
+#   python collision.py   -> re-bake assets/collision_masks.bin after changing sprites or pose constants
+
+ROOT = Path(__file__).parent
+MASKS_PATH = ROOT / "assets" / "collision_masks.bin"
+
+# bird pose: pitch follows velocity (clamped), snapped to PITCH_STEP_DEG
+MAX_PITCH_UP_DEG = 58.0     # nose-up clamp
+MAX_PITCH_DOWN_DEG = -90.0  # nose-down clamp
+PITCH_GAIN = 15.0           # maps velocity_y -> degrees
+PITCH_STEP_DEG = 2.0        # rotation cache resolution
+# flap frame by velocity (Bird.frames order: down, mid, up)
+FRAME_UP_VY = -2
+FRAME_DOWN_VY = 3
+FRAME_COUNT = 3
+PITCH_STEPS = int(round((MAX_PITCH_UP_DEG - MAX_PITCH_DOWN_DEG) / PITCH_STEP_DEG)) + 1
+
+_MAGIC = b"FBM"
+_VERSION = 1
+_HEADER = struct.Struct("<3sBBHff")  # magic, version, frames, pitch steps, min deg, step deg
+_SHAPE = struct.Struct("<HHhh")      # width, height, dx, dy (offset from the sprite center)
+
+
+class Shape:
+    """A mask as row bitsets. dx/dy place its top-left relative to the sprite center."""
+    __slots__ = ("rows", "width", "height", "dx", "dy")
+
+    def __init__(self, rows, width, dx=0, dy=0):
+        self.rows = rows
+        self.width = width
+        self.height = len(rows)
+        self.dx = dx
+        self.dy = dy
+
+    def hits(self, x, y, other, ox, oy):
+        """True if self at (x, y) and other at (ox, oy) share an opaque pixel."""
+        r0 = max(y, oy)
+        r1 = min(y + self.height, oy + other.height)
+        if r0 >= r1 or x >= ox + other.width or ox >= x + self.width:
+            return False
+        rows, orows = self.rows, other.rows
+        shift = x - ox
+        if shift >= 0:
+            for r in range(r0, r1):
+                if (rows[r - y] << shift) & orows[r - oy]:
+                    return True
+        else:
+            shift = -shift
+            for r in range(r0, r1):
+                if rows[r - y] & (orows[r - oy] << shift):
+                    return True
+        return False
+
+
+def pitch_index(velocity_y):
+    """Quantized pitch for a velocity (same snapping as RotationCache.angle_index)."""
+    angle = -velocity_y * PITCH_GAIN
+    if angle <= MAX_PITCH_DOWN_DEG:
+        return 0
+    if angle >= MAX_PITCH_UP_DEG:
+        return PITCH_STEPS - 1
+    return int((angle - MAX_PITCH_DOWN_DEG) / PITCH_STEP_DEG + 0.5)
+
+
+def frame_index(velocity_y):
+    if velocity_y < FRAME_UP_VY:
+        return 2
+    if velocity_y > FRAME_DOWN_VY:
+        return 0
+    return 1
+
+
+class CollisionShapes:
+    def __init__(self, poses, top_pipe, bottom_pipe):
+        self.poses = poses  # [frame][pitch index] -> Shape
+        self.top_pipe = top_pipe
+        self.bottom_pipe = bottom_pipe
+        # velocity only takes a few dozen distinct values (flap, then += gravity)
+        self._by_velocity = {}
+
+    def pose(self, velocity_y):
+        shape = self._by_velocity.get(velocity_y)
+        if shape is None:
+            shape = self._by_velocity[velocity_y] = self.poses[frame_index(velocity_y)][pitch_index(velocity_y)]
+        return shape
+
+    def to_bytes(self):
+        body = bytearray()
+        shapes = [self.top_pipe, self.bottom_pipe] + [s for row in self.poses for s in row]
+        for s in shapes:
+            body += _SHAPE.pack(s.width, s.height, s.dx, s.dy)
+            body += b"".join(r.to_bytes(8, "little") for r in s.rows)
+        header = _HEADER.pack(_MAGIC, _VERSION, FRAME_COUNT, PITCH_STEPS, MAX_PITCH_DOWN_DEG, PITCH_STEP_DEG)
+        return header + zlib.compress(bytes(body), 9)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, frames, steps, min_deg, step_deg = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("not a collision mask file")
+        if (frames, steps, min_deg, step_deg) != (FRAME_COUNT, PITCH_STEPS, MAX_PITCH_DOWN_DEG, PITCH_STEP_DEG):
+            raise ValueError("collision masks don't match the pose constants; run python collision.py")
+        body = zlib.decompress(data[_HEADER.size:])
+        pos = 0
+        shapes = []
+        for _ in range(2 + frames * steps):
+            w, h, dx, dy = _SHAPE.unpack_from(body, pos)
+            pos += _SHAPE.size
+            rows = tuple(int.from_bytes(body[pos + 8 * i:pos + 8 * i + 8], "little") for i in range(h))
+            pos += 8 * h
+            shapes.append(Shape(rows, w, dx, dy))
+        poses = [shapes[2 + f * steps:2 + (f + 1) * steps] for f in range(frames)]
+        return cls(poses, shapes[0], shapes[1])
+
+
+_shapes = None
+
+
+def shapes(path=MASKS_PATH):
+    """The baked shapes, loaded once."""
+    global _shapes
+    if _shapes is None:
+        _shapes = CollisionShapes.from_bytes(Path(path).read_bytes())
+    return _shapes
+
+
+# ---- baking (needs pygame) ----
+
+def _mask_rows(mask):
+    w, h = mask.get_size()
+    rows = []
+    for y in range(h):
+        row = 0
+        for x in range(w):
+            if mask.get_at((x, y)):
+                row |= 1 << x
+        rows.append(row)
+    return tuple(rows)
+
+
+def bake(path=MASKS_PATH):
+    import os
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    import asset_atlas
+    from sprite_cache import RotationCache
+    from simulation import PIPE_WIDTH, GROUND_Y
+    from theme_changer import ThemeLibrary, THEME_ORDER
+
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+    sprites = asset_atlas.load(write_cache=False).sprites()
+    frames = [sprites["bird_down"], sprites["bird_mid"], sprites["bird_up"]]
+    cache = RotationCache(frames, MAX_PITCH_DOWN_DEG, MAX_PITCH_UP_DEG, PITCH_STEP_DEG)
+    poses = []
+    for f in range(FRAME_COUNT):
+        row = []
+        for i in range(PITCH_STEPS):
+            angle = MAX_PITCH_DOWN_DEG + i * PITCH_STEP_DEG
+            mask = cache.mask(f, angle)
+            surf, (dx, dy) = cache.get(f, angle)
+            if surf.get_width() > 64:
+                raise ValueError("rotated bird wider than 64 px doesn't fit the batch sim's uint64 rows")
+            row.append(Shape(_mask_rows(mask), surf.get_width(), dx, dy))
+        poses.append(row)
+    # pipes as drawn, as long as they can get (gap edge to the far side of the play area)
+    theme = ThemeLibrary(write_cache=False).get(THEME_ORDER[0])
+    pipes = []
+    for draw, gap_edge in ((theme.pipes.draw_top, GROUND_Y), (theme.pipes.draw_bottom, 0)):
+        surf = pygame.Surface((PIPE_WIDTH, GROUND_Y), pygame.SRCALPHA)
+        surf.fill((0, 0, 0, 0))
+        draw(surf, 0, gap_edge)
+        pipes.append(Shape(_mask_rows(pygame.mask.from_surface(surf)), PIPE_WIDTH))
+    result = CollisionShapes(poses, *pipes)
+    data = result.to_bytes()
+    Path(path).write_bytes(data)
+    print(f"Baked {FRAME_COUNT}x{PITCH_STEPS} bird poses + 2 pipes into {path} ({len(data)} bytes)")
+    return result
+
+
+if __name__ == "__main__":
+    bake()
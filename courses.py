@@ -0,0 +1,114 @@
+"""
+Scan pipe courses for unfair transitions without playing them.
+
+Each seed's layout comes straight from simulation.PipeStream, so this only
+generates pair specs (no physics). A transition a -> b is unfair when the bird
+can't get from anywhere in a's gap to anywhere in b's gap in the ticks it has
+between the pipes: flapping every tick it climbs at most 5 px a tick, and
+falling from rest it drops sum(int(0.4 * i)). Only pairs that are still at
+spawn are judged; transitions into or out of a pair that's already moving
+depend on timing, so those are just counted.
+
+    python courses.py --profile chaos --seeds 2000 --pairs 200
+"""
+import argparse
+import time
+import difficulty
+from simulation import (
+    PipeStream, BIRD_WIDTH, BIRD_HEIGHT, PIPE_WIDTH, FLAP_VELOCITY, GRAVITY,
+)
+
+# best climb per tick when flapping every tick (int() truncates toward 0)
+MAX_CLIMB = -int(FLAP_VELOCITY + GRAVITY)
+SLACK_PX = 8  # report fair but tight transitions within this margin
+
+
+def max_drop(ticks):
+    """px fallen in `ticks` ticks starting at rest (same int() as the sim)."""
+    total = 0
+    velocity = 0.0
+    for _ in range(max(0, ticks)):
+        velocity += GRAVITY
+        total += int(velocity)
+    return total
+
+
+def bird_band(spec):
+    """Range of the bird's top y that fits inside spec's gap."""
+    return spec.center - spec.gap // 2, spec.center + spec.gap // 2 - BIRD_HEIGHT
+
+
+def transition_margin(a, b, speed):
+    """
+    px to spare going from pair a's gap to pair b's (negative = impossible).
+    speed: course px per tick while the bird is between them.
+    """
+    room = b.offset - a.offset - PIPE_WIDTH - BIRD_WIDTH
+    ticks = room // speed
+    a_top, a_bottom = bird_band(a)
+    b_top, b_bottom = bird_band(b)
+    climb = a_top - b_bottom   # > 0: b's gap is entirely higher
+    if climb > 0:
+        return MAX_CLIMB * ticks - climb
+    drop = b_top - a_bottom    # > 0: b's gap is entirely lower
+    if drop > 0:
+        return max_drop(ticks) - drop
+    return min(a_bottom, b_bottom) - max(a_top, b_top)  # overlapping bands
+
+
+def scan_course(seed, profile, pairs):
+    """(worst margin, its pair index, unfair count, tight count, moving transitions) for one seed."""
+    stream = PipeStream(seed, profile)
+    worst, worst_at, unfair, tight, moving = 0, -1, 0, 0, 0
+    prev = stream.pop()
+    # score while the bird is between prev and the next pair: prev's index + 1
+    for _ in range(pairs - 1):
+        spec = stream.pop()
+        if spec.vy or prev.vy:
+            moving += 1
+            prev = spec
+            continue
+        speed = -profile.scroll_speed[profile.index(prev.index + 1)]
+        margin = transition_margin(prev, spec, speed)
+        if margin < 0:
+            unfair += 1
+        elif margin < SLACK_PX:
+            tight += 1
+        if worst_at < 0 or margin < worst:
+            worst, worst_at = margin, spec.index
+        prev = spec
+    return worst, worst_at, unfair, tight, moving
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--profile", help="difficulty profile (default: the config's)")
+    parser.add_argument("--seeds", type=int, default=1000, help="courses to scan")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--pairs", type=int, default=100, help="pairs per course")
+    parser.add_argument("--show", type=int, default=5, help="worst courses to list")
+    args = parser.parse_args()
+
+    profile = difficulty.get_profile(args.profile)
+    start = time.perf_counter()
+    results = []
+    for seed in range(args.first_seed, args.first_seed + args.seeds):
+        results.append((seed,) + scan_course(seed, profile, args.pairs))
+    elapsed = time.perf_counter() - start
+
+    transitions = args.seeds * (args.pairs - 1)
+    unfair = sum(r[3] for r in results)
+    tight = sum(r[4] for r in results)
+    moving = sum(r[5] for r in results)
+    bad_courses = sum(1 for r in results if r[3])
+    print(f"{profile.name}: {args.seeds} courses x {args.pairs} pairs in {elapsed:.2f}s "
+          f"({args.seeds * args.pairs / elapsed:,.0f} pairs/s)")
+    print(f"  unfair transitions {unfair} / {transitions} ({bad_courses} courses), "
+          f"tight (<{SLACK_PX} px) {tight}, not judged (moving) {moving}")
+    print("  worst courses:")
+    for seed, worst, at, n_unfair, _, _ in sorted(results, key=lambda r: r[1])[:args.show]:
+        print(f"    seed {seed:<8} margin {worst:5d} px at pair {at:<5} unfair {n_unfair}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,139 @@
+import json
+from pathlib import Path
+
+# Difficulty profiles live in difficulty_profiles.json. Each one gives
+# [start, end] values for the knobs (lerped by factor = score / ramp_score,
+# capped at 1) plus the score windows in which pipes move vertically:
+#
+#   vertical_windows: on when score >= from and (score - offset) % period < on
+#
+# At load every profile is compiled into per-integer-score tables, so the
+# simulation (and batch_sim.py) does one list/array lookup per knob instead of
+# re-evaluating the curve every tick.
+
+PROFILES_PATH = Path(__file__).with_name("difficulty_profiles.json")
+DEFAULT_PROFILE = "classic"
+
+# used when the config file is missing or broken; same as its "classic" entry
+CLASSIC = {
+    "ramp_score": 30,
+    "gap": [180, 120],
+    "pipe_speed": [2, 2],
+    "vertical_speed": [0.5, 2.0],
+    "flip_chance": [0.0, 0.05],
+    "spawn_interval": [90, 90],
+    "vertical_windows": {"from": 11, "offset": 6, "period": 20, "on": 10},
+}
+
+
+def _lerp(pair, factor):
+    start, end = pair
+    return start + (end - start) * factor
+
+
+class DifficultyProfile:
+    """
+    One compiled profile. Every table is indexed by index(score):
+      factor          0.0 -> 1.0 over ramp_score points
+      gap             px between top and bottom pipe of a new pair
+      scroll_speed    px per tick (negative: pipes move left)
+      max_vy          top vertical pipe speed, px per tick
+      flip_chance     per pair per tick chance of a random vy flip
+      vertical        pipes move vertically at this score
+      spawn_interval  ticks until the next pair
+    """
+
+    def __init__(self, name, config):
+        self.name = name
+        self.description = config.get("description", "")
+        ramp = config["ramp_score"]
+        windows = config.get("vertical_windows")
+        if windows:
+            start, offset, period, on = windows["from"], windows["offset"], windows["period"], windows["on"]
+        else:
+            start, offset, period, on = 0, 0, 1, 0
+
+        # past `size` the knobs are flat and the windows repeat every `period`,
+        # so larger scores fold back into the last period of the table
+        self.period = period
+        self.size = max(ramp, start) + period
+
+        self.factor, self.gap, self.scroll_speed, self.max_vy = [], [], [], []
+        self.flip_chance, self.vertical, self.spawn_interval = [], [], []
+        for score in range(self.size):
+            factor = min(1.0, score / ramp)
+            self.factor.append(factor)
+            self.gap.append(int(_lerp(config["gap"], factor)))
+            self.scroll_speed.append(-int(round(_lerp(config["pipe_speed"], factor))))
+            self.max_vy.append(_lerp(config["vertical_speed"], factor))
+            self.flip_chance.append(_lerp(config["flip_chance"], factor))
+            self.vertical.append(score >= start and (score - offset) % period < on)
+            self.spawn_interval.append(int(round(_lerp(config["spawn_interval"], factor))))
+
+        if min(self.spawn_interval) < 1 or max(self.scroll_speed) >= 0:
+            raise ValueError(f"profile {name}: spawn_interval and pipe_speed must be positive")
+
+    def index(self, score):
+        if score < self.size:
+            return score
+        return self.size - self.period + (score - self.size) % self.period
+
+    def __repr__(self):
+        return f"DifficultyProfile({self.name!r})"
+
+
+_profiles = None
+_default_name = DEFAULT_PROFILE
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Compile every profile in the config file. Falls back to CLASSIC alone."""
+    global _profiles, _default_name
+    try:
+        with open(path) as f:
+            config = json.load(f)
+        profiles = {name: DifficultyProfile(name, cfg) for name, cfg in config["profiles"].items()}
+        default = config.get("default", DEFAULT_PROFILE)
+        if default not in profiles:
+            raise ValueError(f"default profile {default!r} not defined")
+    except Exception as e:
+        print(f"Difficulty profiles unavailable ({e}); using built-in classic")
+        profiles = {DEFAULT_PROFILE: DifficultyProfile(DEFAULT_PROFILE, CLASSIC)}
+        default = DEFAULT_PROFILE
+    _profiles = profiles
+    _default_name = default
+    return profiles
+
+
+def get_profile(profile=None):
+    """A profile by name (None = the config's default). Profiles pass through."""
+    if isinstance(profile, DifficultyProfile):
+        return profile
+    if _profiles is None:
+        load_profiles()
+    name = _default_name if profile is None else profile
+    try:
+        return _profiles[name]
+    except KeyError:
+        raise ValueError(f"unknown difficulty profile {name!r} (have {', '.join(_profiles)})") from None
+
+
+def profile_names():
+    if _profiles is None:
+        load_profiles()
+    return list(_profiles)
+
+
+# Single-score helpers on the default profile, for scripts
 def difficulty_factor(score):
-  """
-  Returns a number between 0.0 and 1.0 that scales with score.
-  - At score=0 → 0.0 (easy)
-  - At score=30 → 1.0 (max chaos)
-  """
-  return min(1.0, score / 30.0)
+    """0.0 (easy) -> 1.0 (max chaos) as the score climbs."""
+    p = get_profile()
+    return p.factor[p.index(int(score))]
 
 def current_gap(score: float) -> int:
-    base_gap = 180
-    factor = difficulty_factor(score)  # 0 → 1
-    return int(base_gap - factor * 60)  # 180 → 120
+    p = get_profile()
+    return p.gap[p.index(int(score))]
 
-# after updating score, compute whether pipes should move this cycle
 def vertical_pipe_enabled(score: float) -> bool:
-    if score <= 10:
-        return False  # keep still until player reaches 10 points
-    cycle = int(score - 6) // 10   # 0,1,2,3...
-    return (cycle % 2 == 0)        # even → move, odd → stop
-
-
+    p = get_profile()
+    return p.vertical[p.index(int(score))]
@@ -0,0 +1,101 @@
+import pygame
+
+# Optional dirty-rectangle renderer. draw() queues its blits here instead of
+# drawing straight to the window; present() then works out which sprites moved
+# or changed since the last frame, restores the background only under those
+# areas, recomposites what overlaps them and pushes just those rects to
+# display.update(). Anything else (no background surface, e.g. a crossfade
+# painted straight to the window, a new background, a resize) falls back to a
+# full redraw.
+
+
+class DirtyRenderer:
+    def __init__(self, target, enabled=True):
+        self.target = target
+        self.enabled = enabled
+        self._bounds = target.get_rect()
+        self._background = None
+        self._items = []
+        self._prev = {}  # last frame's blit key -> rect
+        self._full = True
+        self.last_update_area = 0  # pixels pushed by the last present()
+
+    def invalidate(self):
+        """Force a full redraw on the next present() (resize, expose, ...)."""
+        self._full = True
+
+    def begin(self, background):
+        """
+        Start a frame. background is the surface to restore from, or None if
+        the caller already painted the whole background into the target.
+        """
+        if background is None or background is not self._background:
+            self._full = True
+        self._background = background
+        self._items = []
+
+    def blit(self, surf, dest, area=None, changed=False):
+        """
+        Queue a blit (same arguments as Surface.blit). Pass changed=True for a
+        surface whose pixels were redrawn in place, so it's repainted even
+        though the surface and position are the same.
+        """
+        if area is None:
+            w, h = surf.get_size()
+            area_key = None
+        else:
+            area = pygame.Rect(area)
+            w, h = area.size
+            area_key = tuple(area)
+        x, y = dest[0], dest[1]
+        rect = pygame.Rect(x, y, w, h)
+        key = (surf, x, y, area_key, object() if changed else None)
+        self._items.append((surf, (x, y), area, rect, key))
+
+    def present(self):
+        target = self.target
+        items = self._items
+        keys = {item[4]: item[3] for item in items}
+
+        if not self.enabled or self._full:
+            if self._background is not None:
+                target.blit(self._background, (0, 0))
+            for surf, dest, area, rect, key in items:
+                target.blit(surf, dest, area)
+            pygame.display.update()
+            self.last_update_area = self._bounds.width * self._bounds.height
+        else:
+            prev = self._prev
+            dirty = [rect for key, rect in keys.items() if key not in prev]
+            dirty += [rect for key, rect in prev.items() if key not in keys]
+            dirty = self._merge(dirty)
+
+            background = self._background
+            for r in dirty:
+                target.blit(background, r, r)
+                target.set_clip(r)
+                for surf, dest, area, rect, key in items:
+                    if rect.colliderect(r):
+                        target.blit(surf, dest, area)
+                target.set_clip(None)
+            if dirty:
+                pygame.display.update(dirty)
+            self.last_update_area = sum(r.width * r.height for r in dirty)
+
+        self._prev = keys
+        self._full = False
+
+    def _merge(self, rects):
+        """Clip to the screen and union overlapping rects."""
+        bounds = self._bounds
+        merged = []
+        for r in rects:
+            r = r.clip(bounds)
+            if r.width == 0 or r.height == 0:
+                continue
+            i = r.collidelist(merged)
+            while i != -1:
+                r.union_ip(merged.pop(i))
+                i = r.collidelist(merged)
+            merged.append(r)
+        return merged
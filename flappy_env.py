@@ -0,0 +1,303 @@
+import multiprocessing as mp
+import os
+import random
+import numpy as np
+from batch_sim import BatchSimulation
+from simulation import (
+    Simulation, GAME_WIDTH, GAME_HEIGHT, BIRD_X, BIRD_WIDTH, BIRD_HEIGHT,
+    PIPE_WIDTH, PIPE_HEIGHT, GROUND_Y, EVENT_SCORE,
+)
+
+# Gym-style environments over the headless rules (reset() -> (obs, info),
+# step(action) -> (obs, reward, terminated, truncated, info)); no gym needed.
+#
+#   FlappyEnv   one game, on simulation.Simulation
+#   BatchEnv    N games in one process, on batch_sim.BatchSimulation, auto-reset
+#   VectorEnv   BatchEnv shards in worker processes; actions and results live in
+#               shared memory, so a step sends no pickled data, just two barrier
+#               waits per call however many envs there are
+#
+# The compact observation is OBS_FIELDS, roughly scaled to [-1, 1]. pixels=True
+# adds a PIXEL_SHAPE uint8 frame: the game state rasterized at 1/10 scale
+# (pipes PIXEL_PIPE, bird PIXEL_BIRD, ground PIXEL_GROUND), drawn with NumPy so
+# workers never need pygame or a display. Needs NumPy (pip install .[sim]).
+
+OBS_FIELDS = ("bird_y", "velocity_y", "pipe_x", "gap_center_y", "pipe_vy")
+OBS_SIZE = len(OBS_FIELDS)
+_OBS_SCALE = np.array([1.0 / GAME_HEIGHT, 1.0 / 10.0, 1.0 / GAME_WIDTH, 1.0 / GAME_HEIGHT, 1.0 / 3.0],
+                      dtype=np.float32)
+
+PIXEL_SCALE = 10
+PIXEL_SHAPE = (GAME_HEIGHT // PIXEL_SCALE, GAME_WIDTH // PIXEL_SCALE)  # (rows, cols)
+PIXEL_PIPE, PIXEL_BIRD, PIXEL_GROUND = 255, 160, 80
+
+REWARD_ALIVE = 0.01  # per tick survived
+REWARD_SCORE = 1.0   # per pipe pair passed
+REWARD_DEATH = -1.0
+
+_ROWS = (np.arange(PIXEL_SHAPE[0]) * PIXEL_SCALE + PIXEL_SCALE // 2)[None, None, :, None]
+_COLS = (np.arange(PIXEL_SHAPE[1]) * PIXEL_SCALE + PIXEL_SCALE // 2)[None, None, None, :]
+_GROUND_ROWS = _ROWS[0, 0, :, 0] >= GROUND_Y
+_BIRD_COLS = (_COLS[0, 0, 0] >= BIRD_X) & (_COLS[0, 0, 0] < BIRD_X + BIRD_WIDTH)
+
+
+def observe(bird_y, velocity_y, pipe_x, pipe_top_y, pipe_gap, pipe_vy, alive, out):
+    """
+    Compact observations for n lanes into out (n, OBS_SIZE). Pipe arguments are
+    (n, slots); the pair used is the nearest one the bird hasn't cleared yet.
+    """
+    ahead = alive & (pipe_x + PIPE_WIDTH >= BIRD_X)
+    key = np.where(ahead, pipe_x, np.iinfo(np.int64).max)
+    nearest = key.argmin(axis=1)[:, None]
+    found = ahead.any(axis=1)
+    take = lambda a: np.take_along_axis(a, nearest, axis=1)[:, 0]
+    center = take(pipe_top_y) + PIPE_HEIGHT + take(pipe_gap) // 2
+    out[:, 0] = bird_y
+    out[:, 1] = velocity_y
+    out[:, 2] = np.where(found, take(pipe_x), GAME_WIDTH)
+    out[:, 3] = np.where(found, center, GROUND_Y // 2)
+    out[:, 4] = np.where(found, take(pipe_vy), 0.0)
+    out *= _OBS_SCALE
+    return out
+
+
+def rasterize(bird_y, pipe_x, pipe_top_y, pipe_bottom_y, alive, out):
+    """Downscaled frames for n lanes into out (n, *PIXEL_SHAPE), sampled at pixel centers."""
+    x = pipe_x[:, :, None, None]
+    in_x = (_COLS >= x) & (_COLS < x + PIPE_WIDTH)
+    top = pipe_top_y[:, :, None, None]
+    bottom = pipe_bottom_y[:, :, None, None]
+    in_y = (_ROWS < top + PIPE_HEIGHT) | (_ROWS >= bottom)  # pipes reach the screen edges
+    pipes = (in_x & in_y & alive[:, :, None, None]).any(axis=1)
+    out[:] = np.where(pipes, PIXEL_PIPE, 0)
+    by = bird_y[:, None]
+    bird_rows = (_ROWS[0, 0, :, 0] >= by) & (_ROWS[0, 0, :, 0] < by + BIRD_HEIGHT)
+    out[bird_rows[:, :, None] & _BIRD_COLS[None, None, :]] = PIXEL_BIRD
+    out[:, _GROUND_ROWS, :] = PIXEL_GROUND
+    return out
+
+
+class FlappyEnv:
+    """One game. Actions: 0 = nothing, 1 = flap."""
+
+    def __init__(self, seed=None, profile=None, pixels=False, max_ticks=None, precise=False):
+        self.sim = Simulation(seed=seed, profile=profile, precise=precise)
+        self.pixels = pixels
+        self.max_ticks = max_ticks
+        self._obs = np.zeros((1, OBS_SIZE), dtype=np.float32)
+        self._frame = np.zeros((1,) + PIXEL_SHAPE, dtype=np.uint8) if pixels else None
+
+    def _observation(self):
+        sim = self.sim
+        pairs = list(sim.pipes) or [None]
+        alive = np.array([[p is not None for p in pairs]])
+        col = lambda attr, dtype: np.array([[getattr(p, attr) if p else 0 for p in pairs]], dtype=dtype)
+        x, top, bottom = col("x", np.int64), col("top_y", np.int64), col("bottom_y", np.int64)
+        bird_y = np.array([sim.bird_y])
+        observe(bird_y, np.array([sim.velocity_y]), x, top, col("gap", np.int64),
+                col("vy", np.float64), alive, self._obs)
+        if self.pixels:
+            rasterize(bird_y, x, top, bottom, alive, self._frame)
+            return {"state": self._obs[0].copy(), "pixels": self._frame[0].copy()}
+        return self._obs[0].copy()
+
+    def reset(self, seed=None):
+        self.sim.reset(seed)
+        return self._observation(), {"seed": self.sim.seed}
+
+    def step(self, action):
+        sim = self.sim
+        events = sim.step(bool(action))
+        terminated = sim.game_over
+        truncated = not terminated and self.max_ticks is not None and sim.ticks >= self.max_ticks
+        reward = REWARD_ALIVE
+        if events & EVENT_SCORE:
+            reward += REWARD_SCORE
+        if terminated:
+            reward += REWARD_DEATH
+        return self._observation(), reward, terminated, truncated, {"score": sim.score, "ticks": sim.ticks}
+
+
+class BatchEnv:
+    """
+    n games stepped together. Finished games reset automatically: the returned
+    obs is then the new game's first one, and info["score"] holds the score
+    each lane had at the end of the step.
+    out: optional dict of preallocated arrays to write into (see _alloc).
+    """
+
+    def __init__(self, n, seed=None, profiles=None, pixels=False, max_ticks=None, out=None, precise=False):
+        self.n = n
+        self.pixels = pixels
+        self.max_ticks = max_ticks
+        self.sim = BatchSimulation(n, seed=seed, profiles=profiles, precise=precise)
+        self.buffers = out if out is not None else _alloc(n, pixels)
+
+    def _observe(self):
+        sim, buf = self.sim, self.buffers
+        observe(sim.bird_y, sim.velocity_y, sim.pipe_x, sim.pipe_top_y, sim.pipe_gap,
+                sim.pipe_vy, sim.pipe_alive, buf["obs"])
+        if self.pixels:
+            rasterize(sim.bird_y, sim.pipe_x, sim.pipe_top_y, sim.pipe_bottom_y, sim.pipe_alive, buf["pixels"])
+
+    def reset(self):
+        self.sim.reset()
+        buf = self.buffers
+        buf["reward"][:] = 0.0
+        buf["terminated"][:] = False
+        buf["truncated"][:] = False
+        buf["score"][:] = 0
+        self._observe()
+        return self.buffers
+
+    def step(self, actions):
+        sim, buf = self.sim, self.buffers
+        prev_score = sim.score
+        sim.step(np.asarray(actions, dtype=bool))
+        terminated = sim.game_over.copy()
+        truncated = ~terminated & (sim.ticks >= self.max_ticks) if self.max_ticks else np.zeros(self.n, bool)
+        buf["reward"][:] = REWARD_ALIVE + REWARD_SCORE * (sim.score - prev_score) + REWARD_DEATH * terminated
+        buf["terminated"][:] = terminated
+        buf["truncated"][:] = truncated
+        buf["score"][:] = sim.score
+        done = terminated | truncated
+        if done.any():
+            sim.reset(lanes=done)
+        self._observe()
+        return self.buffers
+
+
+def _alloc(n, pixels, raw=None):
+    """Result arrays for n lanes; backed by the given RawArrays when sharing memory."""
+    specs = _specs(n, pixels)
+    out = {}
+    for name, (dtype, shape) in specs.items():
+        if raw is None:
+            out[name] = np.zeros(shape, dtype=dtype)
+        else:
+            out[name] = np.frombuffer(raw[name], dtype=dtype).reshape(shape)
+    return out
+
+
+def _specs(n, pixels):
+    specs = {
+        "obs": (np.float32, (n, OBS_SIZE)),
+        "reward": (np.float32, (n,)),
+        "terminated": (np.bool_, (n,)),
+        "truncated": (np.bool_, (n,)),
+        "score": (np.int64, (n,)),
+        "actions": (np.bool_, (n,)),
+    }
+    if pixels:
+        specs["pixels"] = (np.uint8, (n,) + PIXEL_SHAPE)
+    return specs
+
+
+_CMD_STEP, _CMD_RESET, _CMD_CLOSE = 1, 2, 3
+
+
+def _worker(num_envs, lo, hi, raw, command, start, done, seed, profiles, pixels, max_ticks, precise):
+    try:
+        n = hi - lo
+        views = {name: arr[lo:hi] for name, arr in _alloc(num_envs, pixels, raw).items()}
+        env = BatchEnv(n, seed=seed, profiles=profiles, pixels=pixels, max_ticks=max_ticks, out=views,
+                       precise=precise)
+        actions = views["actions"]
+        while True:
+            start.wait()
+            cmd = command.value
+            if cmd == _CMD_CLOSE:
+                return
+            if cmd == _CMD_STEP:
+                env.step(actions)
+            elif cmd == _CMD_RESET:
+                env.reset()
+            done.wait()
+    except Exception:
+        # wake the parent (BrokenBarrierError) instead of leaving it blocked
+        start.abort()
+        done.abort()
+        raise
+
+
+class VectorEnv:
+    """
+    num_envs games sharded over num_workers processes (default: one per CPU).
+    step()/reset() return views into shared memory that the next call
+    overwrites; copy what you keep. Auto-reset as in BatchEnv.
+    """
+
+    def __init__(self, num_envs, num_workers=None, seed=None, profiles=None, pixels=False, max_ticks=None,
+                 precise=False):
+        self.num_envs = num_envs
+        self.num_workers = max(1, min(num_workers or os.cpu_count() or 1, num_envs))
+        self.pixels = pixels
+        ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+
+        self._raw = {}
+        for name, (dtype, shape) in _specs(num_envs, pixels).items():
+            size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            self._raw[name] = ctx.RawArray("b", size)
+        self.buffers = _alloc(num_envs, pixels, self._raw)
+        self._command = ctx.RawValue("i", 0)
+        self._start = ctx.Barrier(self.num_workers + 1)
+        self._done = ctx.Barrier(self.num_workers + 1)
+
+        if profiles is None or isinstance(profiles, str) or not hasattr(profiles, "__len__"):
+            profiles = [profiles] * num_envs
+        seeds = random.Random(seed)
+        bounds = np.linspace(0, num_envs, self.num_workers + 1).astype(int)
+        self._procs = []
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            p = ctx.Process(target=_worker, daemon=True, args=(
+                num_envs, int(lo), int(hi), self._raw, self._command, self._start, self._done,
+                seeds.getrandbits(63), list(profiles[lo:hi]), pixels, max_ticks, precise))
+            p.start()
+            self._procs.append(p)
+        self._closed = False
+
+    def _run(self, cmd):
+        self._command.value = cmd
+        self._start.wait()
+        self._done.wait()
+
+    def _result(self):
+        b = self.buffers
+        obs = {"state": b["obs"], "pixels": b["pixels"]} if self.pixels else b["obs"]
+        return obs, b["reward"], b["terminated"], b["truncated"], {"score": b["score"]}
+
+    def reset(self):
+        self._run(_CMD_RESET)
+        obs, *_, info = self._result()
+        return obs, info
+
+    def step(self, actions):
+        self.buffers["actions"][:] = actions
+        self._run(_CMD_STEP)
+        return self._result()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._command.value = _CMD_CLOSE
+        try:
+            self._start.wait(timeout=5)
+        except Exception:
+            pass
+        for p in self._procs:
+            p.join(timeout=5)
+            if p.is_alive():
+                p.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+
+# GIF89a writer for the clip capture (capture.py), with its own LZW encoder.
+# No pygame: it runs in a child process that FrameCapture.export starts and
+# feeds over a pipe, because the LZW loop is pure Python and would hold the
+# game's GIL for a second or more per clip.
+#
+#   python gif_writer.py OUT.gif   <- header line (JSON size/count/times), then count frames of w*h bytes
+
+# index = rrrgggbb
+PALETTE_332 = [((i >> 5) * 255 // 7, ((i >> 2) & 7) * 255 // 7, (i & 3) * 255 // 3) for i in range(256)]
+
+
+def _delays_cs(times):
+    """Per-frame GIF delays in 1/100 s from capture times, rounding error carried along."""
+    delays = []
+    carried = 0.0
+    for a, b in zip(times, times[1:]):
+        exact = (b - a) / 10.0 + carried
+        d = max(2, round(exact))  # browsers treat < 2 as 10
+        carried = exact - d
+        delays.append(d)
+    delays.append(delays[-1] if delays else 3)
+    return delays
+
+
+def lzw_encode(data, min_size=8):
+    """GIF-flavoured LZW (variable code width, clear when the table is full) of `data` bytes."""
+    clear = 1 << min_size
+    end = clear + 1
+    out = bytearray()
+    acc = 0
+    nbits = 0
+    size = min_size + 1
+    table = {}
+    next_code = end + 1
+
+    acc |= clear << nbits
+    nbits += size
+    prefix = data[0]
+    for b in data[1:]:
+        key = prefix << 8 | b
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+        acc |= prefix << nbits
+        nbits += size
+        while nbits >= 8:
+            out.append(acc & 0xFF)
+            acc >>= 8
+            nbits -= 8
+        if next_code < 4096:
+            # the decoder widens its codes once its table outgrows them
+            if next_code == 1 << size and size < 12:
+                size += 1
+            table[key] = next_code
+            next_code += 1
+        else:
+            acc |= clear << nbits
+            nbits += size
+            table.clear()
+            next_code = end + 1
+            size = min_size + 1
+        prefix = b
+    acc |= prefix << nbits
+    nbits += size
+    if next_code == 1 << size and size < 12:
+        size += 1
+    acc |= end << nbits
+    nbits += size
+    while nbits > 0:
+        out.append(acc & 0xFF)
+        acc >>= 8
+        nbits -= 8
+    return bytes(out)
+
+
+def write_gif(path, size, frames, times):
+    """Looping GIF89a of RGB332 frames: `frames` are w*h palette-index bytes each."""
+    w, h = size
+    delays = _delays_cs(times)
+    with open(path, "wb") as f:
+        f.write(b"GIF89a" + w.to_bytes(2, "little") + h.to_bytes(2, "little") + bytes((0xF7, 0, 0)))
+        f.write(bytes(c for rgb in PALETTE_332 for c in rgb))
+        f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")  # loop forever
+        for frame, delay in zip(frames, delays):
+            f.write(b"\x21\xf9\x04\x04" + delay.to_bytes(2, "little") + b"\x00\x00")
+            f.write(b"\x2c\x00\x00\x00\x00" + w.to_bytes(2, "little") + h.to_bytes(2, "little") + b"\x00")
+            data = lzw_encode(frame)
+            f.write(b"\x08")
+            for i in range(0, len(data), 255):
+                chunk = data[i:i + 255]
+                f.write(bytes((len(chunk),)) + chunk)
+            f.write(b"\x00")
+        f.write(b"\x3b")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python gif_writer.py OUT.gif  (frames on stdin; fed by capture.FrameCapture.export)")
+        sys.exit(2)
+    try:
+        os.nice(10)  # stay out of the game's way on few cores
+    except (AttributeError, OSError):
+        pass
+    stdin = sys.stdin.buffer
+    header = json.loads(stdin.readline())
+    w, h = header["size"]
+    frames = [stdin.read(w * h) for _ in range(header["count"])]
+    write_gif(sys.argv[1], (w, h), frames, header["times"])
@@ -0,0 +1,146 @@
+import asyncio
+import time
+from array import array
+from collections import deque
+import pygame
+
+# Low-latency input. pygame-ce events carry no timestamp, so every event is
+# stamped when we first pull it off the SDL queue; FramePacer keeps that close
+# to the real arrival time by pumping the queue while it waits. The wait
+# happens *before* input is read: the loop sleeps until there's just enough
+# time left to simulate, draw and present, so the freshest input makes it into
+# the frame that's about to be shown instead of sitting out a post-present
+# sleep. A flap arriving mid-wait cuts the wait short and the frame showing it
+# goes out right away.
+
+FLAP_KEYS = (pygame.K_SPACE, pygame.K_x, pygame.K_UP)
+
+
+def is_flap(event):
+    """Every flap input: flap keys, mouse buttons, touches."""
+    if event.type == pygame.KEYDOWN:
+        return event.key in FLAP_KEYS
+    if event.type == pygame.MOUSEBUTTONDOWN:
+        # SDL also sends a mouse click for every touch; the FINGERDOWN counts
+        return not getattr(event, "touch", False)
+    return event.type == pygame.FINGERDOWN
+
+
+class InputQueue:
+    """Events in arrival order as (ticks ms, perf_counter s, event)."""
+
+    def __init__(self):
+        self._events = deque()
+
+    def pump(self):
+        """Pull pending events off SDL's queue. True if one of them is a flap."""
+        events = pygame.event.get()
+        if not events:
+            return False
+        ticks = pygame.time.get_ticks()
+        perf = time.perf_counter()
+        flapped = False
+        for event in events:
+            self._events.append((ticks, perf, event))
+            flapped = flapped or is_flap(event)
+        return flapped
+
+    def drain(self):
+        self.pump()
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+
+class FramePacer:
+    """
+    Frame pacing that waits before the input poll. Keeps a decaying peak of
+    how long a frame's work (input -> present) takes and wakes up that long
+    (plus a margin) before the next present is due, or as soon as a flap
+    comes in. max_fps 0 = no pacing, just yield to the event loop (web: the
+    browser paces frames).
+    """
+
+    SLICE_MS = 1.0     # input pump interval while waiting
+    MARGIN_MS = 0.5
+    DECAY = 0.95       # per frame, for the work estimate's peak
+
+    def __init__(self, max_fps):
+        self.frame_ms = 1000.0 / max_fps if max_fps else 0.0
+        self.work_ms = 0.0
+        self._deadline = None
+        self._frame_start = 0.0
+        self._early = False
+
+    @staticmethod
+    def _now():
+        return time.perf_counter() * 1000.0
+
+    async def wait(self, inputs):
+        """Sleep until it's time to start the next frame, pumping `inputs` meanwhile."""
+        if not self.frame_ms or self._deadline is None:
+            await asyncio.sleep(0)
+        else:
+            wake = self._deadline - self.work_ms - self.MARGIN_MS
+            while True:
+                if inputs.pump():
+                    self._early = True
+                    break
+                remaining = wake - self._now()
+                if remaining <= 0:
+                    break
+                await asyncio.sleep(min(self.SLICE_MS, remaining) / 1000.0)
+        self._frame_start = self._now()
+
+    def frame_done(self):
+        """Call right after present."""
+        now = self._now()
+        self.work_ms = max(now - self._frame_start, self.work_ms * self.DECAY)
+        if not self.frame_ms:
+            return
+        if self._deadline is None or self._early:
+            self._deadline = now  # first frame, or an input frame: pace from here
+            self._early = False
+        self._deadline += self.frame_ms
+        if self._deadline < now:
+            self._deadline = now  # fell behind: resync instead of rushing frames out
+
+
+class LatencyMeter:
+    """Input -> present latency of flaps, ms, in a fixed ring buffer."""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self._samples = array("d", bytes(8 * capacity))
+        self._count = 0
+        self._pending = []
+
+    def input(self, perf_s):
+        """
+        A flap that arrived at `perf_s` (perf_counter) was just simulated, so
+        the next present is the first to show it. Call it when the flap's tick
+        runs, not when the input arrives.
+        """
+        self._pending.append(perf_s)
+
+    def presented(self):
+        if not self._pending:
+            return
+        now = time.perf_counter()
+        for t in self._pending:
+            self._samples[self._count % self.capacity] = (now - t) * 1000.0
+            self._count += 1
+        self._pending.clear()
+
+    def recent(self, n=None):
+        available = min(self._count, self.capacity)
+        n = available if n is None else min(n, available)
+        return [self._samples[k % self.capacity] for k in range(self._count - n, self._count)]
+
+    def summary(self):
+        """{count, p50, p95, max} over the buffered samples (ms)."""
+        s = sorted(self.recent())
+        if not s:
+            return {"count": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+        return {"count": self._count, "p50": s[len(s) // 2],
+                "p95": s[min(len(s) - 1, int(0.95 * len(s)))], "max": s[-1]}
@@ -1,10 +1,29 @@
 import pygame
 import sys
-import random
 import asyncio
+import time
+from collections import deque
 from pathlib import Path
 import theme_changer
-from difficulty import difficulty_factor, current_gap, vertical_pipe_enabled
+import parallax
+from dirty_render import DirtyRenderer
+from sprite_cache import RotationCache
+from text_cache import GlyphAtlas, TextCache
+from replay import Replay, Recorder, Player
+from capture import FrameCapture
+import scores
+import asset_atlas
+import web_assets
+import profiler as prof
+from input_pipeline import InputQueue, FramePacer, LatencyMeter, is_flap
+from difficulty import get_profile
+from collision import MAX_PITCH_UP_DEG, MAX_PITCH_DOWN_DEG, PITCH_GAIN, PITCH_STEP_DEG, FRAME_UP_VY, FRAME_DOWN_VY
+from collision import frame_index as collision_frame
+from simulation import (
+    Simulation, GAME_WIDTH, GAME_HEIGHT, BIRD_X, BIRD_Y, BIRD_WIDTH, BIRD_HEIGHT,
+    PIPE_HEIGHT, TICKS_PER_SECOND,
+    EVENT_SCORE, EVENT_CRASH, EVENT_GROUND,
+)
 
 # ---- audio wiring (namespace import; no shadowing) ----
 try:
@@ -14,6 +33,11 @@ except Exception as e:
     print(f"sound_effects import failed: {e} - using no-op audio")
     class _NoAudio:
         def init_audio_once(self): return False
+        def unlock(self): return False
+        def start_loading(self, times=None): return False
+        def status(self): return {}
+        def voice_stats(self): return {}
+        def voice_summary(self): return ""
         def load_sounds(self): pass
         def warmup_sounds(self): pass
         def load_background_music(self): pass
@@ -25,16 +49,22 @@ except Exception as e:
 
     sfx = _NoAudio()
 
-# Game Variables
-GAME_WIDTH = 360
-GAME_HEIGHT = 640
-
-# bird pitch constants 
-MAX_PITCH_UP_DEG    = 58.0    # nose-up clamp
-MAX_PITCH_DOWN_DEG  = -90.0   # nose-down clamp
-PITCH_GAIN          = 15.0     # maps velocity_y -> degrees
+# bird pitch constants (clamps, gain and cache step live in collision.py: the
+# collision poses use the same ones)
 PITCH_LERP_PER_SEC  = 6.0    # smoothing speed (higher = snappier)
 
+# pipe hits against the rotated bird's pixels instead of its 44x34 rect (the
+# bird is then drawn in exactly the tested pose, so its pitch doesn't ease)
+PRECISE_COLLISION = False
+
+# only push changed screen areas to the display (full redraw during crossfades)
+USE_DIRTY_RECTS = True
+
+# fixed-timestep loop: physics always ticks at 60 Hz, rendering runs as fast
+# as allowed and interpolates between the last two ticks
+TICK_MS = 1000.0 / TICKS_PER_SECOND
+MAX_CATCHUP_TICKS = 5  # per frame; beyond this a slow device just slows down
+
 
 
 
@@ -43,27 +73,32 @@ IS_WEB = sys.platform == "emscripten"
 ROOT = Path(__file__).parent
 ASSETS = ROOT / "assets"
 
-# bird class
-bird_x = GAME_WIDTH / 8
-bird_y = GAME_HEIGHT / 2
-bird_width = 44
-bird_height = 34
+# render cap for FramePacer (0 = none; the browser paces frames on web)
+MAX_RENDER_FPS = 0 if IS_WEB else 240
 
+# every run is saved as a tiny replay (seed + flap ticks) on desktop;
+# `python main.py some.fbr` plays one back at display speed
+RECORD_REPLAYS = not IS_WEB
+REPLAY_DIR = ROOT / "replays"
+PLAYBACK_PATH = sys.argv[1] if len(sys.argv) > 1 and not IS_WEB else None
 
-# Pipe class
-pipe_x = GAME_WIDTH
-pipe_y = 0
-pipe_width = 64
-pipe_height = 512
+# difficulty profile from difficulty_profiles.json (None = the file's "default")
+DIFFICULTY = None
 
-# simple dt timer
-last_time = pygame.time.get_ticks()
+# F3 toggles the frame profiler overlay, F4 dumps a Chrome trace (desktop)
+PROFILE_AT_START = False
+TRACE_DIR = ROOT / "traces"
 
-next_pair_id = 0  # unique id for each pipe pair
+# the last few seconds of play stay in memory (desktop) and are written to
+# clips/ shortly after a run ends; F5 saves one right away
+CAPTURE_CLIPS = not IS_WEB
+CLIP_DIR = ROOT / "clips"
+CLIP_FORMAT = "gif"   # or "raw" (rgb24 frames for ffmpeg)
+CLIP_TAIL_MS = 800    # keep recording the game-over screen this long
 
 class Bird(pygame.Rect):
     def __init__(self, img_middle_flap):
-        pygame.Rect.__init__(self, bird_x, bird_y, bird_width, bird_height)
+        pygame.Rect.__init__(self, BIRD_X, BIRD_Y, BIRD_WIDTH, BIRD_HEIGHT)
         # animation frames and state
         self.frames = []
         self.frame_index = 1
@@ -113,39 +148,47 @@ class Bird(pygame.Rect):
             self.img = self.frames[self.frame_index]
 
         # (Optional) bias the frame by velocity for extra feedback:
-        if velocity_y < -2: self.frame_index = 2  # going up
-        elif velocity_y > 3: self.frame_index = 0 # falling
+        if velocity_y < FRAME_UP_VY: self.frame_index = 2  # going up
+        elif velocity_y > FRAME_DOWN_VY: self.frame_index = 0 # falling
         self.img = self.frames[self.frame_index]
 
-class Pipe(pygame.Rect):
-    def __init__(self, img):        
-        pygame.Rect.__init__(self, pipe_x, pipe_y, pipe_width, pipe_height)
-        self.img = img
-        self.passed = False
-        self.vy = 0.0
-        self.pair_gap = 0
-        self.frozen = True
-        self.frozen_y = 0
-
-
 async def main():
-    global bird, pipes, velocity_x, velocity_y, gravity, score, game_over, window, clock
+    global bird, sim, window
+    load_times = web_assets.LoadTimes()
 
-    
+    # sprites (and the first theme) load from the baked atlas cache while the display comes up
+    atlas_job = asset_atlas.load_async(ASSETS, write_cache=not IS_WEB)
+    theme_state = theme_changer.get_theme_state()
+    themes = theme_changer.ThemeLibrary(write_cache=not IS_WEB)
+    if IS_WEB:
+        # only the first theme is in the APK; the rest stream in after the first frame
+        themes.missing.update(n for n in theme_changer.THEME_ORDER if n != theme_state.first)
+    themes.preload(theme_state.current_theme)
 
     # Initialize pygame but immediately quit mixer to control it later
     pygame.init()
+    load_times.mark("pygame")
 
-    # Immediately quit mixer so we can initialize it properly on first gesture
-    if pygame.mixer.get_init():
-        pygame.mixer.quit()
-        print("Quit auto-initialized mixer to control initialization timing")
-    print(f"PYGAME INIT OK (mixer disabled), IS_WEB = {IS_WEB}")
+    # Web: quit the mixer so it's initialized properly on first gesture.
+    # Desktop has no autoplay policy: configure it now and decode sounds on a
+    # worker thread, so the first flap only has to start the music.
+    if IS_WEB:
+        if pygame.mixer.get_init():
+            pygame.mixer.quit()
+            print("Quit auto-initialized mixer to control initialization timing")
+    else:
+        try:
+            sfx.ensure_mixer_config()
+            sfx.start_loading(load_times)
+        except Exception as e:
+            print(f"Early audio setup failed (will retry on first gesture): {e}")
+    print(f"PYGAME INIT OK, IS_WEB = {IS_WEB}")
 
     # Simple display mode for web compatibility
     flags = 0 if IS_WEB else (pygame.SCALED | pygame.RESIZABLE)
     window = pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT), flags)
     print("Display mode set successfully")
+    load_times.mark("display")
 
     # Set pixelated rendering for web
     if IS_WEB:
@@ -153,7 +196,10 @@ async def main():
         platform.window.canvas.style.imageRendering = "pixelated"
 
     pygame.display.set_caption("Flappy Bird")
-    clock = pygame.time.Clock()
+    # input is stamped on arrival; the pacer sleeps before polling it, not after present
+    inputs = InputQueue()
+    pacer = FramePacer(MAX_RENDER_FPS)
+    latency = LatencyMeter()
 
     # Load font
     try:
@@ -164,69 +210,59 @@ async def main():
         print(f"Font failed, using default: {e}")
         font = pygame.font.Font(None, 35)
         font_small = pygame.font.Font(None, 25)
+    load_times.mark("font")
+
+    # HUD text: score digits come from an atlas, fixed strings are memoized
+    score_digits = GlyphAtlas(font_small, "0123456789", (255, 255, 255))
+    static_text = TextCache()
 
-    # Load images AFTER set_mode
-    def load_image_safe(path, use_alpha=True):
+    profiler = prof.FrameProfiler(enabled=PROFILE_AT_START)
+    try:
+        font_tiny = pygame.font.Font(str(ASSETS / "PressStart2P.ttf"), 8)
+    except Exception:
+        font_tiny = pygame.font.Font(None, 14)
+    profiler_overlay = prof.ProfilerOverlay(profiler, font_tiny, latency=latency)
+
+    # Sprites: one atlas decode, then subsurfaces (convert needs set_mode first).
+    # Backgrounds, pipes and base belong to the theme (theme_changer.ThemeLibrary);
+    # the game-over art is streamed in after the first frame (None until then)
+    atlas = atlas_job.result()
+    sprites = atlas.sprites()
+    print(f"Sprite atlas: {len(sprites)} sprites from {atlas.source} in {atlas.load_ms:.1f} ms")
+    load_times.mark("sprites")
+    bird_up_image = sprites["bird_up"]
+    bird_mid_image = sprites["bird_mid"]
+    bird_down_image = sprites["bird_down"]
+    emoji_image = sprites["emoji"]
+    gameover_image = None
+
+    # score badge layout never changes
+    emoji_rect = emoji_image.get_rect(topleft=(5, 6))
+    pad = 16
+    score_center = emoji_rect.inflate(-2 * pad, -2 * pad).center
+
+    # Game state (rules live in simulation.Simulation, which also spawns pipes by tick)
+    sim = Simulation(profile=DIFFICULTY, precise=PRECISE_COLLISION)
+    game_profile = sim.profile
+    print(f"Difficulty: {game_profile.name}")
+    recorder = Recorder(sim.seed)
+    player = None
+    # best scores and run history (SQLite on desktop, localStorage on web)
+    score_store = scores.open_store()
+    score_store.start()
+    if PLAYBACK_PATH:
         try:
-            img = pygame.image.load(str(path))
-            if use_alpha:
-                return img.convert_alpha()
-            else:
-                return img.convert()
+            player = Player(Replay.load(PLAYBACK_PATH))
+            sim.profile = get_profile(player.replay.profile)
+            sim.precise = player.replay.precise
+            sim.reset(player.replay.seed)
+            print(f"Playing back {PLAYBACK_PATH} (seed {sim.seed}, {sim.profile.name})")
         except Exception as e:
-            print(f"Failed to load {path}: {e}")
-            surf = pygame.Surface((64, 64))
-            if "bird" in str(path):
-                surf.fill((255, 255, 0))
-            elif "pipe" in str(path):
-                surf.fill((0, 255, 0))
-            elif "bg" in str(path):
-                surf.fill((135, 206, 235))
-            else:
-                surf.fill((255, 0, 255))
-            return surf
-
-    # Load all images
-    background_image_day = load_image_safe(ASSETS / "flappybird_bg_day.png", False).convert()
-    background_image_day = pygame.transform.scale(background_image_day, (GAME_WIDTH, GAME_HEIGHT))
-    
-    background_image_night = load_image_safe(ASSETS / "flappybird_bg_night.png", False).convert()
-    background_image_night = pygame.transform.scale(background_image_night, (GAME_WIDTH, GAME_HEIGHT))
-
-    base_image = load_image_safe(ASSETS / "base.png", True)
-    base_image = pygame.transform.scale(base_image, (GAME_WIDTH, pipe_height // 8))
-    base_rect = base_image.get_rect(topleft=(0, GAME_HEIGHT - base_image.get_height()))
-
-    bird_up_image = load_image_safe(ASSETS / "redbird-upflap.png", True)
-    bird_up_image = pygame.transform.scale(bird_up_image, (bird_width, bird_height))
-
-    bird_mid_image= load_image_safe(ASSETS / "redbird-midflap.png", True)
-    bird_mid_image = pygame.transform.scale(bird_mid_image, (bird_width, bird_height))
-
-    bird_down_image = load_image_safe(ASSETS / "redbird-downflap.png", True)
-    bird_down_image = pygame.transform.scale(bird_down_image, (bird_width, bird_height))
-
-    top_pipe_image = load_image_safe(ASSETS / "toppipe.png", True)
-    top_pipe_image = pygame.transform.scale(top_pipe_image, (pipe_width, pipe_height))
-
-    bottom_pipe_image = load_image_safe(ASSETS / "bottompipe.png", True)
-    bottom_pipe_image = pygame.transform.scale(bottom_pipe_image, (pipe_width, pipe_height))
-
-    emoji_image = load_image_safe(ASSETS / "score.png", True)
-    emoji_image = pygame.transform.scale(emoji_image, (75, 75))
-
-    gameover_image = load_image_safe(ASSETS / "gameover.png", True)
-    gameover_image = pygame.transform.scale(gameover_image, (192, 42))
-
-    # Game state
+            print(f"Replay load failed: {e}")
     bird = Bird(bird_mid_image)
     bird.set_frames(bird_down_image, bird_mid_image, bird_up_image)
-    pipes = []
-    velocity_x = -2
-    velocity_y = 0
-    gravity = 0.4
-    score = 0
-    game_over = False
+    # rotated bird sprites, rendered on first use instead of rotozoom per frame
+    bird_rotations = RotationCache(bird.frames, MAX_PITCH_DOWN_DEG, MAX_PITCH_UP_DEG, PITCH_STEP_DEG)
 
     # make sure bird has a pitch field
     if not hasattr(bird, "pitch"):
@@ -243,13 +279,12 @@ async def main():
             return
 
         try:
-            # Always coerce mixer into our known-good config inside the gesture
-            sfx.ensure_mixer_config()
-            sfx.load_sounds()
-            sfx.warmup_sounds()
-            sfx.load_background_music()
+            # Only the mixer unlock happens inside the gesture; sounds decode in
+            # the background (their status lands in load_times) and play as no-ops until ready
+            sfx.unlock()
+            sfx.start_loading(load_times)
             audio_initialized = True
-            print("✓ Audio unlocked & warmed")
+            print("✓ Audio unlocked")
         except Exception as e:
             audio_failed_once = True
             print(f"Audio init failed (will allow retry): {e}")
@@ -272,241 +307,234 @@ async def main():
         except Exception as e:
             print(f"Global pointerdown capture not set: {e}")
     # Initialize theme state (removed transition check - will be in game loop)
+    crossfade = themes.crossfade
+    renderer = DirtyRenderer(window, enabled=USE_DIRTY_RECTS)
+    capture = FrameCapture(window, enabled=CAPTURE_CLIPS)
+    clip_due = None  # get_ticks() time to write the crash clip at
+
+    # Everything the first frame doesn't need, fetched (web) and decoded one
+    # job per frame once it's on screen, roughly in the order it's needed
+    def late_sprites_ready():
+        nonlocal gameover_image
+        late = asset_atlas.load(ASSETS, write_cache=not IS_WEB,
+                                sprites=asset_atlas.LATE_SPRITES, group="late")
+        gameover_image = late.sprites()["gameover"]
+
+    try:
+        audio_files = web_assets.sound_files() if IS_WEB else []  # effects..., music
+    except Exception as e:
+        print(f"Audio files unknown, not streaming them: {e}")
+        audio_files = []
+    streamer = web_assets.AssetStreamer(load_times)
+    if audio_files:
+        streamer.add("sounds", audio_files[:-1])  # decoded after the first tap (sfx)
+    streamer.add("game-over art", [web_assets.atlas_file("late")], late_sprites_ready)
+    for name in sorted(themes.missing, key=theme_changer.THEME_ORDER.index):
+        streamer.add(f"theme {name}", [web_assets.atlas_file("theme-" + name)],
+                     lambda name=name: themes.arrived(name))
+    if audio_files:
+        streamer.add("music", audio_files[-1:])
 
     def draw():
         now = pygame.time.get_ticks()
-        theme_state = theme_changer.get_theme_state()
-        
-        if not theme_state['transitioning']:
-            if theme_state['current_theme'] == "day":
-                window.blit(background_image_day, (0, 0))
-            else:
-                window.blit(background_image_night, (0, 0))
+        # world scroll, interpolated back toward the previous tick like the pipes' x
+        scroll = 0 if sim.game_over else round(sim.scroll_speed * (1.0 - alpha))
+        world_x = sim.distance + scroll
+        if not theme_state.transitioning:
+            theme = themes.get(theme_state.current_theme)
+            renderer.begin(theme.background)
+            # only the skyline band scrolls; the sky above it stays put
+            theme.draw_skyline(renderer, world_x)
         else:
-            # Crossfade
-            t = (now - theme_state['transition_start']) / theme_changer.TRANSITION_MS
-            if   t < 0: t = 0.0
-            elif t > 1: t = 1.0
-            alpha_to = int(t * 255)
-            alpha_from = 255 - alpha_to
-
-            # Copy so we can set per-surface alpha without mutating originals
-            bg_from = background_image_day   if theme_state['transition_from'] == "day"   else background_image_night
-            bg_to   = background_image_night if theme_state['transition_to']   == "night" else background_image_day
-
-            a = bg_from.copy(); a.set_alpha(alpha_from); window.blit(a, (0, 0))
-            b = bg_to.copy();   b.set_alpha(alpha_to);   window.blit(b, (0, 0))
-    
+            # Crossfade (cached blends, one full-screen blit); pipes/base keep the old theme
+            theme = themes.get(theme_state.transition_from)
+            theme_to = themes.get(theme_state.transition_to)
+            renderer.begin(None)  # background painted directly -> full redraw
+            crossfade.draw(window, theme, theme_to, theme_state.progress(now), world_x)
 
         # Draw pipes
-        for pipe in pipes:
-            window.blit(pipe.img, pipe)
+        for pair in sim.pipes:
+            theme.pipes.draw(renderer, pair.x - scroll, pair.top_y + PIPE_HEIGHT, pair.bottom_y)
 
         # Draw base, after pipes so base sits on top of pipes
-        window.blit(base_image, (0, GAME_HEIGHT - base_image.get_height()))
+        parallax.ground.draw(renderer, theme.base, world_x)
 
         # Draw bird (rotated by pitch)
-        rot = pygame.transform.rotozoom(bird.img, bird.pitch, 1.0)
-        rot_rect = rot.get_rect(center=bird.center)
-        window.blit(rot, rot_rect)
+        rot, (dx, dy) = bird_rotations.get(bird.frame_index, bird.pitch)
+        renderer.blit(rot, (bird.centerx + dx, bird.centery + dy))
         
         # Score display (original styling)
-        emoji_rect = emoji_image.get_rect(topleft=(5, 6))
-        window.blit(emoji_image, emoji_rect)
-
-        score_str = str(int(score))
-        text_surf = font_small.render(score_str, True, (255, 255, 255))
-
-        pad = 16
-        inner = emoji_rect.inflate(-2 * pad, -2 * pad)
-        text_rect = text_surf.get_rect(center=inner.center)
-        window.blit(text_surf, text_rect)
+        renderer.blit(emoji_image, emoji_rect)
+        score_digits.draw_centered(renderer, str(int(sim.score)), score_center)
 
         # Draw game over text (properly centered)
-        if game_over:
+        if sim.game_over:
             # Optional: draw game over text
             # game_over_txt = font.render("GAME OVER", True, (255, 255, 255))
-            game_over_x = GAME_WIDTH / 2 - gameover_image.get_width() / 2
-            game_over_y = GAME_HEIGHT / 2 - 50
-            window.blit(gameover_image, (game_over_x, game_over_y))
+            if gameover_image is not None:
+                game_over_x = GAME_WIDTH / 2 - gameover_image.get_width() / 2
+                game_over_y = GAME_HEIGHT / 2 - 50
+                renderer.blit(gameover_image, (game_over_x, game_over_y))
             
-            restart_txt = font_small.render("Tap to restart", True, (255, 255, 255))
+            restart_txt = static_text.render(font_small, "Tap to restart")
             restart_x = GAME_WIDTH / 2 - restart_txt.get_width() / 2
             restart_y = GAME_HEIGHT / 2
-            window.blit(restart_txt, (restart_x, restart_y))
-
-    def create_pipe():
-        gap = current_gap(score)
-
-        # choose a vertical center safely on screen
-        center_min = 120
-        center_max = GAME_HEIGHT - base_rect.height - 120
-        center_y = random.randint(center_min, center_max)
-
-        # difficulty-scaled speed for THIS PAIR (top drives)
-        factor = difficulty_factor(score)
-        max_speed = 0.5 + factor * 1.5  # 0.5 → 2.0
-
-        # top pipe (driver)
-        top_pipe = Pipe(top_pipe_image)
-        top_pipe.x = pipe_x
-        top_pipe.y = center_y - gap // 2 - pipe_height
-        top_pipe.vy = 0.0
-        top_pipe.pair_gap = gap
-        top_pipe.frozen = True
-        top_pipe.frozen_y = top_pipe.y
-
-        #  bottom pipe (follower) 
-        bottom_pipe = Pipe(bottom_pipe_image)
-        bottom_pipe.x = pipe_x
-        bottom_pipe.y = center_y + gap // 2
-        bottom_pipe.vy = 0.0
-        bottom_pipe.pair_gap = gap
-        bottom_pipe.frozen = True
-        bottom_pipe.frozen_y = bottom_pipe.y
-
-        #  append in order (top, bottom)
-        pipes.extend([top_pipe, bottom_pipe])
+            renderer.blit(restart_txt, (restart_x, restart_y))
 
+            best_txt = static_text.render(font_small, f"Best {score_store.best(sim.profile.name)}")
+            renderer.blit(best_txt, (GAME_WIDTH / 2 - best_txt.get_width() / 2, restart_y + 24))
 
-    def move():
-        global velocity_y, score, game_over
-
-        # --- Bird physics ---
-        velocity_y += gravity
-        bird.y += int(float(velocity_y))
-        bird.y = max(bird.y, 0)
+        if profiler.enabled:
+            profiler_overlay.update()
+            overlay_x = GAME_WIDTH - profiler_overlay.surface.get_width() - 4
+            renderer.blit(profiler_overlay.surface, (overlay_x, 4), changed=True)
 
-        if bird.bottom > base_rect.top:
-            bird.bottom = base_rect.top
-            velocity_y = 0
-            game_over = True
+    def move():
+        nonlocal clip_due
+        events = sim.step()
+        if sim.game_over:
+            replay_path = save_replay()
+            record_run(scores.CAUSE_PIPE if events & EVENT_CRASH else scores.CAUSE_GROUND, replay_path)
+            clip_due = pygame.time.get_ticks() + CLIP_TAIL_MS
+
+        if events & EVENT_GROUND:
             try: sfx.play_fall()
             except Exception: pass
-    
-        # --- difficulty knobs ---
-        factor = difficulty_factor(score)
-        max_speed = 0.5 + factor * 1.5
-        flip_chance = factor * 0.05
-
-        enable_vertical = vertical_pipe_enabled(score)
-
-        i = 0
-        while i + 1 < len(pipes):
-            top = pipes[i]
-            bottom = pipes[i + 1]
-
-            # horizontal scroll
-            top.x += velocity_x
-            bottom.x = top.x
-
-            pair_gap = top.pair_gap if hasattr(top, "pair_gap") else current_gap(score)
-
-            # bounds for moving state
-            min_top_y = -pipe_height
-            max_top_y = (GAME_HEIGHT - base_rect.height) - (pipe_height + pair_gap)
-
-            if enable_vertical:
-                # unfreeze on first frame of enabled state
-                if top.frozen:
-                    top.frozen = False
-                    bottom.frozen = False
-                    # seed vy once when coming out of freeze
-                    top.vy = random.choice([-1, 1]) * random.uniform(0.3, max_speed)
-
-                # vertical move
-                top.y += top.vy
-
-                # bounce within band
-                if top.y < min_top_y:
-                    top.y = min_top_y
-                    top.vy *= -1
-                elif top.y > max_top_y:
-                    top.y = max_top_y
-                    top.vy *= -1
-
-                # occasional chaos flips ONLY when enabled
-                if flip_chance > 0 and random.random() < flip_chance:
-                    top.vy = random.choice([-1, 1]) * random.uniform(0.3, max_speed)
-
-                # follower keeps exact stored gap
-                bottom.y = top.y + pipe_height + pair_gap
-            else:
-                # HARD PIN — no recomputation, no drift
-                if not top.frozen:
-                    # capture current resting place so disabling mid-cycle doesn't jump
-                    top.frozen_y = top.y
-                    bottom.frozen_y = bottom.y
-                    top.frozen = bottom.frozen = True
-
-                top.vy = 0.0
-                top.y = top.frozen_y
-                bottom.y = bottom.frozen_y
-
-            # scoring
-            if (not getattr(top, "passed", False)) and bird.x > top.x + top.width:
-                score += 1.0
-                try: sfx.play_score_sound()
-                except Exception: pass
-                top.passed = bottom.passed = True
-
-            # collisions
-            if bird.colliderect(top) or bird.colliderect(bottom):
-                game_over = True
-                try: sfx.play_crash()
-                except Exception: pass
-
-            i += 2
-
-        # purge off-screen pairs **after** iterating
-        while len(pipes) >= 2 and pipes[0].x + pipe_width < -pipe_width:
-            del pipes[0:2]
-
+        if events & EVENT_SCORE:
+            try: sfx.play_score_sound()
+            except Exception: pass
+        if events & EVENT_CRASH:
+            try: sfx.play_crash()
+            except Exception: pass
 
-    # Timer for pipe creation
-    create_pipes_timer = pygame.USEREVENT + 1
-    pygame.time.set_timer(create_pipes_timer, 1500)
+    def save_replay():
+        """Save the finished run; returns its path relative to the game folder, or None."""
+        if not RECORD_REPLAYS or player is not None:
+            return None
+        try:
+            REPLAY_DIR.mkdir(exist_ok=True)
+            path = REPLAY_DIR / f"{sim.seed:016x}.fbr"
+            recorder.finish(sim).save(path)
+            return path.relative_to(ROOT).as_posix()
+        except Exception as e:
+            print(f"Replay save failed: {e}")
+            return None
+
+    def record_run(cause, replay_path):
+        if player is not None:
+            return  # a playback isn't a new run
+        score_store.add_run(scores.run_record(sim, len(recorder.flaps), cause, replay_path))
+
+    def save_clip():
+        nonlocal clip_due
+        clip_due = None
+        ext = "gif" if CLIP_FORMAT == "gif" else "rgb"
+        capture.export(CLIP_DIR / f"{sim.seed:016x}-{sim.ticks}.{ext}", CLIP_FORMAT)
+
+    def flap():
+        """Flap on the next tick (and remember that tick for the replay)."""
+        sim.flap()
+        recorder.flap(sim.ticks + 1)
+
+    def on_flap_input(ticks, perf):
+        """
+        The one path for every flap input (keys, mouse, touch). The physics flap
+        is queued with its arrival time and applied to the tick that time falls
+        in; animation and sound respond right away. During playback the
+        replay's flaps drive the bird, so input does nothing until it ends.
+        """
+        init_audio_on_first_gesture()
+        if sim.game_over:
+            reset_game()
+            return
+        if player is not None:
+            return
+        pending_flaps.append((ticks, perf))
+        bird.on_flap()
+        bird.pitch = max(bird.pitch, 0.0)  # instant nose-up bias
+        if audio_initialized:
+            try:
+                sfx.play_jump()
+            except Exception as e:
+                print(f"Jump sound error: {e}")
+
+    def export_trace():
+        if IS_WEB:
+            print("Trace export is desktop-only")
+            return
+        try:
+            TRACE_DIR.mkdir(exist_ok=True)
+            path = TRACE_DIR / f"trace-{int(time.time())}.json"
+            count = profiler.export_chrome_trace(path)
+            print(f"Wrote {count} trace events to {path}")
+        except Exception as e:
+            print(f"Trace export failed: {e}")
+
+    def reset_game():
+        nonlocal accumulator, prev_bird_y, recorder, player, last_time
+        player = None  # any input after a playback ends returns to normal play
+        if clip_due is not None:
+            save_clip()  # restarted before the tail was recorded
+        sim.profile = game_profile
+        sim.precise = PRECISE_COLLISION
+        sim.reset()
+        recorder = Recorder(sim.seed)
+        accumulator = 0.0
+        last_time = pygame.time.get_ticks()  # the new run's clock starts now
+        pending_flaps.clear()
+        prev_bird_y = sim.bird_y
+        bird.y = sim.bird_y
+        bird.pitch = 0.0  # Reset bird pitch
+        # Reset theme to the first one on game restart
+        theme_changer.reset_theme()
+        crossfade.release()
+
+
+    # Fixed-timestep state: ms of real time not yet simulated, and the bird's
+    # y before the latest tick (for interpolation)
+    accumulator = 0.0
+    prev_bird_y = sim.bird_y
+    alpha = 1.0
+    pending_flaps = deque()  # (get_ticks ms, perf_counter s) arrival of each flap not simulated yet
 
     # Main game loop
+    first_frame = True
     running = True
+    # frame timer: starts here, so loading doesn't count as the first frame's time
+    last_time = pygame.time.get_ticks()
     while running:
-        for event in pygame.event.get():
+        profiler.begin_frame()
+        await pacer.wait(inputs)
+        profiler.mark(prof.WAIT)
+        for ticks, perf, event in inputs.drain():
             if event.type == pygame.QUIT:
                 pygame.mixer.music.stop() if audio_initialized else None
+                capture.join()  # don't cut off a clip being written
+                score_store.close()
+                stats = latency.summary()
+                if stats["count"]:
+                    print(f"Input->present latency over {stats['count']} flaps: "
+                          f"p50 {stats['p50']:.1f} ms, p95 {stats['p95']:.1f} ms, max {stats['max']:.1f} ms")
+                voices = sfx.voice_summary()
+                if voices:
+                    print(voices)
                 pygame.quit()
                 return
 
-            if event.type == create_pipes_timer and not game_over:
-                create_pipe()
+            # window contents may be lost; repaint everything next frame
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED, pygame.WINDOWEXPOSED):
+                renderer.invalidate()
 
-            # Handle keyboard input
             if event.type == pygame.KEYDOWN:
-                if event.key in (pygame.K_SPACE, pygame.K_x, pygame.K_UP):
-                    # Initialize audio on first interaction
-                    init_audio_on_first_gesture()
-                    
-                    if not game_over:
-                        velocity_y = -6
-                        bird.on_flap()
-                        # instant nose-up bias
-                        bird.pitch = max(bird.pitch, 0.0)
-                        if audio_initialized:
-                            try:
-                                sfx.play_jump()
-                            except Exception as e:
-                                print(f"Jump sound error: {e}")
-                    else:
-                        # Reset game
-                        bird.y = int(float(bird_y))
-                        bird.pitch = 0.0  # Reset bird pitch
-                        pipes.clear()
-                        score = 0
-                        game_over = False
-                        velocity_y = 0
-                        # Reset theme to day on game restart
-                        theme_changer.reset_theme()
-
-            # Optional extra swoosh sounds on keyup            
+                if event.key == pygame.K_F3:
+                    if not profiler.toggle():
+                        renderer.invalidate()  # wipe the overlay
+                elif event.key == pygame.K_F4:
+                    export_trace()
+                elif event.key == pygame.K_F5:
+                    save_clip()
+
+            # Optional extra swoosh sounds on keyup
             # if event.type == pygame.KEYUP:
             #     if event.key in (pygame.K_SPACE, pygame.K_x, pygame.K_UP):
             #         if not game_over:
@@ -515,65 +543,95 @@ async def main():
             #             except Exception as e:
             #                 print(f"Swoosh sound error: {e}")
 
-            # Handle touch/mouse input (including mobile FINGERDOWN)
-            if event.type == pygame.MOUSEBUTTONDOWN or event.type == pygame.FINGERDOWN:
-                # Initialize audio on first interaction
-                init_audio_on_first_gesture()
-                
-                if not game_over:
-                    velocity_y = -6
-                    if audio_initialized:
-                        try:
-                            sfx.play_jump()
-                        except Exception as e:
-                            print(f"Jump sound error: {e}")
-                else:
-                    # Reset game
-                    bird.y = int(float(bird_y))
-                    bird.pitch = 0.0  # Reset bird pitch
-                    pipes.clear()
-                    score = 0
-                    game_over = False
-                    velocity_y = 0
-                    # Reset theme to day on game restart
-                    theme_changer.reset_theme()
+            if is_flap(event):
+                on_flap_input(ticks, perf)
+
+        profiler.mark(prof.EVENTS)
 
         # Update and draw
-        if not game_over:
-            global last_time
-            move()
+        now = pygame.time.get_ticks()
+        frame_ms = now - last_time
+        last_time = now
+
+        if not sim.game_over:
+            accumulator += frame_ms
+            steps = 0
+            while accumulator >= TICK_MS and not sim.game_over:
+                # flaps that arrived before this tick's end (real time) go into it
+                tick_end = now - accumulator + TICK_MS
+                if pending_flaps and pending_flaps[0][0] <= tick_end:
+                    while pending_flaps and pending_flaps[0][0] <= tick_end:
+                        latency.input(pending_flaps.popleft()[1])  # timed until this tick is on screen
+                    flap()
+                if player is not None and player.flap_at(sim.ticks + 1):
+                    sim.flap()
+                    bird.on_flap()
+                prev_bird_y = sim.bird_y
+                move()
+                accumulator -= TICK_MS
+                steps += 1
+                if steps >= MAX_CATCHUP_TICKS:
+                    accumulator = 0.0  # drop the backlog instead of spiraling
+                    break
+            profiler.mark(prof.MOVE)
+
             # ----- update bird pitch after velocity_y has changed in move() -----
-            now = pygame.time.get_ticks()
-            dt = (now - last_time) / 1000.0
-            last_time = now
+            dt = frame_ms / 1000.0
 
             # velocity -> target angle
-            if game_over:
+            if sim.game_over:
                 target_pitch = MAX_PITCH_DOWN_DEG
             else:
-                raw = -velocity_y * PITCH_GAIN  # negative vel (up) -> positive angle
+                raw = -sim.velocity_y * PITCH_GAIN  # negative vel (up) -> positive angle
                 target_pitch = max(MAX_PITCH_DOWN_DEG, min(MAX_PITCH_UP_DEG, raw))
 
-            # smooth toward target (fps independent)
-            blend = min(1.0, PITCH_LERP_PER_SEC * dt)
-            bird.pitch += (target_pitch - bird.pitch) * blend
+            if sim.precise and not sim.game_over:
+                # show the pose the pipe hits were tested with: the snapped
+                # target pitch and the velocity's frame, no easing or flap lock
+                bird.pitch = target_pitch
+                bird.frame_index = collision_frame(sim.velocity_y)
+                bird.img = bird.frames[bird.frame_index]
+            else:
+                # smooth toward target (fps independent)
+                blend = min(1.0, PITCH_LERP_PER_SEC * dt)
+                bird.pitch += (target_pitch - bird.pitch) * blend
+                bird.update(int(dt * 1000), sim.velocity_y)
             # ---------------------------------------------
-            
-            bird.update(int(dt * 1000), velocity_y)
+            profiler.mark(prof.ANIM)
 
             # Check if we should start a new transition based on current score
-            theme_changer.maybe_start_theme_transition(now, score)
+            # (a theme still streaming in waits; the old one stays up meanwhile)
+            if themes.available(theme_changer.desired_theme_for_score(sim.score)):
+                theme_changer.maybe_start_theme_transition(now, sim.score)
             
             # Check if current transition should complete
-            theme_state = theme_changer.get_theme_state()
-            if theme_state['transitioning'] and now - theme_state['transition_start'] >= theme_changer.TRANSITION_MS:
+            if theme_state.finished(now):
                 theme_changer.complete_transition()
+                crossfade.release()
 
-        draw()
-        pygame.display.update()
-        clock.tick(60)
+            # pin on-screen themes, finish/start preloads, evict over budget
+            themes.update(theme_state, sim.score)
+            profiler.mark(prof.THEME)
 
-        await asyncio.sleep(0)
+        # where between the last two ticks this frame is drawn
+        alpha = 1.0 if sim.game_over else accumulator / TICK_MS
+        bird.y = round(prev_bird_y + (sim.bird_y - prev_bird_y) * alpha)
+
+        draw()
+        profiler.mark(prof.DRAW)
+        renderer.present()
+        latency.presented()
+        pacer.frame_done()
+        capture.capture(now)
+        if clip_due is not None and now >= clip_due:
+            save_clip()
+        if first_frame:
+            # on screen: now stream the rest
+            first_frame = False
+            load_times.mark("first frame")
+            streamer.start()
+        profiler.mark(prof.PRESENT)
+        profiler.end_frame()
 
 
 # Run the game
@@ -0,0 +1,63 @@
+import pygame
+from simulation import GAME_WIDTH, GROUND_Y
+
+# Scrolling scenery. The ground and each theme's skyline band (the clouds and
+# buildings along the bottom of the background; the sky above them is flat
+# and stays put) repeat sideways, so a layer scrolled by any amount is its
+# image cut at one column: one blit of each side of the wrap seam (just one
+# when the seam is at the edge), with area rects into surfaces made at load
+# time. Scrolling allocates no surfaces and only the layers' own rows change
+# on screen, so the dirty-rect renderer repaints those bands and nothing else.
+# Each layer moves at its own fraction of the world scroll (the speed the
+# pipes move at).
+
+SKYLINE_PARALLAX = 0.25
+GROUND_PARALLAX = 1.0  # the ground keeps pace with the pipes
+
+
+def blit_wrapped(target, surf, offset, rect, top=0):
+    """
+    Blit the `rect` (x, y, w, h) part of a view onto surf repeated sideways,
+    scrolled `offset` px left, with surf's top at y=top. target: anything with
+    Surface.blit's (surf, dest, area).
+    """
+    x, y, w, h = rect
+    width = surf.get_width()
+    while w > 0:
+        src = (x + offset) % width
+        n = min(w, width - src)
+        target.blit(surf, (x, y), (src, y - top, n, h))
+        x += n
+        w -= n
+
+
+def seamless_strip(surf, top, bottom):
+    """
+    Rows top..bottom of surf followed by their mirror image, so the strip
+    repeats sideways without a seam whatever its edges look like (the
+    background art's left and right edges don't line up). Baked once per theme.
+    """
+    width = surf.get_width()
+    band = surf.subsurface((0, top, width, bottom - top))
+    strip = pygame.Surface((2 * width, bottom - top), 0, surf)
+    strip.blit(band, (0, 0))
+    strip.blit(pygame.transform.flip(band, True, False), (width, 0))
+    return strip
+
+
+class ParallaxLayer:
+    """A full-width repeating layer with its top at `top`, scrolled at factor x the world scroll."""
+
+    def __init__(self, factor, top=0):
+        self.factor = factor
+        self.top = top
+
+    def offset(self, surf, world_x):
+        """Scroll offset into surf for the world scrolled world_x px (pass it to blit_wrapped)."""
+        return int(world_x * self.factor) % surf.get_width()
+
+    def draw(self, target, surf, world_x):
+        blit_wrapped(target, surf, self.offset(surf, world_x), (0, self.top, GAME_WIDTH, surf.get_height()), self.top)
+
+
+ground = ParallaxLayer(GROUND_PARALLAX, GROUND_Y)
@@ -0,0 +1,144 @@
+import json
+import time
+from array import array
+import pygame
+from text_cache import GlyphAtlas
+
+# Built-in frame profiler for the main loop. The loop calls begin_frame(),
+# mark(PHASE) after each phase and end_frame(); durations go into a fixed ring
+# buffer that can be drawn as an overlay or exported as a Chrome trace
+# (chrome://tracing or ui.perfetto.dev). While disabled every call returns on
+# its first line.
+
+PHASES = ("wait", "events", "move", "anim", "theme", "draw", "present")
+WAIT, EVENTS, MOVE, ANIM, THEME, DRAW, PRESENT = range(len(PHASES))
+_N = len(PHASES)
+
+
+class FrameProfiler:
+    def __init__(self, capacity=600, enabled=False):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._starts = array("d", bytes(8 * capacity))       # frame start (perf_counter s)
+        self._durs = array("d", bytes(8 * capacity * _N))    # per-phase seconds
+        self._count = 0
+        self._base = 0
+        self._last = 0.0
+        self._in_frame = False
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self._in_frame = False
+        return self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        slot = self._count % self.capacity
+        self._starts[slot] = now
+        base = self._base = slot * _N
+        durs = self._durs
+        for i in range(_N):
+            durs[base + i] = 0.0
+        self._last = now
+        self._in_frame = True
+
+    def mark(self, phase):
+        """Charge the time since the previous mark to `phase`."""
+        if not self._in_frame:
+            return
+        now = time.perf_counter()
+        self._durs[self._base + phase] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if self._in_frame:
+            self._count += 1
+            self._in_frame = False
+
+    def frames(self, n=None):
+        """(start_s, [phase seconds]) for the last n recorded frames, oldest first."""
+        available = min(self._count, self.capacity)
+        n = available if n is None else min(n, available)
+        out = []
+        for k in range(self._count - n, self._count):
+            slot = k % self.capacity
+            base = slot * _N
+            out.append((self._starts[slot], self._durs[base:base + _N].tolist()))
+        return out
+
+    def phase_means_ms(self, n=60):
+        frames = self.frames(n)
+        if not frames:
+            return [0.0] * _N
+        return [sum(d[i] for _, d in frames) * 1000.0 / len(frames) for i in range(_N)]
+
+    def export_chrome_trace(self, path):
+        """Write the ring buffer as Chrome trace JSON: one 'frame' span per frame with phases nested inside."""
+        events = []
+        for start, durs in self.frames():
+            ts = start * 1e6
+            events.append({"name": "frame", "ph": "X", "ts": ts, "dur": sum(durs) * 1e6,
+                           "pid": 1, "tid": 1})
+            for name, d in zip(PHASES, durs):
+                if d > 0:
+                    events.append({"name": name, "ph": "X", "ts": ts, "dur": d * 1e6,
+                                   "pid": 1, "tid": 1})
+                    ts += d * 1e6
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+class ProfilerOverlay:
+    """
+    Rolling frame-time graph plus a per-phase breakdown (ms, last 60 frames).
+    With a LatencyMeter (input_pipeline.py) an extra row shows the median
+    input -> present latency of the last 16 flaps.
+    """
+
+    BUDGET_MS = 1000.0 / 60
+
+    def __init__(self, profiler, font, graph_frames=120, graph_height=40, latency=None):
+        self.profiler = profiler
+        self.latency = latency
+        self.graph_frames = graph_frames
+        self.graph_height = graph_height
+        self.labels = [font.render(name, False, (255, 255, 255)) for name in ("frame",) + PHASES + (("input",) if latency else ())]
+        self.digits = GlyphAtlas(font, "0123456789. ", (255, 255, 255), antialias=False)
+        self.line_h = self.digits.height + 2
+        label_w = max(s.get_width() for s in self.labels)
+        width = max(graph_frames, label_w + self.digits.size("00.00")[0] + 12)
+        height = graph_height + 4 + self.line_h * len(self.labels)
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        self._value_x = label_w + 8
+
+    def update(self):
+        """Redraw the overlay surface from the profiler's recent frames."""
+        surf = self.surface
+        surf.fill((0, 0, 0, 170))
+        gh = self.graph_height
+        scale = gh / (2 * self.BUDGET_MS)  # graph tops out at two frame budgets
+
+        frames = self.profiler.frames(self.graph_frames)
+        x = surf.get_width() - len(frames)
+        for _, durs in frames:
+            ms = sum(durs) * 1000.0
+            h = min(gh, int(ms * scale) + 1)
+            color = (80, 220, 80) if ms <= self.BUDGET_MS else (230, 70, 70)
+            pygame.draw.line(surf, color, (x, gh), (x, gh - h))
+            x += 1
+        budget_y = gh - int(self.BUDGET_MS * scale)
+        pygame.draw.line(surf, (255, 255, 0), (0, budget_y), (surf.get_width(), budget_y))
+
+        means = self.profiler.phase_means_ms()
+        values = [sum(means)] + means
+        if self.latency is not None:
+            recent = sorted(self.latency.recent(16))
+            values.append(recent[len(recent) // 2] if recent else 0.0)
+        y = gh + 4
+        for label, value in zip(self.labels, values):
+            surf.blit(label, (2, y))
+            self.digits.draw(surf, f"{min(value, 99.99):5.2f}", (self._value_x, y))
+            y += self.line_h
@@ -0,0 +1,164 @@
+import struct
+import sys
+from simulation import Simulation
+from difficulty import get_profile
+
+# Replays: a run is fully determined by its seed and the ticks it flapped on
+# (simulation.py draws all randomness from the seed and spawns by tick), so
+# that's all we store.
+#
+# File layout (little-endian):
+#   b"FBR" + version u8
+#   seed u64, ticks u32, score u32, flap count u32
+#   v2+: difficulty profile name, u8 length + UTF-8
+#   v3+: flags u8 (bit 0: precise collision)
+#   flap ticks as LEB128 varints, each a delta from the previous flap tick
+#
+# A typical run is a few hundred bytes. v1 files were all "classic".
+
+MAGIC = b"FBR"
+VERSION = 3
+FLAG_PRECISE = 1
+_HEADER = struct.Struct("<3sBQIII")
+
+
+class Replay:
+    def __init__(self, seed, flaps, ticks, score, profile="classic", precise=False):
+        self.seed = seed
+        self.flaps = flaps    # ascending tick numbers (1-based, as in Simulation.ticks)
+        self.ticks = ticks    # ticks simulated when the run ended
+        self.score = score
+        self.profile = profile  # difficulty profile name
+        self.precise = precise  # pixel-mask collisions
+
+    def to_bytes(self):
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.seed, self.ticks, self.score, len(self.flaps)))
+        name = self.profile.encode()
+        out.append(len(name))
+        out += name
+        out.append(FLAG_PRECISE if self.precise else 0)
+        prev = 0
+        for tick in self.flaps:
+            n = tick - prev
+            prev = tick
+            while n >= 0x80:
+                out.append((n & 0x7F) | 0x80)
+                n >>= 7
+            out.append(n)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, seed, ticks, score, count = _HEADER.unpack_from(data)
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ValueError("not a v1-v%d replay" % VERSION)
+        pos = _HEADER.size
+        profile = "classic"
+        if version >= 2:
+            length = data[pos]
+            profile = bytes(data[pos + 1:pos + 1 + length]).decode()
+            pos += 1 + length
+        flags = 0
+        if version >= 3:
+            flags = data[pos]
+            pos += 1
+        flaps = []
+        tick = 0
+        n = shift = 0
+        for byte in memoryview(data)[pos:]:
+            n |= (byte & 0x7F) << shift
+            if byte & 0x80:
+                shift += 7
+                continue
+            tick += n
+            flaps.append(tick)
+            n = shift = 0
+        if len(flaps) != count:
+            raise ValueError("truncated replay")
+        return cls(seed, flaps, ticks, score, profile, bool(flags & FLAG_PRECISE))
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Collects flap ticks for one run."""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.flaps = []
+
+    def flap(self, tick):
+        # several inputs landing in the same tick are one flap
+        if not self.flaps or self.flaps[-1] != tick:
+            self.flaps.append(tick)
+
+    def finish(self, sim):
+        return Replay(self.seed, self.flaps, sim.ticks, sim.score, sim.profile.name, sim.precise)
+
+
+class Player:
+    """Feeds a replay's flaps back tick by tick (display-speed playback)."""
+
+    def __init__(self, replay):
+        self.replay = replay
+        self._next = 0
+
+    def flap_at(self, tick):
+        flaps = self.replay.flaps
+        i = self._next
+        while i < len(flaps) and flaps[i] < tick:
+            i += 1
+        self._next = i
+        return i < len(flaps) and flaps[i] == tick
+
+
+def play(replay, sim=None):
+    """Re-run a replay unthrottled. Returns the Simulation at the end of the run."""
+    if sim is None:
+        sim = Simulation(seed=replay.seed, profile=replay.profile, precise=replay.precise)
+    else:
+        sim.profile = get_profile(replay.profile)
+        sim.precise = replay.precise
+        sim.reset(replay.seed)
+    step = sim.step
+    flaps = iter(replay.flaps)
+    next_flap = next(flaps, 0)
+    while sim.ticks < replay.ticks and not sim.game_over:
+        if sim.ticks + 1 == next_flap:
+            step(True)
+            next_flap = next(flaps, 0)
+        else:
+            step(False)
+    return sim
+
+
+def verify(replay, sim=None):
+    """True if the current rules still reproduce the recorded ticks and score."""
+    sim = play(replay, sim)
+    return sim.ticks == replay.ticks and sim.score == replay.score
+
+
+if __name__ == "__main__":
+    # python replay.py replays/*.fbr  -> re-verify recorded runs
+    import time
+    start = time.perf_counter()
+    sim = Simulation()
+    failed = 0
+    ticks = 0
+    for path in sys.argv[1:]:
+        replay = Replay.load(path)
+        ticks += replay.ticks
+        if not verify(replay, sim):
+            failed += 1
+            print(f"MISMATCH {path} ({replay.profile}): recorded score {replay.score} @ {replay.ticks} ticks, "
+                  f"got {sim.score} @ {sim.ticks}")
+    elapsed = time.perf_counter() - start
+    print(f"{len(sys.argv) - 1} replays, {failed} failed, {ticks} ticks in {elapsed:.2f}s")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,289 @@
+import asyncio
+import bisect
+from abc import ABC, abstractmethod
+import json
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# High scores and run history. Finishing a run only appends to a pending list
+# (no I/O on the frame path); a task on the game's asyncio loop writes pending
+# runs out in batches every few seconds. Desktop keeps them in SQLite (scores.db
+# next to the game) and does the write on a worker thread; in the browser they
+# go to localStorage as one JSON blob. best() reads an in-memory per-profile
+# cache, so the HUD never waits on storage.
+#
+#   python scores.py top [N] [profile]      -> best runs
+#   python scores.py rank SCORE [profile]   -> share of runs below SCORE
+
+IS_WEB = sys.platform == "emscripten"
+DB_PATH = Path(__file__).with_name("scores.db")
+STORAGE_KEY = "flappy.runs"
+FLUSH_INTERVAL_S = 3.0
+MAX_WEB_RUNS = 500  # localStorage is small: past this, drop the oldest runs...
+WEB_TOP_KEPT = 50   # ...except the best ones
+
+FIELDS = ("ended_at", "seed", "profile", "score", "ticks", "flaps", "cause", "replay")
+CAUSE_PIPE = "pipe"
+CAUSE_GROUND = "ground"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    ended_at REAL NOT NULL,
+    seed INTEGER NOT NULL,
+    profile TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    flaps INTEGER NOT NULL,
+    cause TEXT,
+    replay TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (profile, score DESC);
+"""
+
+
+def run_record(sim, flaps, cause, replay=None):
+    """One finished run as a dict of FIELDS (duration is ticks / 60 s)."""
+    return {"ended_at": time.time(), "seed": sim.seed & ((1 << 63) - 1), "profile": sim.profile.name,
+            "score": int(sim.score), "ticks": sim.ticks, "flaps": flaps, "cause": cause, "replay": replay}
+
+
+class ScoreStore(ABC):
+    """Shared batching and best-score cache; the backends do the storage."""
+
+    def __init__(self):
+        self._pending = []
+        self._best = {}
+        self._task = None
+        self._flushing = None
+
+    def add_run(self, record):
+        """Queue a finished run. Cheap: the write happens on a later flush."""
+        self._pending.append(record)
+        profile = record["profile"]
+        self._best[profile] = max(self._best.get(profile, 0), record["score"])
+
+    def best(self, profile):
+        return self._best.get(profile, 0)
+
+    def start(self):
+        """Flush pending runs from the asyncio loop every FLUSH_INTERVAL_S."""
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_S)
+            await self.flush_async()
+
+    async def flush_async(self):
+        if not self._pending or self._flushing is not None:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            self._flushing = batch
+            await self._write_async(batch)
+        except Exception as e:
+            print(f"Saving scores failed: {e}")
+            self._pending[:0] = batch  # try again next time
+        finally:
+            self._flushing = None
+
+    async def _write_async(self, batch):
+        self._write(batch)
+
+    def flush(self):
+        """Write pending runs now (blocking; for exit)."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        try:
+            self._write(batch)
+        except Exception as e:
+            print(f"Saving scores failed: {e}")
+
+    # backends
+    @abstractmethod
+    def _write(self, batch):
+        """Store a batch of run records (may run on a worker thread)."""
+
+    @abstractmethod
+    def top(self, n=10, profile=None):
+        """Best n runs (dicts), highest score first, shortest run first on ties."""
+
+    @abstractmethod
+    def rank(self, score, profile=None):
+        """Share of stored runs that scored below `score` (0.0 - 1.0)."""
+
+    @abstractmethod
+    def count(self, profile=None):
+        """Stored runs (for one profile, or all)."""
+
+    @abstractmethod
+    def close(self):
+        """Flush pending runs and release the storage (on quit)."""
+
+
+class SqliteStore(ScoreStore):
+    """Desktop: runs table indexed by (profile, score); writes go through a worker thread."""
+
+    def __init__(self, path=DB_PATH):
+        super().__init__()
+        self.path = path
+        self._db = sqlite3.connect(str(path), check_same_thread=False)
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1)
+        self._job = None  # the last batch handed to the writer (close() waits for it)
+        with self._lock:
+            self._db.executescript(SCHEMA)
+            self._db.execute("PRAGMA synchronous = NORMAL")
+            for profile, best in self._db.execute("SELECT profile, MAX(score) FROM runs GROUP BY profile"):
+                self._best[profile] = best
+
+    async def _write_async(self, batch):
+        self._job = self._writer.submit(self._write, batch)
+        await asyncio.wrap_future(self._job)
+
+    def _write(self, batch):
+        rows = [tuple(r[f] for f in FIELDS) for r in batch]
+        with self._lock, self._db:
+            self._db.executemany(f"INSERT INTO runs ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})", rows)
+
+    def _where(self, profile):
+        return ("WHERE profile = ?", (profile,)) if profile else ("", ())
+
+    def top(self, n=10, profile=None):
+        """Best n runs (dicts), highest score first, shortest run first on ties."""
+        where, args = self._where(profile)
+        with self._lock:
+            cur = self._db.execute(f"SELECT {', '.join(FIELDS)} FROM runs {where} "
+                                   "ORDER BY score DESC, ticks ASC LIMIT ?", args + (n,))
+            return [dict(zip(FIELDS, row)) for row in cur]
+
+    def rank(self, score, profile=None):
+        """Share of stored runs that scored below `score` (0.0 - 1.0)."""
+        where, args = self._where(profile)
+        below = "AND score < ?" if where else "WHERE score < ?"
+        with self._lock:
+            total = self._db.execute(f"SELECT COUNT(*) FROM runs {where}", args).fetchone()[0]
+            if not total:
+                return 0.0
+            n = self._db.execute(f"SELECT COUNT(*) FROM runs {where} {below}", args + (score,)).fetchone()[0]
+        return n / total
+
+    def count(self, profile=None):
+        where, args = self._where(profile)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM runs {where}", args).fetchone()[0]
+
+    def close(self):
+        # a batch flush_async() already handed over may not have run yet:
+        # let it finish (or take it back if it failed) before closing
+        job = self._job
+        if job is not None and job.exception() is not None and self._flushing is not None:
+            self._pending[:0] = self._flushing
+            self._flushing = None
+        self._writer.shutdown(wait=True)
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+
+class MemoryStore(ScoreStore):
+    """
+    Runs in a list, queries on sorted score lists (one per profile and one for
+    all runs) with bisect, so rank() and count() are O(log n) like the SQLite
+    index. Nothing outlives the process.
+    """
+
+    def __init__(self, runs=()):
+        super().__init__()
+        self._runs = list(runs)
+        self._reindex()
+
+    def _reindex(self):
+        self._sorted = {}  # profile -> ascending scores
+        self._all = []     # every profile's scores, ascending
+        for run in self._runs:
+            self._index(run)
+
+    def _index(self, run):
+        profile = run["profile"]
+        bisect.insort(self._sorted.setdefault(profile, []), run["score"])
+        bisect.insort(self._all, run["score"])
+        self._best[profile] = max(self._best.get(profile, 0), run["score"])
+
+    def _write(self, batch):
+        for run in batch:
+            self._runs.append(run)
+            self._index(run)
+        self._persist()
+
+    def _persist(self):
+        pass
+
+    def _scores(self, profile):
+        return self._sorted.get(profile, []) if profile else self._all
+
+    def top(self, n=10, profile=None):
+        runs = [r for r in self._runs if not profile or r["profile"] == profile]
+        return sorted(runs, key=lambda r: (-r["score"], r["ticks"]))[:n]
+
+    def rank(self, score, profile=None):
+        scores = self._scores(profile)
+        return bisect.bisect_left(scores, score) / len(scores) if scores else 0.0
+
+    def count(self, profile=None):
+        return len(self._scores(profile))
+
+    def close(self):
+        self.flush()
+
+
+class BrowserStore(MemoryStore):
+    """pygbag: the runs are one JSON blob in localStorage, loaded once and rewritten per batch."""
+
+    def __init__(self):
+        import platform  # pygbag's: the page's window object
+        self._storage = platform.window.localStorage
+        super().__init__(json.loads(self._storage.getItem(STORAGE_KEY) or "[]"))
+
+    def _persist(self):
+        if len(self._runs) > MAX_WEB_RUNS:
+            best = sorted(self._runs, key=lambda r: (-r["score"], r["ticks"]))[:WEB_TOP_KEPT]
+            kept = {id(r) for r in best}
+            recent = [r for r in self._runs if id(r) not in kept][-(MAX_WEB_RUNS - WEB_TOP_KEPT):]
+            self._runs = sorted(best + recent, key=lambda r: r["ended_at"])
+            self._reindex()
+        self._storage.setItem(STORAGE_KEY, json.dumps(self._runs, separators=(",", ":")))
+
+
+def open_store():
+    """The platform's store; falls back to one that keeps runs in memory only."""
+    try:
+        return BrowserStore() if IS_WEB else SqliteStore()
+    except Exception as e:
+        print(f"Score store unavailable ({e}); scores won't be saved")
+        return MemoryStore()
+
+
+if __name__ == "__main__":
+    store = SqliteStore()
+    if len(sys.argv) >= 2 and sys.argv[1] == "top":
+        n = int(sys.argv[2]) if len(sys.argv) >= 3 else 10
+        profile = sys.argv[3] if len(sys.argv) >= 4 else None
+        for i, run in enumerate(store.top(n, profile), 1):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["ended_at"]))
+            print(f"{i:3d}. {run['score']:4d}  {run['profile']:<8} {run['ticks'] / 60:6.1f}s  "
+                  f"{run['flaps']:4d} flaps  {run['cause'] or '-':<6}  {when}  {run['replay'] or ''}")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "rank":
+        score = int(sys.argv[2])
+        profile = sys.argv[3] if len(sys.argv) >= 4 else None
+        print(f"{score} beats {store.rank(score, profile):.1%} of {store.count(profile)} runs")
+    else:
+        print("usage: python scores.py top [N] [profile] | rank SCORE [profile]")
+        sys.exit(2)
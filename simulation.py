@@ -0,0 +1,490 @@
+import random
+from collections import deque
+from difficulty import get_profile
+import collision
+
+# Headless game rules. No pygame in here on purpose: this runs without a
+# window, fonts, mixer or images so bots/tuning scripts can step it flat out.
+# main.py drives the same Simulation for the interactive game, so both paths
+# produce identical outcomes for the same flaps, spawns and seed.
+
+# World geometry (pixels)
+GAME_WIDTH = 360
+GAME_HEIGHT = 640
+
+BIRD_X = GAME_WIDTH // 8
+BIRD_Y = GAME_HEIGHT // 2
+BIRD_WIDTH = 44
+BIRD_HEIGHT = 34
+
+PIPE_X = GAME_WIDTH
+PIPE_WIDTH = 64
+PIPE_HEIGHT = 512  # only where top_y is measured from: pipes reach the edges of the play area at any length
+
+BASE_HEIGHT = PIPE_HEIGHT // 8
+GROUND_Y = GAME_HEIGHT - BASE_HEIGHT  # top of the base image
+
+# Physics (per tick, one tick = one 60 fps frame)
+GRAVITY = 0.4
+FLAP_VELOCITY = -6
+TICKS_PER_SECOND = 60
+
+# safe band for a new pair's gap center
+CENTER_MARGIN = 120
+
+# the bird has passed a pair once the course has scrolled this far past the
+# pair's offset (its right edge is left of BIRD_X)
+PASS_DISTANCE = PIPE_X + PIPE_WIDTH - BIRD_X
+
+# pair specs PipeStream may hold ahead of the simulation
+LOOKAHEAD_PAIRS = 8
+
+
+def pair_capacity(profile, spawn_interval=None):
+    """Most pairs alive at once under `profile` (slowest scroll, fastest spawns)."""
+    slowest = -max(profile.scroll_speed)
+    lifetime = (PIPE_X + 2 * PIPE_WIDTH) // slowest + 1
+    return lifetime // (spawn_interval or min(profile.spawn_interval)) + 2
+
+# step() event bits
+EVENT_SCORE = 1   # passed a pipe pair
+EVENT_CRASH = 2   # hit a pipe
+EVENT_GROUND = 4  # hit the base
+
+# --- counter-based randomness ---
+# Every draw is a pure hash of (run seed, tick, pair id, stream) instead of a
+# sequential random.Random stream. That way batch_sim.py can compute the exact
+# same numbers for thousands of lanes at once with NumPy.
+MASK64 = (1 << 64) - 1
+PAIR_ID_BITS = 16  # only needs to tell apart the few pairs alive in one tick
+
+STREAM_CENTER = 0   # gap center of a new pair
+STREAM_SEED_VY = 1  # vy when a pair unfreezes
+STREAM_FLIP = 2     # chaos flip roll
+STREAM_FLIP_VY = 3  # vy after a chaos flip
+
+_INV_2_53 = 1.0 / (1 << 53)
+
+
+def mix64(x):
+    """splitmix64 finalizer: scrambles a 64-bit int into a well-spread 64-bit int."""
+    x = (x + 0x9E3779B97F4A7C15) & MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & MASK64
+    return x ^ (x >> 31)
+
+
+def seed_key(seed):
+    return mix64(seed & MASK64)
+
+
+def rand_u64(key, tick, pair_id, stream):
+    counter = (tick << 20) + ((pair_id & ((1 << PAIR_ID_BITS) - 1)) << 4) + stream
+    return mix64((key + counter) & MASK64)
+
+
+def unit_float(u):
+    """Top 53 bits of u as a float in [0, 1), like random.random()."""
+    return (u >> 11) * _INV_2_53
+
+
+def random_vy(u, max_speed):
+    """choice([-1, 1]) * uniform(0.3, max_speed) from a single draw."""
+    sign = -1.0 if u & 1 else 1.0
+    return sign * (0.3 + (max_speed - 0.3) * unit_float(u))
+
+
+class PipePair:
+    """One top/bottom pipe pair. The gap spans top_y + PIPE_HEIGHT .. bottom_y."""
+    __slots__ = ("id", "x", "top_y", "bottom_y", "gap", "vy", "frozen", "passed")
+
+    def __init__(self, pair_id=0, x=0, top_y=0, bottom_y=0, gap=0):
+        self.reset(pair_id, x, top_y, bottom_y, gap)
+
+    def reset(self, pair_id, x, top_y, bottom_y, gap):
+        self.id = pair_id
+        self.x = x
+        self.top_y = top_y
+        self.bottom_y = bottom_y
+        self.gap = gap
+        self.vy = 0.0
+        self.frozen = True
+        self.passed = False
+
+
+class PipePool:
+    """
+    Live pipe pairs in a fixed ring of preallocated PipePair records, oldest
+    first. Spawning reuses the slot the purge freed, so long runs allocate
+    nothing per spawn. Grows only if spawns outpace the purge.
+    """
+    __slots__ = ("_ring", "_head", "_count")
+
+    def __init__(self, capacity=8):
+        self._ring = [PipePair() for _ in range(capacity)]
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        ring, head, cap = self._ring, self._head, len(self._ring)
+        for i in range(self._count):
+            yield ring[(head + i) % cap]
+
+    def __getitem__(self, i):
+        if not -self._count <= i < self._count:
+            raise IndexError("pipe pool index out of range")
+        return self._ring[(self._head + i % self._count) % len(self._ring)]
+
+    def capacity(self):
+        return len(self._ring)
+
+    def acquire(self):
+        """Claim the slot after the newest pair and return its record."""
+        ring = self._ring
+        if self._count == len(ring):
+            # full: unroll the ring oldest-first and double it
+            self._ring = ring[self._head:] + ring[:self._head]
+            self._ring += [PipePair() for _ in range(len(ring))]
+            self._head = 0
+            ring = self._ring
+        pair = ring[(self._head + self._count) % len(ring)]
+        self._count += 1
+        return pair
+
+    def release_front(self):
+        self._head = (self._head + 1) % len(self._ring)
+        self._count -= 1
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+
+class PairSpec:
+    """
+    One pipe pair of a course. offset: px the course has scrolled when the
+    pair enters at PIPE_X. vy: its vertical speed if pipes are already moving
+    when it enters, else 0.0 (it gets one when they start).
+    """
+    __slots__ = ("index", "offset", "center", "gap", "vy")
+
+    def __init__(self, index, offset, center, gap, vy):
+        self.index = index
+        self.offset = offset
+        self.center = center
+        self.gap = gap
+        self.vy = vy
+
+    def __repr__(self):
+        return f"PairSpec({self.index}, offset={self.offset}, center={self.center}, gap={self.gap}, vy={self.vy:.2f})"
+
+
+class PipeStream:
+    """
+    The pipe layout of one run as a lazy stream of PairSpecs, a pure function
+    of (seed, profile, spawn interval, starting score). Pairs are spaced by
+    scroll distance; the difficulty knobs for each pair come from the score
+    the bird has when it enters, which only depends on how far the course has
+    scrolled (scoring is positional), so the stream can run ahead of any game.
+
+    A small course clock does that: it jumps from event to event (a pass, a
+    spawn) with the profile's scroll speed for the score in between, so a spec
+    costs a handful of operations, not one per tick. At most `lookahead`
+    specs are buffered. Simulation consumes the stream as it scrolls;
+    batch_sim.py reproduces the same course tick by tick in NumPy.
+    """
+
+    def __init__(self, seed, profile=None, spawn_interval="profile", start_score=0,
+                 lookahead=LOOKAHEAD_PAIRS):
+        self.profile = get_profile(profile)
+        self.spawn_interval = spawn_interval
+        self.lookahead = lookahead
+        self._key = seed_key(seed)
+        self._buffer = deque()
+        self._generated = 0
+        # course clock: ticks done, px scrolled, score so far, offsets not passed yet
+        self._tick = 0
+        self._distance = 0
+        self._score = start_score
+        self._ahead = deque()
+        self._countdown = self._interval()
+
+    def _interval(self):
+        if self.spawn_interval == "profile":
+            p = self.profile
+            return p.spawn_interval[p.index(self._score)]
+        return self.spawn_interval
+
+    def _generate(self):
+        p = self.profile
+        ahead = self._ahead
+        while True:
+            k = p.index(self._score)
+            speed = -p.scroll_speed[k]
+            countdown = self._countdown
+            if ahead:
+                # ticks until the oldest pair is passed (after that tick's scroll)
+                to_pass = (ahead[0] + PASS_DISTANCE - self._distance) // speed + 1
+                if to_pass < countdown:
+                    self._tick += to_pass
+                    self._distance += speed * to_pass
+                    self._countdown -= to_pass
+                    self._score += 1
+                    ahead.popleft()
+                    continue
+            # the next pair enters on tick `countdown` from now, before that tick's scroll
+            self._tick += countdown
+            self._distance += speed * (countdown - 1)
+            index = self._generated
+            self._generated += 1
+            gap = p.gap[k]
+            u = rand_u64(self._key, self._tick, index, STREAM_CENTER)
+            center = CENTER_MARGIN + u % (GROUND_Y - 2 * CENTER_MARGIN + 1)
+            vy = random_vy(rand_u64(self._key, self._tick, index, STREAM_SEED_VY), p.max_vy[k]) if p.vertical[k] else 0.0
+            spec = PairSpec(index, self._distance, center, gap, vy)
+            self._countdown = self._interval()
+            self._distance += speed
+            # passes on the spawn tick itself
+            while ahead and self._distance > ahead[0] + PASS_DISTANCE:
+                ahead.popleft()
+                self._score += 1
+            ahead.append(spec.offset)
+            return spec
+
+    def peek(self, i=0):
+        """The i-th upcoming spec (0 = next), generating up to it; i < lookahead."""
+        if i >= self.lookahead:
+            raise IndexError(f"lookahead is {self.lookahead} pairs")
+        buffer = self._buffer
+        while len(buffer) <= i:
+            buffer.append(self._generate())
+        return buffer[i]
+
+    def upcoming(self, n=None):
+        """The next n specs (default: a full lookahead) without consuming them."""
+        n = self.lookahead if n is None else min(n, self.lookahead)
+        self.peek(n - 1)
+        return list(self._buffer)[:n]
+
+    def pop(self):
+        self.peek()
+        return self._buffer.popleft()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.pop()
+
+
+class Simulation:
+    def __init__(self, seed=None, spawn_interval="profile", profile=None, precise=False):
+        """
+        profile: difficulty profile or its name (None = the config default).
+        spawn_interval: "profile" lays pairs out on the profile's schedule, an
+        int every that many ticks (both through a PipeStream), None means
+        spawn manually with spawn_pipe().
+        precise: pipe hits use the rotated bird's pixel mask (collision.py)
+        instead of its unrotated 44x34 rect. The ground stays a rect test.
+        """
+        self.spawn_interval = spawn_interval
+        self.profile = get_profile(profile)
+        self.precise = precise
+        fixed = spawn_interval if spawn_interval != "profile" else None
+        capacity = pair_capacity(self.profile, fixed) if spawn_interval else 8
+        self.pipes = PipePool(capacity)
+        # hands out run seeds for reset() calls that don't pass one
+        self._seed_source = random.Random(seed)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """
+        Start a new run. With no seed the next one comes from the seed given
+        to the constructor, so a seeded Simulation replays the same sequence
+        of runs. Assign .profile (.precise) before calling to switch difficulty
+        (collision mode).
+        """
+        if seed is None:
+            seed = self._seed_source.getrandbits(63)
+        self.seed = seed
+        self._key = seed_key(seed)
+        self.pairs_spawned = 0
+        self.bird_y = BIRD_Y
+        self.velocity_y = 0
+        self.pipes.clear()
+        self.score = 0
+        self.game_over = False
+        self.ticks = 0
+        self.scroll_speed = self.profile.scroll_speed[0]
+        self._shapes = collision.shapes() if self.precise else None
+        # px scrolled so far; pairs enter when it reaches their offset
+        self.distance = 0
+        # made on the first step, so a score set after reset() still shapes the course
+        self.stream = None
+
+    def _make_stream(self):
+        return PipeStream(self.seed, self.profile, self.spawn_interval, start_score=self.score)
+
+    def upcoming(self, n=None):
+        """The next pairs of this run's course (PairSpecs) without spawning them."""
+        if self.stream is None:
+            self.stream = self._make_stream()
+        return self.stream.upcoming(n)
+
+    def spawn_pipe(self, spec=None):
+        """
+        Append a new pair at the right edge. Without a spec (manual spawning)
+        it's rolled from the current tick and score, like create_pipe() was.
+        """
+        pair_id = self.pairs_spawned
+        self.pairs_spawned += 1
+        if spec is None:
+            p = self.profile
+            gap = p.gap[p.index(self.score)]
+            u = rand_u64(self._key, self.ticks, pair_id, STREAM_CENTER)
+            center_y = CENTER_MARGIN + u % (GROUND_Y - 2 * CENTER_MARGIN + 1)
+            vy = 0.0
+        else:
+            gap, center_y, vy = spec.gap, spec.center, spec.vy
+        top_y = center_y - gap // 2 - PIPE_HEIGHT
+        bottom_y = center_y + gap // 2
+        pair = self.pipes.acquire()
+        pair.reset(pair_id, PIPE_X, top_y, bottom_y, gap)
+        if vy:
+            pair.vy = vy
+            pair.frozen = False
+        return pair
+
+    def flap(self):
+        if not self.game_over:
+            self.velocity_y = FLAP_VELOCITY
+
+    def step(self, action=False):
+        """
+        Advance one tick. action=True flaps first, same as a keypress handled
+        before move() in the frame. Returns a bitmask of EVENT_* flags.
+        """
+        if self.game_over:
+            return 0
+        events = 0
+        self.ticks += 1
+        tick = self.ticks
+
+        if self.spawn_interval:
+            stream = self.stream
+            if stream is None:
+                stream = self.stream = self._make_stream()
+            while stream.peek().offset <= self.distance:
+                self.spawn_pipe(stream.pop())
+
+        if action:
+            self.velocity_y = FLAP_VELOCITY
+
+        # --- Bird physics ---
+        self.velocity_y += GRAVITY
+        bird_y = self.bird_y + int(self.velocity_y)
+        if bird_y < 0:
+            bird_y = 0
+        if bird_y + BIRD_HEIGHT > GROUND_Y:
+            bird_y = GROUND_Y - BIRD_HEIGHT
+            self.velocity_y = 0
+            self.game_over = True
+            events |= EVENT_GROUND
+        self.bird_y = bird_y
+        bird_bottom = bird_y + BIRD_HEIGHT
+
+        # broadphase box: the unrotated rect, or the bounds of the rotated pose
+        if self.precise:
+            shapes = self._shapes
+            shape = shapes.pose(self.velocity_y)
+            shape_x = BIRD_X + BIRD_WIDTH // 2 + shape.dx
+            shape_y = bird_y + BIRD_HEIGHT // 2 + shape.dy
+            hit_left, hit_right = shape_x, shape_x + shape.width
+        else:
+            shape = None
+            hit_left, hit_right = BIRD_X, BIRD_X + BIRD_WIDTH
+
+        # --- difficulty knobs (profile table lookups) ---
+        score = self.score
+        p = self.profile
+        k = score if score < p.size else p.index(score)
+        max_speed = p.max_vy[k]
+        flip_chance = p.flip_chance[k]
+        enable_vertical = p.vertical[k]
+        scroll = self.scroll_speed = p.scroll_speed[k]
+        key = self._key
+
+        pipes = self.pipes
+        ring = pipes._ring
+        cap = len(ring)
+        head = pipes._head
+        for i in range(pipes._count):
+            pair = ring[(head + i) % cap]
+            # horizontal scroll
+            pair.x += scroll
+            x = pair.x
+
+            if enable_vertical:
+                # unfreeze on first tick of enabled state, seed vy once
+                if pair.frozen:
+                    pair.frozen = False
+                    pair.vy = random_vy(rand_u64(key, tick, pair.id, STREAM_SEED_VY), max_speed)
+
+                # vertical move (int() matches pygame.Rect truncation)
+                top_y = int(pair.top_y + pair.vy)
+
+                # bounce: the gap stays between the top of the screen and the ground
+                gap_top = top_y + PIPE_HEIGHT
+                if gap_top < 0:
+                    top_y = -PIPE_HEIGHT
+                    pair.vy *= -1
+                elif gap_top + pair.gap > GROUND_Y:
+                    top_y = GROUND_Y - pair.gap - PIPE_HEIGHT
+                    pair.vy *= -1
+
+                # occasional chaos flips ONLY when enabled
+                if flip_chance > 0 and unit_float(rand_u64(key, tick, pair.id, STREAM_FLIP)) < flip_chance:
+                    pair.vy = random_vy(rand_u64(key, tick, pair.id, STREAM_FLIP_VY), max_speed)
+
+                # follower keeps exact stored gap
+                pair.top_y = top_y
+                pair.bottom_y = top_y + PIPE_HEIGHT + pair.gap
+            else:
+                # hard pin: frozen pairs stay exactly where they stopped
+                pair.frozen = True
+                pair.vy = 0.0
+
+            # scoring
+            if not pair.passed and BIRD_X > x + PIPE_WIDTH:
+                pair.passed = True
+                score += 1
+                events |= EVENT_SCORE
+
+            # collisions: only the pair under the bird gets past the x test
+            if hit_left < x + PIPE_WIDTH and x < hit_right:
+                # pipes run from their gap edge to the edge of the play area
+                gap_top = pair.top_y + PIPE_HEIGHT
+                if shape is None:
+                    hit = bird_y < gap_top or pair.bottom_y < bird_bottom
+                else:
+                    # row ANDs only when the pose's box reaches into a pipe
+                    top_pipe = shapes.top_pipe
+                    hit = (shape_y < gap_top and
+                           shape.hits(shape_x, shape_y, top_pipe, x, gap_top - top_pipe.height)) or \
+                          (shape_y + shape.height > pair.bottom_y and
+                           shape.hits(shape_x, shape_y, shapes.bottom_pipe, x, pair.bottom_y))
+                if hit:
+                    self.game_over = True
+                    events |= EVENT_CRASH
+
+        self.score = score
+        self.distance -= scroll
+
+        # purge off-screen pairs **after** iterating
+        while pipes._count and ring[pipes._head].x + PIPE_WIDTH < -PIPE_WIDTH:
+            pipes.release_front()
+
+        return events
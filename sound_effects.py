@@ -1,5 +1,6 @@
 from pathlib import Path
-import sys, pygame
+import sys, time, asyncio, threading, pygame
+from voices import VoiceManager
 
 IS_WEB = sys.platform == "emscripten"
 ROOT = Path(__file__).parent
@@ -8,14 +9,36 @@ for base in CANDIDATES:
     if base.exists():
         SOUNDS = base; break
 else:
-    SOUNDS = ROOT
+    # the web APK carries no sounds: they're fetched into sounds/ (web_assets.py)
+    SOUNDS = ROOT / "sounds" if IS_WEB else ROOT
 
-jump_sound = None
-swoosh_sound = None
-crash_sound = None
-fall_sound = None
-new_point_sound = None
-_music_loaded = False
+# Must use OGG Format! they must be 24 kHz mono!!
+SOUND_FILES = {
+    "jump":   "wing_flap.ogg",
+    "crash":  "audio_hit.ogg",
+    "fall":   "game_over.ogg",
+    "point":  "audio_point.ogg",
+    "swoosh": "audio_swoosh.ogg",
+}
+MUSIC_FILE = "flappy_background_song.ogg"
+
+# Loading happens off the input path: desktop decodes on a worker thread at
+# startup, web decodes one sound per frame in an asyncio task once the mixer is
+# unlocked (downloading any file the page's asset streamer hasn't fetched yet).
+# The only thing a tap/keypress does is unlock(). Until a sound is READY its
+# play call is a no-op, so playback never waits on a decode.
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+_sounds = {}                                   # name -> Sound, only once READY
+_status = {name: PENDING for name in SOUND_FILES}
+_status["music"] = PENDING
+_load_ms = {}                                  # name -> decode time
+_times = None                                  # web_assets.LoadTimes the decodes are reported to
+_unlocked = False
+_loader_started = False
+_music_playing = False
+_music_lock = threading.Lock()
+_voices = None                                 # VoiceManager, rebuilt with the mixer
 
 # Our expected, web-safe mixer configuration
 _MIX_FREQ, _MIX_SIZE, _MIX_CHANS, _MIX_BUF = 24000, -16, 1, 512
@@ -23,6 +46,7 @@ _EXPECTED = (_MIX_FREQ, _MIX_SIZE, _MIX_CHANS)
 
 def ensure_mixer_config():
     """Force mixer into the exact web-friendly config (idempotent, safe on mobile)."""
+    global _voices
     init = pygame.mixer.get_init()  # None or (freq, size, channels)
     if init != _EXPECTED:
         try:
@@ -33,71 +57,189 @@ def ensure_mixer_config():
         pygame.mixer.init()
         pygame.mixer.set_num_channels(8)
         print("Mixer (re)initialized:", pygame.mixer.get_init())
+        _voices = None
+    if _voices is None:
+        _voices = VoiceManager()
 
 def init_audio_once():
     """Kept for compatibility; called inside a gesture."""
+    return unlock()
+
+def unlock():
+    """The gesture-path part of audio: mixer config only. Loading is start_loading()'s job."""
+    global _unlocked
     ensure_mixer_config()
+    _unlocked = True
+    _maybe_start_music()
     return True
 
+def status():
+    """name -> pending/loading/ready/failed, for every sound plus "music"."""
+    return dict(_status)
+
+def sound_file(name):
+    """Where a sound file lives, relative to the game folder (web_assets fetches it there)."""
+    return (SOUNDS / name).relative_to(ROOT).as_posix()
+
 def _load(name: str):
     p = SOUNDS / name
     s = pygame.mixer.Sound(str(p))
     s.set_volume(0.15)
     return s
 
-def load_sounds():
-    global jump_sound, crash_sound, fall_sound, new_point_sound, swoosh_sound
-    # Must use OGG Format! they must be 24 kHz mono!!
-    jump_sound  = _load("wing_flap.ogg")
-    crash_sound = _load("audio_hit.ogg")  
-    fall_sound  = _load("game_over.ogg")
-    new_point_sound = _load("audio_point.ogg")
-    swoosh_sound = _load("audio_swoosh.ogg")
+def _record(name, filename, fetch_ms):
+    """Add a finished load to the LoadTimes breakdown, flagged if it failed."""
+    if _times is None:
+        return
+    p = SOUNDS / filename
+    label = f"sound {name}" + (" (failed)" if _status[name] == FAILED else "")
+    _times.asset(label, fetch_ms, _load_ms[name], p.stat().st_size if p.exists() else 0)
 
+def _load_one(name, fetch_ms=0.0):
+    _status[name] = LOADING
+    start = time.perf_counter()
+    try:
+        sound = _load(SOUND_FILES[name])
+        if IS_WEB:
+            _warmup(sound)
+        _sounds[name] = sound
+        _status[name] = READY
+    except Exception as e:
+        _status[name] = FAILED
+        print(f"Sound {name} failed to load: {e}")
+    _load_ms[name] = (time.perf_counter() - start) * 1000.0
+    _record(name, SOUND_FILES[name], fetch_ms)
 
-def warmup_sounds():
-    """Decode/cache inside the user gesture window."""
-    # Warm up all 5 sounds for better performance
-    for s in (jump_sound, crash_sound, fall_sound, new_point_sound, swoosh_sound):
-        if not s: continue
+def _load_music(fetch_ms=0.0):
+    _status["music"] = LOADING
+    start = time.perf_counter()
+    try:
+        pygame.mixer.music.load(str(SOUNDS / MUSIC_FILE))
+        pygame.mixer.music.set_volume(0.02)
+        _status["music"] = READY
+    except Exception as e:
+        _status["music"] = FAILED
+        print("bgm load failed:", e)
+    _load_ms["music"] = (time.perf_counter() - start) * 1000.0
+    _record("music", MUSIC_FILE, fetch_ms)
+    _maybe_start_music()
+
+def _maybe_start_music():
+    """Music starts once it's loaded and the mixer is unlocked, whichever comes last."""
+    global _music_playing
+    with _music_lock:
+        if _music_playing or not _unlocked or _status["music"] != READY:
+            return
         try:
-            vol = s.get_volume()
-            s.set_volume(0.0)
-            ch = pygame.mixer.find_channel(True)
-            if ch:  # Only play if we got a valid channel
-                ch.play(s)
-                ch.stop()
-            s.set_volume(vol)
+            pygame.mixer.music.play(-1)
+            _music_playing = True
         except Exception as e:
-            print(f"Warning: Could not warm up sound: {e}")
+            print("bgm play failed:", e)
 
-def load_background_music():
-    global _music_loaded
-    if _music_loaded: return
+def _report():
+    """Readiness summary; the per-sound lines go with the LoadTimes breakdown."""
+    ready = sum(1 for s in status().values() if s == READY)
+    print(f"Sounds ready: {ready}/{len(_status)} in {sum(_load_ms.values()):.1f} ms decode")
+    if _times is not None and _times.reported:
+        # the breakdown went out before we finished (web: loading waits for a gesture)
+        print(_times.report("sound"))
+
+def _load_all():
+    for name in SOUND_FILES:
+        _load_one(name)
+    _load_music()
+    _report()
+
+async def _fetch(name):
+    """Fetch one file (a no-op if the asset streamer already did); returns the ms spent."""
+    import web_assets
+    start = time.perf_counter()
     try:
-        pygame.mixer.music.load(str(SOUNDS / "flappy_background_song.ogg"))
-        pygame.mixer.music.set_volume(0.02)
-        pygame.mixer.music.play(-1)
-        _music_loaded = True
+        await web_assets.fetch(sound_file(name))
     except Exception as e:
-        print("bgm load failed:", e)
+        print(f"Fetching {name} failed: {e}")  # _load_one/_load_music report it as FAILED
+    return (time.perf_counter() - start) * 1000.0
+
+async def _load_all_async():
+    for name in SOUND_FILES:
+        fetch_ms = await _fetch(SOUND_FILES[name])
+        _load_one(name, fetch_ms)
+        await asyncio.sleep(0)  # one decode per frame
+    fetch_ms = await _fetch(MUSIC_FILE)
+    _load_music(fetch_ms)
+    _report()
+
+def start_loading(times=None):
+    """
+    Begin decoding in the background (idempotent). Desktop: worker thread, needs
+    the mixer initialized first. Web: asyncio task on the running loop. Each
+    sound's fetch/decode time and status go into `times` (web_assets.LoadTimes).
+    """
+    global _loader_started, _times
+    if _loader_started or not pygame.mixer.get_init():
+        return False
+    _loader_started = True
+    _times = times
+    if IS_WEB:
+        asyncio.get_event_loop().create_task(_load_all_async())
+    else:
+        threading.Thread(target=_load_all, name="sfx-loader", daemon=True).start()
+    return True
+
+def load_sounds():
+    """Blocking load of every effect (tools/tests); the game uses start_loading()."""
+    for name in SOUND_FILES:
+        _load_one(name)
+
+def _warmup(s):
+    try:
+        vol = s.get_volume()
+        s.set_volume(0.0)
+        ch = pygame.mixer.find_channel(True)
+        if ch:  # Only play if we got a valid channel
+            ch.play(s)
+            ch.stop()
+        s.set_volume(vol)
+    except Exception as e:
+        print(f"Warning: Could not warm up sound: {e}")
+
+def warmup_sounds():
+    """Prime the web audio graph with a silent play of each loaded sound."""
+    for s in list(_sounds.values()):
+        _warmup(s)
+
+def load_background_music():
+    if _status["music"] == PENDING:
+        _load_music()
+
+def _play(name):
+    s = _sounds.get(name)
+    if s is None:
+        return
+    if _voices is not None:
+        _voices.play(name, s)
+    else:
+        s.play()
+
+def voice_stats():
+    """VoiceManager counters (played/coalesced/stolen/dropped per category, channel use)."""
+    return _voices.report() if _voices is not None else {}
+
+def voice_summary():
+    """voice_stats() as one console line ("" before the mixer is up)."""
+    return _voices.summary() if _voices is not None else ""
 
 def play_jump():
-    if jump_sound:
-        jump_sound.play()
+    _play("jump")
 
 def play_crash():
-    if crash_sound:
-        crash_sound.play()
+    _play("crash")
 
 def play_fall():
-    if fall_sound:
-        fall_sound.play()
+    _play("fall")
 
 def play_score_sound():
-    if new_point_sound:
-        new_point_sound.play()
+    _play("point")
 
 def play_swoosh():
-    if swoosh_sound:
-        swoosh_sound.play()
\ No newline at end of file
+    _play("swoosh")
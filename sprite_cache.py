@@ -0,0 +1,83 @@
+import pygame
+
+# Rotating the bird with rotozoom every frame allocates a fresh smoothed
+# surface 60 times a second. Pitch only spans a fixed range and there are
+# three flap frames, so render each (frame, quantized angle) once and reuse it.
+# The same goes for collision masks of the rotated frames (collision.py bakes
+# its pixel-accurate shapes from these).
+
+DEFAULT_STEP_DEG = 2.0
+
+
+class RotationCache:
+    def __init__(self, frames, min_deg, max_deg, step_deg=DEFAULT_STEP_DEG, prebuild=False):
+        """
+        frames: the source surfaces (Bird.frames order). Angles are clamped to
+        [min_deg, max_deg] and snapped to step_deg. With prebuild=False entries
+        are rendered the first time they're asked for.
+        """
+        self.frames = list(frames)
+        self.min_deg = min_deg
+        self.max_deg = max_deg
+        self.step_deg = step_deg
+        self.steps = int(round((max_deg - min_deg) / step_deg)) + 1
+        # _table[frame][angle_index] -> (surface, (dx, dy)) or None
+        self._table = [[None] * self.steps for _ in self.frames]
+        self._masks = [[None] * self.steps for _ in self.frames]
+        if prebuild:
+            self.build_all()
+
+    def angle_index(self, angle):
+        if angle <= self.min_deg:
+            return 0
+        if angle >= self.max_deg:
+            return self.steps - 1
+        return int((angle - self.min_deg) / self.step_deg + 0.5)
+
+    def _render(self, frame_index, idx):
+        angle = self.min_deg + idx * self.step_deg
+        surf = pygame.transform.rotozoom(self.frames[frame_index], angle, 1.0)
+        w, h = surf.get_size()
+        # same placement as surf.get_rect(center=...)
+        entry = (surf, (-(w // 2), -(h // 2)))
+        self._table[frame_index][idx] = entry
+        return entry
+
+    def get(self, frame_index, angle):
+        """
+        Rotated surface for a frame at (roughly) angle degrees, plus the offset
+        from the sprite center to its top-left: blit at (cx + dx, cy + dy).
+        """
+        idx = self.angle_index(angle)
+        entry = self._table[frame_index][idx]
+        if entry is None:
+            entry = self._render(frame_index, idx)
+        return entry
+
+    def mask(self, frame_index, angle):
+        """pygame.mask of the rotated surface get() returns (same placement)."""
+        idx = self.angle_index(angle)
+        mask = self._masks[frame_index][idx]
+        if mask is None:
+            surf = self.get(frame_index, angle)[0]
+            mask = self._masks[frame_index][idx] = pygame.mask.from_surface(surf)
+        return mask
+
+    def build_all(self):
+        for f in range(len(self.frames)):
+            for idx in range(self.steps):
+                if self._table[f][idx] is None:
+                    self._render(f, idx)
+
+    def cached_count(self):
+        return sum(1 for row in self._table for entry in row if entry is not None)
+
+    def memory_bytes(self):
+        """Approximate pixel memory held by the cached surfaces."""
+        total = 0
+        for row in self._table:
+            for entry in row:
+                if entry is not None:
+                    surf = entry[0]
+                    total += surf.get_pitch() * surf.get_height()
+        return total
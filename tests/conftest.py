@@ -0,0 +1,20 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+# headless: no window or audio device needed
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+
+@pytest.fixture(scope="session")
+def window():
+    """A game-sized display surface (convert() and the renderers need one)."""
+    pygame = pytest.importorskip("pygame")
+    from simulation import GAME_WIDTH, GAME_HEIGHT
+    pygame.init()
+    yield pygame.display.set_mode((GAME_WIDTH, GAME_HEIGHT))
+    pygame.quit()
@@ -0,0 +1,106 @@
+"""Clip capture: the GIF encoder round trip, the frame ring and export off the main thread."""
+import random
+import threading
+import time
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+import capture  # noqa: E402
+from capture import FrameCapture  # noqa: E402
+from gif_writer import PALETTE_332, write_gif  # noqa: E402
+
+
+def rgb(indices):
+    """What a decoder should show for palette-index bytes."""
+    return bytes(c for i in indices for c in PALETTE_332[i])
+
+
+def decode(path):
+    return [(pygame.image.tobytes(frame, "RGB"), delay) for frame, delay in pygame.image.load_animation(str(path))]
+
+
+def test_gif_round_trip(window, tmp_path):
+    size = (96, 96)
+    rng = random.Random(15)
+    frames = [
+        # noise: every pixel pair is new, so the code table fills (and is
+        # cleared) a couple of times, widening from 9 to 12 bits each time
+        bytes(rng.randrange(256) for _ in range(96 * 96)),
+        # one long run: codes widen without the table ever filling
+        bytes(96 * 96),
+        bytes((x * 7 + y) & 0xFF for y in range(96) for x in range(96)),
+    ]
+    path = tmp_path / "clip.gif"
+    write_gif(path, size, frames, [0, 33, 66])
+
+    decoded = decode(path)
+    assert len(decoded) == len(frames)
+    for (pixels, delay), frame in zip(decoded, frames):
+        assert pixels == rgb(frame)
+    assert [delay for _, delay in decoded] == [30, 40, 40]
+
+
+def fill(source, k):
+    source.fill(PALETTE_332[k])  # palette colors survive the 8-bit mapping exactly
+
+
+def test_ring_wraps_oldest_first(window):
+    source = pygame.Surface((20, 10))
+    cap = FrameCapture(source, seconds=1, fps=4, scale=1)
+    for k in range(6):
+        fill(source, 40 + k)
+        cap.capture(k * 250)
+    frames, times = cap.clip()
+    assert times == [500, 750, 1000, 1250]
+    assert [f.get_at((0, 0))[:3] for f in frames] == [PALETTE_332[40 + k] for k in range(2, 6)]
+    assert cap.clip(seconds=0.5)[1] == [1000, 1250]
+
+    # calls between grid points are skipped
+    cap.capture(1300)
+    cap.capture(1500)
+    assert cap.clip()[1] == [750, 1000, 1250, 1500]
+
+
+def test_export_does_not_stall_capture(window, tmp_path, monkeypatch):
+    release = threading.Event()
+    written = []
+
+    def slow_writer(path, frames, times):
+        release.wait(5)
+        written.append(list(times))
+
+    monkeypatch.setattr(capture, "write_gif_process", slow_writer)
+    source = pygame.Surface((20, 10))
+    cap = FrameCapture(source, seconds=1, fps=4, scale=1)
+    cap.capture(0)
+    cap.capture(250)
+
+    start = time.perf_counter()
+    assert cap.export(tmp_path / "clip.gif") is not None
+    assert time.perf_counter() - start < 0.5
+    assert cap.busy and cap.export(tmp_path / "again.gif") is None
+
+    # the ring is frozen for the writer: captures return without touching it
+    for now in range(500, 2000, 250):
+        cap.capture(now)
+    assert cap.clip()[1] == [0, 250]
+
+    release.set()
+    cap.join()
+    assert written == [[0, 250]] and not cap.busy
+    cap.capture(2001)  # resumes at once, not on the old grid
+    assert cap.clip()[1] == [0, 250, 2001]
+
+
+def test_export_writes_a_gif(window, tmp_path):
+    source = pygame.Surface((40, 20))
+    cap = FrameCapture(source, seconds=1, fps=4)
+    for k in range(3):
+        fill(source, 200 + k)
+        cap.capture(k * 250)
+    path = tmp_path / "clip.gif"
+    cap.export(path)
+    cap.join()
+    decoded = decode(path)
+    assert [pixels for pixels, _ in decoded] == [rgb([200 + k] * 20 * 10) for k in range(3)]
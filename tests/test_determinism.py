@@ -0,0 +1,125 @@
+"""
+Determinism and parity guards for the simulation rules.
+
+- a golden hash over 300 scripted classic runs (bird y every tick, score and
+  length of every run): any change to the rules or the RNG streams shows up
+- the recorded runs in tests/replays still replay to their recorded ticks and score
+- BatchSimulation matches Simulation lane for lane, tick for tick (every
+  profile, rect and precise collisions)
+
+After an intentional rule change, re-record with
+    python tests/test_determinism.py
+and update GOLDEN_HASH from its output.
+"""
+import hashlib
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from simulation import Simulation, BIRD_HEIGHT, BIRD_X, GROUND_Y, PIPE_WIDTH  # noqa: E402
+from replay import Recorder, Replay, verify  # noqa: E402
+
+GOLDEN_HASH = "796eab432e7216195cce8490d93511467188dae7"
+REPLAY_DIR = Path(__file__).with_name("replays")
+# (profile, precise, seed) of each recorded run (seeds picked for long runs)
+RECORDED = [("classic", False, 14), ("easy", False, 5), ("chaos", False, 9), ("classic", True, 14), ("chaos", True, 9)]
+
+
+def autopilot(sim, rng, slack=30, skill=0.97):
+    """Flap when sinking below the next gap, missing now and then so runs end."""
+    target = GROUND_Y - 120
+    for pair in sim.pipes:
+        if pair.x + PIPE_WIDTH >= BIRD_X:
+            target = pair.bottom_y - slack
+            break
+    return sim.bird_y + BIRD_HEIGHT > target and sim.velocity_y > -2 and rng.random() < skill
+
+
+def golden_hash():
+    h = hashlib.sha1()
+    rng = random.Random(5)
+    sim = Simulation(seed=123)
+    for run in range(300):
+        sim.reset()
+        sim.score = run % 60  # start some runs inside the vertical-motion windows
+        while not sim.game_over and sim.ticks < 20000:
+            sim.step(autopilot(sim, rng))
+            h.update(bytes([sim.bird_y & 255]))
+        h.update(f"{sim.score},{sim.ticks};".encode())
+    return h.hexdigest()
+
+
+def test_golden_hash():
+    assert golden_hash() == GOLDEN_HASH
+
+
+def replay_path(profile, precise):
+    return REPLAY_DIR / f"{profile}{'-precise' if precise else ''}.fbr"
+
+
+@pytest.mark.parametrize("profile,precise,seed", RECORDED)
+def test_recorded_replays(profile, precise, seed):
+    replay = Replay.load(replay_path(profile, precise))
+    assert (replay.profile, replay.precise, replay.seed) == (profile, precise, seed)
+    assert replay.score > 0
+    assert verify(replay)
+
+
+def _pipes_scalar(sim):
+    return [(p.id, p.x, p.top_y, p.bottom_y, p.vy) for p in sim.pipes]
+
+
+def _pipes_batch(batch, i):
+    return sorted((batch.pipe_id[i, k], batch.pipe_x[i, k], batch.pipe_top_y[i, k], batch.pipe_bottom_y[i, k],
+                   batch.pipe_vy[i, k]) for k in range(batch.slots) if batch.pipe_alive[i, k])
+
+
+@pytest.mark.parametrize("precise", [False, True])
+def test_batch_matches_scalar(precise):
+    np = pytest.importorskip("numpy")
+    from batch_sim import BatchSimulation
+
+    n = 90
+    seeds = list(range(1000, 1000 + n))
+    profiles = [("classic", "easy", "chaos")[i % 3] for i in range(n)]
+    sims = [Simulation(seed=s, profile=p, precise=precise) for s, p in zip(seeds, profiles)]
+    batch = BatchSimulation(n, seeds=seeds, profiles=profiles, precise=precise)
+    for i, sim in enumerate(sims):
+        sim.score = batch.score[i] = (i * 7) % 45
+    rng = random.Random(5)
+    ticks = 0
+    while not all(sim.game_over for sim in sims) and ticks < 20000:
+        ticks += 1
+        actions = np.array([autopilot(sim, rng, slack=25, skill=0.995) for sim in sims])
+        events = [sim.step(a) for sim, a in zip(sims, actions)]
+        batch_events = batch.step(actions)
+        for i, sim in enumerate(sims):
+            expected = (sim.bird_y, sim.velocity_y, sim.score, sim.game_over, events[i], _pipes_scalar(sim))
+            got = (batch.bird_y[i], batch.velocity_y[i], batch.score[i], batch.game_over[i], batch_events[i],
+                   _pipes_batch(batch, i))
+            assert got == expected, f"lane {i} ({profiles[i]}) diverged at tick {ticks}"
+    assert max(sim.score for sim in sims) > 45  # got well into the vertical windows
+
+
+def record():
+    """Re-record tests/replays (after an intentional rule change)."""
+    REPLAY_DIR.mkdir(exist_ok=True)
+    for profile, precise, seed in RECORDED:
+        sim = Simulation(seed=seed, profile=profile, precise=precise)
+        recorder = Recorder(sim.seed)
+        rng = random.Random(seed)
+        while not sim.game_over and sim.ticks < 20000:
+            flap = autopilot(sim, rng, slack=25, skill=0.999)
+            if flap:
+                recorder.flap(sim.ticks + 1)
+            sim.step(flap)
+        recorder.finish(sim).save(replay_path(profile, precise))
+        print(f"{replay_path(profile, precise).name}: score {sim.score} in {sim.ticks} ticks")
+    print("golden hash", golden_hash())
+
+
+if __name__ == "__main__":
+    record()
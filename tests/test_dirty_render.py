@@ -0,0 +1,152 @@
+"""DirtyRenderer: which rects it pushes, that they composite like a full redraw, and its fallbacks."""
+import random
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+from dirty_render import DirtyRenderer  # noqa: E402
+
+
+def noise(size, seed):
+    """A background where any missed restore shows up in a pixel compare."""
+    rng = random.Random(seed)
+    surf = pygame.Surface(size)
+    for y in range(0, size[1], 8):
+        for x in range(0, size[0], 8):
+            surf.fill((rng.randrange(256), rng.randrange(256), rng.randrange(256)), (x, y, 8, 8))
+    return surf
+
+
+def sprite(size, color):
+    surf = pygame.Surface(size, pygame.SRCALPHA)
+    pygame.draw.circle(surf, color, (size[0] // 2, size[1] // 2), min(size) // 2)
+    return surf
+
+
+@pytest.fixture
+def scene(window):
+    window.fill((0, 0, 0))
+    return DirtyRenderer(window), noise(window.get_size(), 6)
+
+
+def frame(renderer, background, blits):
+    renderer.begin(background)
+    for surf, dest, *changed in blits:
+        renderer.blit(surf, dest, changed=bool(changed))
+    renderer.present()
+    return renderer.last_update_area
+
+
+def full_redraw(renderer, background, blits):
+    """What the target should hold: the whole frame composited from scratch."""
+    expected = background.copy()
+    for surf, dest, *_ in blits:
+        expected.blit(surf, dest)
+    assert pygame.image.tobytes(renderer.target, "RGB") == pygame.image.tobytes(expected, "RGB")
+
+
+def test_first_frame_is_full_then_nothing_to_push(scene):
+    renderer, bg = scene
+    bird = sprite((34, 24), (250, 200, 0))
+    screen = renderer.target.get_width() * renderer.target.get_height()
+    assert frame(renderer, bg, [(bird, (60, 300))]) == screen
+    assert frame(renderer, bg, [(bird, (60, 300))]) == 0
+    full_redraw(renderer, bg, [(bird, (60, 300))])
+
+
+def test_overlapping_old_and_new_rects_merge(scene):
+    renderer, bg = scene
+    bird = sprite((34, 24), (250, 200, 0))
+    frame(renderer, bg, [(bird, (60, 300))])
+    # moved 5 px down: old and new rect overlap, so one 34x29 rect
+    assert frame(renderer, bg, [(bird, (60, 305))]) == 34 * 29
+    full_redraw(renderer, bg, [(bird, (60, 305))])
+
+
+def test_separate_changes_stay_separate_rects(scene):
+    renderer, bg = scene
+    bird, pipe = sprite((34, 24), (250, 200, 0)), sprite((52, 80), (40, 200, 40))
+    frame(renderer, bg, [(bird, (60, 300)), (pipe, (250, 100))])
+    blits = [(bird, (60, 300)), (pipe, (246, 100))]
+    # the bird stays put; the pipe's old and new rects merge into 56x80
+    assert frame(renderer, bg, blits) == 56 * 80
+    full_redraw(renderer, bg, blits)
+
+    blits = [(bird, (60, 302)), (pipe, (242, 100))]
+    assert frame(renderer, bg, blits) == 34 * 26 + 56 * 80
+    full_redraw(renderer, bg, blits)
+
+
+def test_chained_overlaps_merge_and_sprites_under_them_recomposite(scene):
+    renderer, bg = scene
+    a, b, c = (sprite((40, 40), color) for color in ((255, 0, 0), (0, 255, 0), (0, 0, 255)))
+    frame(renderer, bg, [(a, (10, 10)), (b, (45, 10)), (c, (80, 10))])
+    # a and c move; b sits between them untouched but must be redrawn where they overlap it
+    blits = [(a, (12, 10)), (b, (45, 10)), (c, (78, 10))]
+    assert frame(renderer, bg, blits) == 42 * 40 + 42 * 40
+    full_redraw(renderer, bg, blits)
+
+    # everything moves and a, b, c overlap in a chain: one union, x 12..118, y 10..52
+    blits = [(a, (14, 10)), (b, (45, 12)), (c, (76, 10))]
+    assert frame(renderer, bg, blits) == (118 - 12) * 42
+    full_redraw(renderer, bg, blits)
+
+
+def test_changed_and_removed_sprites_are_repainted(scene):
+    renderer, bg = scene
+    label = sprite((60, 20), (255, 255, 255))
+    bird = sprite((34, 24), (250, 200, 0))
+    frame(renderer, bg, [(label, (100, 50)), (bird, (60, 300))])
+
+    label.fill((200, 0, 0))  # redrawn in place: same surface, same spot
+    assert frame(renderer, bg, [(label, (100, 50), True), (bird, (60, 300))]) == 60 * 20
+    full_redraw(renderer, bg, [(label, (100, 50)), (bird, (60, 300))])
+
+    # the bird is gone: the background comes back under it (and the label,
+    # no longer flagged changed, has a new key once more)
+    assert frame(renderer, bg, [(label, (100, 50))]) == 34 * 24 + 60 * 20
+    full_redraw(renderer, bg, [(label, (100, 50))])
+    assert frame(renderer, bg, [(label, (100, 50))]) == 0
+    full_redraw(renderer, bg, [(label, (100, 50))])
+
+
+def test_rects_are_clipped_to_the_screen(scene):
+    renderer, bg = scene
+    pipe = sprite((52, 80), (40, 200, 40))
+    frame(renderer, bg, [(pipe, (-30, 100))])
+    assert frame(renderer, bg, [(pipe, (-34, 100))]) == 22 * 80
+    assert frame(renderer, bg, [(pipe, (-60, 100))]) == 18 * 80
+    assert frame(renderer, bg, []) == 0
+    full_redraw(renderer, bg, [])
+
+
+def test_full_redraw_fallbacks(scene):
+    renderer, bg = scene
+    bird = sprite((34, 24), (250, 200, 0))
+    screen = renderer.target.get_width() * renderer.target.get_height()
+    frame(renderer, bg, [(bird, (60, 300))])
+
+    # a different background surface
+    night = noise(renderer.target.get_size(), 7)
+    assert frame(renderer, night, [(bird, (60, 300))]) == screen
+    full_redraw(renderer, night, [(bird, (60, 300))])
+    assert frame(renderer, night, [(bird, (60, 300))]) == 0
+
+    # no background: the caller painted the target itself (a crossfade)
+    renderer.target.blit(bg, (0, 0))
+    assert frame(renderer, None, [(bird, (60, 300))]) == screen
+    full_redraw(renderer, bg, [(bird, (60, 300))])
+    renderer.target.blit(night, (0, 0))
+    assert frame(renderer, None, [(bird, (60, 300))]) == screen
+    # back to a restorable background: full once, then dirty rects again
+    assert frame(renderer, bg, [(bird, (60, 300))]) == screen
+    assert frame(renderer, bg, [(bird, (60, 302))]) == 34 * 26
+
+    renderer.invalidate()
+    assert frame(renderer, bg, [(bird, (60, 302))]) == screen
+    assert frame(renderer, bg, [(bird, (60, 302))]) == 0
+
+    renderer.enabled = False
+    assert frame(renderer, bg, [(bird, (60, 302))]) == screen
+    assert frame(renderer, bg, [(bird, (60, 304))]) == screen
+    full_redraw(renderer, bg, [(bird, (60, 304))])
@@ -0,0 +1,89 @@
+"""PipePool: the ring wraps without allocating, and grows only when spawns outpace the purge."""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from difficulty import profile_names  # noqa: E402
+from simulation import GROUND_Y, PIPE_HEIGHT, PipePool, Simulation  # noqa: E402
+
+
+def spawn(pool, n, start=0):
+    for pair_id in range(start, start + n):
+        pool.acquire().reset(pair_id, 0, 0, 0, 0)
+
+
+def ids(pool):
+    return [pair.id for pair in pool]
+
+
+def test_ring_wraps_in_place():
+    pool = PipePool(4)
+    records = {id(pair) for pair in pool._ring}
+    spawn(pool, 3)
+    for k in range(3, 40):
+        pool.release_front()
+        spawn(pool, 1, k)
+        assert ids(pool) == [k - 2, k - 1, k]
+    assert pool.capacity() == 4
+    assert {id(pair) for pair in pool._ring} == records
+    assert pool[0].id == 37 and pool[-1].id == 39
+    with pytest.raises(IndexError):
+        pool[3]
+
+
+def test_grows_oldest_first_when_full():
+    pool = PipePool(4)
+    spawn(pool, 4)
+    pool.release_front()
+    pool.release_front()
+    spawn(pool, 2, 4)              # wrapped: head is mid-ring
+    old = [id(pair) for pair in pool]
+    spawn(pool, 3, 6)              # the 5th live pair doubles the ring
+    assert pool.capacity() == 8
+    assert ids(pool) == [2, 3, 4, 5, 6, 7, 8]
+    assert [id(pair) for pair in pool][:4] == old
+    pool.clear()
+    assert len(pool) == 0 and pool.capacity() == 8
+
+
+def keep_alive(sim):
+    """Flap low, and open every gap to the whole screen so nothing is hit."""
+    for pair in sim.pipes:
+        pair.top_y, pair.bottom_y, pair.gap = -PIPE_HEIGHT, GROUND_Y, GROUND_Y
+    return sim.bird_y > 300
+
+
+def test_manual_spawns_outpacing_the_purge_grow_the_pool():
+    sim = Simulation(seed=3, spawn_interval=None)
+    assert sim.pipes.capacity() == 8
+    for _ in range(20):
+        sim.spawn_pipe()
+        sim.step(keep_alive(sim))
+    assert sim.pipes.capacity() == 32
+    records = {id(pair) for pair in sim.pipes._ring}
+
+    # back to a normal pace: the purge keeps up, so no more growth
+    for tick in range(1500):
+        if tick % 60 == 0:
+            sim.spawn_pipe()
+        sim.step(keep_alive(sim))
+    assert not sim.game_over
+    assert len(sim.pipes) < sim.pairs_spawned - 20
+    assert ids(sim.pipes) == list(range(sim.pairs_spawned - len(sim.pipes), sim.pairs_spawned))
+    xs = [pair.x for pair in sim.pipes]
+    assert xs == sorted(xs)
+    assert sim.pipes.capacity() == 32
+    assert {id(pair) for pair in sim.pipes._ring} == records
+
+
+@pytest.mark.parametrize("profile", profile_names())
+def test_scheduled_spawns_never_grow_the_pool(profile):
+    sim = Simulation(seed=7, profile=profile)
+    capacity = sim.pipes.capacity()
+    for _ in range(3000):
+        sim.step(keep_alive(sim))
+    assert not sim.game_over
+    assert sim.pairs_spawned > capacity
+    assert sim.pipes.capacity() == capacity
@@ -0,0 +1,130 @@
+"""Score stores: queries, the web store's size cap, retries and closing with a write in flight."""
+import asyncio
+import json
+import sqlite3
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+import scores
+from scores import MemoryStore, SqliteStore, MAX_WEB_RUNS, WEB_TOP_KEPT
+
+
+def run(score, ticks=600, profile="classic", ended_at=None, seed=1):
+    return {"ended_at": time.time() if ended_at is None else ended_at, "seed": seed, "profile": profile,
+            "score": score, "ticks": ticks, "flaps": score, "cause": scores.CAUSE_PIPE, "replay": None}
+
+
+RUNS = [run(5, 300), run(12, 900), run(12, 700), run(0, 60), run(30, 2000, "easy"), run(3, 200, "easy")]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    s = MemoryStore() if request.param == "memory" else SqliteStore(tmp_path / "scores.db")
+    for r in RUNS:
+        s.add_run(r)
+    s.flush()
+    yield s
+    s.close()
+
+
+def test_top(store):
+    assert [(r["score"], r["ticks"]) for r in store.top(3)] == [(30, 2000), (12, 700), (12, 900)]
+    assert [r["score"] for r in store.top(10, "easy")] == [30, 3]
+    assert store.top(2, "classic")[0]["ticks"] == 700  # tie: shorter run first
+    assert store.top(5, "chaos") == []
+
+
+def test_rank_and_count(store):
+    assert store.count() == 6 and store.count("classic") == 4 and store.count("chaos") == 0
+    assert store.rank(12, "classic") == 2 / 4
+    assert store.rank(31) == 1.0
+    assert store.rank(0) == 0.0
+    assert store.rank(5, "chaos") == 0.0
+    assert store.best("classic") == 12 and store.best("easy") == 30
+
+
+class FakeStorage:
+    def __init__(self):
+        self.items = {}
+
+    def getItem(self, key):
+        return self.items.get(key)
+
+    def setItem(self, key, value):
+        self.items[key] = value
+
+
+def test_browser_store_caps_runs_and_keeps_the_best(monkeypatch):
+    storage = FakeStorage()
+    monkeypatch.setitem(sys.modules, "platform", types.SimpleNamespace(window=types.SimpleNamespace(localStorage=storage)))
+    store = scores.BrowserStore()
+    # the best runs come first, then a long tail of low scores
+    best = [run(100 + i, ended_at=i) for i in range(WEB_TOP_KEPT)]
+    tail = [run(i % 7, ended_at=1000 + i) for i in range(2 * MAX_WEB_RUNS)]
+    for r in best + tail:
+        store.add_run(r)
+    store.flush()
+
+    saved = json.loads(storage.items[scores.STORAGE_KEY])
+    assert len(saved) == MAX_WEB_RUNS
+    assert sorted(r["score"] for r in saved)[-WEB_TOP_KEPT:] == [r["score"] for r in best]
+    # the rest are the most recent runs, oldest first
+    assert [r["ended_at"] for r in saved[WEB_TOP_KEPT:]] == [r["ended_at"] for r in tail[-(MAX_WEB_RUNS - WEB_TOP_KEPT):]]
+    assert store.count() == MAX_WEB_RUNS and store.rank(100) == (MAX_WEB_RUNS - WEB_TOP_KEPT) / MAX_WEB_RUNS
+
+    reloaded = scores.BrowserStore()
+    assert reloaded.count() == MAX_WEB_RUNS and reloaded.best("classic") == 100 + WEB_TOP_KEPT - 1
+
+
+class FlakyStore(MemoryStore):
+    """Fails its first write."""
+
+    def __init__(self):
+        super().__init__()
+        self.failures = 1
+
+    def _write(self, batch):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super()._write(batch)
+
+
+def test_failed_flush_is_retried(capsys):
+    store = FlakyStore()
+    store.add_run(run(7))
+    asyncio.run(store.flush_async())
+    assert "Saving scores failed" in capsys.readouterr().out
+    assert store.count() == 0
+    store.add_run(run(9))
+    asyncio.run(store.flush_async())
+    assert store.count() == 2  # the failed batch went out with the next one
+    assert [r["score"] for r in store.top()] == [9, 7]
+
+
+class SlowSqliteStore(SqliteStore):
+    def _write(self, batch):
+        if threading.current_thread() is not threading.main_thread():
+            time.sleep(0.2)  # the background write is still going when the game quits
+        super()._write(batch)
+
+
+def test_close_waits_for_the_write_in_flight(tmp_path):
+    path = tmp_path / "scores.db"
+    store = SlowSqliteStore(path)
+
+    async def quit_mid_flush():
+        store.add_run(run(4))
+        flush = asyncio.ensure_future(store.flush_async())
+        await asyncio.sleep(0)  # the batch is now the writer's
+        store.add_run(run(6))  # and one more still pending
+        store.close()
+        await flush
+
+    asyncio.run(quit_mid_flush())
+    with sqlite3.connect(str(path)) as db:
+        assert sorted(s for (s,) in db.execute("SELECT score FROM runs")) == [4, 6]
@@ -0,0 +1,76 @@
+"""HUD text: GlyphAtlas draws what font.render would, TextCache stays LRU-bounded."""
+from pathlib import Path
+
+import pytest
+
+pygame = pytest.importorskip("pygame")
+from text_cache import GlyphAtlas, TextCache  # noqa: E402
+
+FONT = Path(__file__).resolve().parents[1] / "assets" / "PressStart2P.ttf"
+
+
+@pytest.fixture(scope="module")
+def font(window):
+    pygame.font.init()
+    return pygame.font.Font(str(FONT), 12)
+
+
+def composite(text_surface, size, pos=(3, 2)):
+    """`text_surface` over an opaque backdrop, as the HUD draws it."""
+    target = pygame.Surface(size)
+    target.fill((40, 90, 160))
+    target.blit(text_surface, pos)
+    return pygame.image.tobytes(target, "RGB")
+
+
+@pytest.mark.parametrize("antialias", [True, False])
+def test_atlas_matches_font_render(font, antialias):
+    atlas = GlyphAtlas(font, "0123456789. ", (255, 255, 255), antialias=antialias)
+    for text in ["0", "7", "2048", "16.7 0.25", "1234567890"]:
+        rendered = font.render(text, antialias, (255, 255, 255))
+        assert atlas.size(text) == rendered.get_size()
+        size = (rendered.get_width() + 6, rendered.get_height() + 4)
+        target = pygame.Surface(size)
+        target.fill((40, 90, 160))
+        atlas.draw(target, text, (3, 2))
+        assert pygame.image.tobytes(target, "RGB") == composite(rendered, size), text
+
+
+def test_atlas_draw_centered(font):
+    atlas = GlyphAtlas(font, "0123456789")
+    target = pygame.Surface((100, 40), pygame.SRCALPHA)
+    atlas.draw_centered(target, "42", (50, 20))
+    w, h = atlas.size("42")
+    drawn = target.get_bounding_rect()
+    assert drawn.width and pygame.Rect(50 - w // 2, 20 - h // 2, w, h).contains(drawn)
+    with pytest.raises(KeyError):
+        atlas.draw(target, "4x", (0, 0))
+
+
+def test_cache_hits_return_the_same_surface(font):
+    cache = TextCache()
+    first = cache.render(font, "GAME OVER")
+    assert cache.render(font, "GAME OVER") is first
+    # color and antialias are part of the key
+    assert cache.render(font, "GAME OVER", (255, 0, 0)) is not first
+    assert cache.render(font, "GAME OVER", antialias=False) is not first
+    assert composite(first, (140, 20)) == composite(font.render("GAME OVER", True, (255, 255, 255)), (140, 20))
+
+
+def test_cache_evicts_least_recently_used(font):
+    cache = TextCache(max_entries=3)
+    a = cache.render(font, "a")
+    cache.render(font, "b")
+    cache.render(font, "c")
+    assert cache.render(font, "a") is a   # a is now the newest
+    cache.render(font, "d")               # evicts b, the oldest
+    assert len(cache._entries) == 3
+    assert cache.render(font, "a") is a
+    assert [key[1] for key in cache._entries] == ["c", "d", "a"]
+    cache.render(font, "b")               # a miss: re-rendered, evicts c
+    assert [key[1] for key in cache._entries] == ["d", "a", "b"]
+    for k in range(50):
+        cache.render(font, str(k))
+    assert len(cache._entries) == 3
+    cache.clear()
+    assert not cache._entries
@@ -0,0 +1,97 @@
+"""ThemeLibrary memory: what a theme keeps resident, LRU eviction and pinning."""
+import weakref
+
+import pytest
+
+pytest.importorskip("pygame")
+import theme_changer  # noqa: E402
+from theme_changer import ThemeLibrary, ThemeState  # noqa: E402
+
+# four themes over the same art, under the names THEME_ORDER cycles through
+# first so ThemeLibrary.update()'s preloads resolve
+NAMES = list(theme_changer.THEME_ORDER) + ["dusk", "dawn"]
+
+
+@pytest.fixture
+def manifest():
+    files = theme_changer.MANIFEST["themes"][theme_changer.THEME_ORDER[0]]
+    return {"order": NAMES, "themes": {name: dict(files) for name in NAMES}}
+
+
+def test_theme_holds_no_atlas(window, manifest):
+    theme = ThemeLibrary(manifest, write_cache=False).get(NAMES[0])
+    surfaces = [theme.background, theme.base, theme.skyline_strip] + theme.pipes.surfaces()
+    assert all(s.get_parent() is None for s in surfaces)
+    assert theme.bytes == sum(s.get_pitch() * s.get_height() for s in surfaces)
+
+
+def test_atlas_is_freed(window, manifest, monkeypatch):
+    atlases = []
+    sprites = theme_changer.asset_atlas.SpriteAtlas.sprites
+
+    def tracked(atlas):
+        out = sprites(atlas)
+        atlases.append(weakref.ref(next(s for s in out.values() if s.get_parent() is not None).get_parent()))
+        return out
+
+    monkeypatch.setattr(theme_changer.asset_atlas.SpriteAtlas, "sprites", tracked)
+    ThemeLibrary(manifest, write_cache=False).get(NAMES[0])
+    assert atlases and atlases[0]() is None
+
+
+def test_lru_eviction_keeps_pinned_themes(window, manifest):
+    library = ThemeLibrary(manifest, write_cache=False)
+    one = library.get(NAMES[0]).bytes
+    library.budget_bytes = 2 * one + one // 2  # room for two themes
+
+    state = ThemeState(NAMES[0])
+    library.update(state, 0)  # pins the theme on screen
+    for name in NAMES[1:]:
+        library.get(name)
+        assert len(library.resident()) <= 2
+        assert library.resident_bytes() <= library.budget_bytes
+        assert NAMES[0] in library.resident()
+    # least recently used goes first: the two-theme window slid along the list
+    assert library.resident() == [NAMES[0], NAMES[3]]
+    assert library.evictions == 2
+
+    # mid-transition both ends are pinned, even if that's over budget
+    state.maybe_start(0, theme_changer.POINTS_PER_PHASE)
+    library.update(state, theme_changer.POINTS_PER_PHASE)
+    pinned = {state.transition_from, state.transition_to}
+    library.get(state.transition_to)
+    library.get(NAMES[2])
+    assert pinned <= set(library.resident())
+    assert NAMES[2] not in library.resident()  # the only unpinned theme goes
+
+
+def test_evicted_theme_reloads(window, manifest):
+    library = ThemeLibrary(manifest, budget_bytes=0, write_cache=False)
+    first = library.get(NAMES[0])
+    library.get(NAMES[1])  # nothing pinned and a zero budget: nothing stays
+    assert NAMES[0] not in library.resident()
+    again = library.get(NAMES[0])
+    assert again is not first and library.loads == 3
+
+
+def test_crossfade_memory_is_fixed_and_counted(window):
+    library = ThemeLibrary(write_cache=False)
+    day, night = (library.get(name) for name in theme_changer.THEME_ORDER[:2])
+    themes_only = library.resident_bytes()
+    fade = library.crossfade
+    screen = window.get_pitch() * window.get_height()
+    for _ in range(2):  # two transitions, every level of each
+        for step in range(21):
+            t = step / 20
+            fade.draw(window, day, night, t, world_x=-step * 7)
+            if 0 < int(t * fade.levels + 0.5) < fade.levels:
+                # sky above both skylines: the two backgrounds blended at the level
+                level = int(t * fade.levels + 0.5)
+                a, b = day.background.get_at((10, 10)), night.background.get_at((10, 10))
+                want = [x + (y - x) * (level * 255 // fade.levels) / 255 for x, y in zip(a[:3], b[:3])]
+                assert all(abs(g - w) <= 2 for g, w in zip(window.get_at((10, 10))[:3], want))
+        fade.release()
+    assert fade.memory_bytes() == 2 * screen  # one work surface + one private copy, whatever the levels
+    assert library.resident_bytes() == themes_only + fade.memory_bytes()
+    # the shared backgrounds never get an alpha (dirty-rect restores blit them)
+    assert day.background.get_alpha() is None and night.background.get_alpha() is None
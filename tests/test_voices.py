@@ -0,0 +1,112 @@
+"""VoiceManager against a fake mixer: per-category caps, stealing and coalescing."""
+import pytest
+
+pytest.importorskip("pygame")
+import voices  # noqa: E402
+from voices import VoiceManager  # noqa: E402
+
+
+class FakeChannel:
+    """Busy from play() until finish(); no audio device involved."""
+
+    def __init__(self, i):
+        self.i = i
+        self.busy = False
+        self.played = []
+
+    def play(self, sound):
+        self.busy = True
+        self.played.append(sound)
+
+    def stop(self):
+        self.busy = False
+
+    def finish(self):
+        self.busy = False
+
+    def get_busy(self):
+        return self.busy
+
+
+class FakeMixer:
+    def __init__(self):
+        self.reserved = None
+
+    def Channel(self, i):
+        return FakeChannel(i)
+
+    def set_reserved(self, n):
+        self.reserved = n
+
+
+@pytest.fixture
+def mixer(monkeypatch):
+    fake = FakeMixer()
+    monkeypatch.setattr(voices.pygame, "mixer", fake)
+    return fake
+
+
+def test_reserved_channels_follow_priority(mixer):
+    vm = VoiceManager(num_channels=8)
+    # impact 0-1, score 2, flap 3-4, ui 5, shared 6-7
+    assert mixer.reserved == 6
+    assert vm.play("crash", "c", now=0).i == 0
+    assert vm.play("point", "p", now=0).i == 2
+    assert vm.play("jump", "j", now=0).i == 3
+    assert vm.play("swoosh", "s", now=0).i == 5
+
+
+def test_flap_repeats_within_60ms_are_coalesced(mixer):
+    vm = VoiceManager(num_channels=8)
+    assert vm.play("jump", "j", now=0) is not None
+    assert vm.play("jump", "j", now=30) is None
+    assert vm.play("jump", "j", now=59) is None
+    assert vm.play("jump", "j", now=60) is not None
+    assert vm.stats["flap"]["coalesced"] == 2
+    assert vm.stats["flap"]["played"] == 2
+
+
+def test_capped_category_steals_its_own_oldest_voice(mixer):
+    vm = VoiceManager(num_channels=8)
+    vm.play("jump", "j1", now=0)
+    vm.play("jump", "j2", now=100)
+    # flap is at its cap of 2 even though shared channels are free
+    ch = vm.play("jump", "j3", now=200)
+    assert ch.i == 3 and ch.played == ["j1", "j3"]
+    assert vm.voices("flap") == 2
+    assert vm.stats["flap"]["stolen"] == 1
+    assert vm.voices() == 2
+
+
+def test_under_cap_category_overflows_into_shared(mixer):
+    vm = VoiceManager(num_channels=8)
+    vm.play("crash", "c", now=0)
+    vm.play("fall", "f", now=1)
+    assert vm.play("crash", "c", now=2).i == 6
+    assert vm.voices("impact") == 3
+    # a finished voice frees its channel without counting as a steal
+    vm.channels[0].finish()
+    assert vm.play("fall", "f", now=3).i == 0
+    assert vm.stats["impact"]["stolen"] == 0
+
+
+def test_steals_lower_priority_and_drops_when_nothing_is_lower(mixer):
+    categories = {"hi": (2, 0, 2), "lo": (1, 0, 2)}
+    rules = {"boom": ("hi", 0), "tick": ("lo", 0)}
+    vm = VoiceManager(num_channels=2, categories=categories, rules=rules)
+    vm.play("tick", "t", now=0)
+    vm.play("tick", "t", now=1)
+    assert vm.play("boom", "b", now=2).i == 0      # oldest lower-priority voice
+    assert vm.play("boom", "b", now=3).i == 1
+    assert vm.play("tick", "t", now=4) is None     # everything playing outranks it
+    assert vm.stats["hi"]["stolen"] == 2
+    assert vm.stats["lo"]["dropped"] == 1
+    assert vm.peak_voices == 2
+
+
+def test_summary_lists_nonzero_counters(mixer):
+    vm = VoiceManager(num_channels=8)
+    assert vm.summary() == "Voices: peak 0 of 8 channels; nothing played"
+    vm.play("jump", "j", now=0)
+    vm.play("jump", "j", now=10)
+    assert vm.summary() == "Voices: peak 1 of 8 channels; flap 1 played, 1 coalesced"
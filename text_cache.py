@@ -0,0 +1,65 @@
+from collections import OrderedDict
+import pygame
+
+# Font rendering goes through FreeType and is slow on the web build, yet the
+# HUD redraws the same few strings every frame. Digits get rasterized once into
+# an atlas; fixed strings are rendered once and memoized.
+
+
+class GlyphAtlas:
+    """All glyphs of `chars` rendered once into one surface, blitted by area."""
+
+    def __init__(self, font, chars="0123456789", color=(255, 255, 255), antialias=True):
+        # convert_alpha turns non-antialiased (colorkeyed) glyphs into per-pixel alpha
+        glyphs = [font.render(ch, antialias, color).convert_alpha() for ch in chars]
+        width = sum(g.get_width() for g in glyphs)
+        self.height = max(g.get_height() for g in glyphs)
+
+        self.surface = pygame.Surface((width, self.height), pygame.SRCALPHA)
+        self._areas = {}
+        x = 0
+        for ch, g in zip(chars, glyphs):
+            # MAX against the transparent atlas copies the glyph pixels as-is
+            self.surface.blit(g, (x, 0), special_flags=pygame.BLEND_RGBA_MAX)
+            self._areas[ch] = pygame.Rect(x, 0, g.get_width(), g.get_height())
+            x += g.get_width()
+        self.surface = self.surface.convert_alpha()
+
+    def size(self, text):
+        return sum(self._areas[ch].width for ch in text), self.height
+
+    def draw(self, target, text, topleft):
+        """Blit `text` glyph by glyph. Every char must be in the atlas."""
+        x, y = topleft
+        surface = self.surface
+        for ch in text:
+            area = self._areas[ch]
+            target.blit(surface, (x, y), area)
+            x += area.width
+
+    def draw_centered(self, target, text, center):
+        w, h = self.size(text)
+        self.draw(target, text, (center[0] - w // 2, center[1] - h // 2))
+
+
+class TextCache:
+    """Rendered text surfaces memoized by (font, text, color), LRU-bounded."""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def render(self, font, text, color=(255, 255, 255), antialias=True):
+        key = (font, text, color, antialias)
+        surf = self._entries.get(key)
+        if surf is not None:
+            self._entries.move_to_end(key)
+            return surf
+        surf = font.render(text, antialias, color)
+        self._entries[key] = surf
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._entries.clear()
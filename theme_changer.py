@@ -1,47 +1,359 @@
+import json
+from collections import OrderedDict
+from pathlib import Path
+import pygame
+import asset_atlas
+from parallax import ParallaxLayer, SKYLINE_PARALLAX, seamless_strip
+from simulation import GAME_WIDTH, GROUND_Y
+
+# Themes (background, pipe skins, base) are listed in themes.json and cycle in
+# its "order", one per score phase. Only the themes in use stay decoded: the
+# next one is loaded a few points before its phase starts and the least
+# recently used ones are dropped once the decoded surfaces exceed a budget.
+# A theme's optional "skyline" [top, bottom] rows of its background scroll as
+# a parallax layer (parallax.py); the rest of the background is static.
+
 # Theme transition variables
 TRANSITION_MS = 800
-POINTS_PER_PHASE = 25
-
-current_theme = "day"
-transitioning = False
-transition_from = "day"
-transition_to = "day"
-transition_start = 0
-def desired_theme_for_score(score: float, POINTS_PER_PHASE: int) -> str:
-    # Toggle every N points: 0–24 day, 25–49 night, 50–74 day, etc.
+POINTS_PER_PHASE = 25       # themes.json "points_per_phase" overrides this
+PRELOAD_POINTS = 3          # load the next phase's theme this many points early
+THEME_BUDGET_BYTES = 6 * 1024 * 1024  # resident theme surfaces (themes on screen always stay)
+
+MANIFEST_PATH = Path(__file__).with_name("themes.json")
+
+# used if themes.json is missing or broken
+_DEFAULT_MANIFEST = {
+    "order": ["day", "night"],
+    "themes": {
+        "day": {"background": "flappybird_bg_day.png", "top_pipe": "toppipe.png",
+                "bottom_pipe": "bottompipe.png", "base": "base.png", "skyline": [453, 576]},
+        "night": {"background": "flappybird_bg_night.png", "top_pipe": "toppipe.png",
+                  "bottom_pipe": "bottompipe.png", "base": "base.png", "skyline": [384, 483]},
+    },
+}
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+        for name in manifest["order"]:
+            asset_atlas.theme_sprites(manifest["themes"][name])  # every slot present
+        return manifest
+    except Exception as e:
+        print(f"Theme manifest unavailable ({e}); using day/night")
+        return _DEFAULT_MANIFEST
+
+
+MANIFEST = load_manifest()
+POINTS_PER_PHASE = MANIFEST.get("points_per_phase", POINTS_PER_PHASE)
+THEME_ORDER = MANIFEST["order"]
+
+
+def desired_theme_for_score(score: float, POINTS_PER_PHASE: int = POINTS_PER_PHASE) -> str:
+    # Next theme every N points: 0–24 day, 25–49 night, 50–74 day, etc.
     phase = int(score) // POINTS_PER_PHASE
-    theme = "night" if (phase % 2) else "day"
-    return theme
+    return THEME_ORDER[phase % len(THEME_ORDER)]
+
+
+class ThemeState:
+    """Which theme is on screen and any transition in progress (one shared instance: `state`)."""
+
+    def __init__(self, first=THEME_ORDER[0]):
+        self.first = first
+        self.reset()
+
+    def reset(self):
+        self.current_theme = self.first
+        self.transitioning = False
+        self.transition_from = self.first
+        self.transition_to = self.first
+        self.transition_start = 0
+
+    def maybe_start(self, now_ms, score):
+        target = desired_theme_for_score(score)
+        if target != self.current_theme and not self.transitioning:
+            self.transitioning = True
+            self.transition_from = self.current_theme
+            self.transition_to = target
+            self.transition_start = now_ms
+
+    def progress(self, now_ms):
+        """Crossfade position, 0.0 -> 1.0."""
+        t = (now_ms - self.transition_start) / TRANSITION_MS
+        return 0.0 if t < 0 else 1.0 if t > 1 else t
+
+    def finished(self, now_ms):
+        return self.transitioning and now_ms - self.transition_start >= TRANSITION_MS
+
+    def complete(self):
+        if self.transitioning:
+            self.current_theme = self.transition_to
+            self.transitioning = False
+
+
+state = ThemeState()
+
 
 def maybe_start_theme_transition(now_ms: int, score):
-    global current_theme, transitioning, transition_from, transition_to, transition_start
-    target = desired_theme_for_score(score, POINTS_PER_PHASE)
-    if target != current_theme and not transitioning:
-        transitioning = True
-        transition_from = current_theme
-        transition_to = target
-        transition_start = now_ms
+    state.maybe_start(now_ms, score)
 
 def complete_transition():
     """Complete the current transition and update the theme."""
-    global current_theme, transitioning, transition_to
-    if transitioning:
-        old_theme = current_theme
-        current_theme = transition_to
-        transitioning = False
+    state.complete()
 
 def reset_theme():
-    """Reset theme to initial state (day)."""
-    global current_theme, transitioning
-    current_theme = "day"
-    transitioning = False
+    """Reset theme to initial state (first theme in the order)."""
+    state.reset()
 
 def get_theme_state():
-    """Get current theme state for rendering."""
-    return {
-        'current_theme': current_theme,
-        'transitioning': transitioning,
-        'transition_from': transition_from,
-        'transition_to': transition_to,
-        'transition_start': transition_start
-    }
+    """Current theme state for rendering (the same ThemeState every call)."""
+    return state
+
+
+PIPE_STRIP_BODY = 288  # body rows baked under/over each cap (pipes up to cap + this long are one blit)
+
+
+class PipeSkin:
+    """
+    Pipes composited from a cap and a tiled body. Each pipe is one strip baked
+    at load time (the cap plus PIPE_STRIP_BODY rows of body tiled onto it) and
+    is drawn from its gap edge out to the edge of the play area (the top of
+    the screen, or the ground), whatever that length is: one blit of the
+    strip's visible rows, plus one more of its body for a pipe longer than the
+    strip. Nothing above y=0 or under the base is drawn.
+    """
+
+    def __init__(self, top_cap, bottom_cap, top_body, bottom_body, floor_y=GROUND_Y, body_rows=PIPE_STRIP_BODY):
+        self.width, self.cap_height = top_cap.get_size()
+        period = top_body.get_height()
+        self.body_length = -(-body_rows // period) * period  # whole repeats, so the strip continues itself
+        self.length = self.cap_height + self.body_length
+        self.floor_y = floor_y
+        # top: body then the cap at the gap end (bottom); bottom: cap first
+        self.top = self._strip(top_body, top_cap, 0, self.body_length)
+        self.bottom = self._strip(bottom_body, bottom_cap, self.cap_height, 0)
+
+    def _strip(self, body, cap, body_y, cap_y):
+        strip = pygame.Surface((self.width, self.length), pygame.SRCALPHA, cap)
+        strip.fill((0, 0, 0, 0))
+        body_x = (self.width - body.get_width()) // 2
+        for y in range(body_y, body_y + self.body_length, body.get_height()):
+            strip.blit(body, (body_x, y))
+        strip.blit(cap, (0, cap_y))
+        return strip
+
+    def draw(self, target, x, gap_top, gap_bottom):
+        """Both pipes of a pair at x. target: anything with Surface.blit's (surf, dest, area)."""
+        if x >= GAME_WIDTH or x + self.width <= 0:
+            return
+        self.draw_top(target, x, gap_top)
+        self.draw_bottom(target, x, gap_bottom)
+
+    def draw_top(self, target, x, gap_top):
+        strip, length, width = self.top, self.length, self.width
+        y0 = max(0, gap_top - length)
+        y1 = min(gap_top, self.floor_y)
+        if y1 > y0:
+            target.blit(strip, (x, y0), (0, length - gap_top + y0, width, y1 - y0))
+        # longer than the strip: more body above it
+        body = self.body_length
+        y = gap_top - length
+        while y > 0:
+            h = min(body, y)
+            target.blit(strip, (x, y - h), (0, body - h, width, h))
+            y -= h
+
+    def draw_bottom(self, target, x, gap_bottom):
+        strip, length, width, floor_y = self.bottom, self.length, self.width, self.floor_y
+        y0 = max(0, gap_bottom)
+        y1 = min(gap_bottom + length, floor_y)
+        if y1 > y0:
+            target.blit(strip, (x, y0), (0, y0 - gap_bottom, width, y1 - y0))
+        y = gap_bottom + length
+        while y < floor_y:
+            h = min(self.body_length, floor_y - y)
+            target.blit(strip, (x, y), (0, self.cap_height, width, h))
+            y += h
+
+    def surfaces(self):
+        return [self.top, self.bottom]
+
+
+class Theme:
+    """One theme's decoded surfaces."""
+
+    def __init__(self, name, sprites, skyline=None):
+        self.name = name
+        self.background = sprites["background"]  # opaque: already its own copy (asset_atlas)
+        self.pipes = PipeSkin(sprites["top_cap"], sprites["bottom_cap"], sprites["top_body"], sprites["bottom_body"])
+        # the last atlas region still in use: copy it out so the atlas itself
+        # is freed and the budget counts only what stays resident
+        self.base = sprites["base"].copy()
+        # skyline: (top, bottom) rows of the background that scroll, or None
+        self.skyline = None
+        surfaces = [self.background, self.base] + self.pipes.surfaces()
+        if skyline:
+            top, bottom = skyline
+            self.skyline = pygame.Rect(0, top, GAME_WIDTH, bottom - top)
+            self.skyline_strip = seamless_strip(self.background, top, bottom)
+            self.skyline_layer = ParallaxLayer(SKYLINE_PARALLAX, top)
+            surfaces.append(self.skyline_strip)
+        self.bytes = sum(s.get_pitch() * s.get_height() for s in surfaces)
+
+    def draw_skyline(self, target, world_x):
+        """The scrolling band over the static background (target: a Surface or the DirtyRenderer)."""
+        if self.skyline is not None:
+            self.skyline_layer.draw(target, self.skyline_strip, world_x)
+
+
+class ThemeLibrary:
+    """
+    Decoded themes, loaded on demand from their baked atlases (asset_atlas) and
+    kept in LRU order. Themes that are on screen are pinned; the rest are
+    evicted oldest-first while the total (with the crossfade's surfaces) is
+    over budget_bytes. Themes in `missing` (web: atlas not downloaded yet)
+    aren't loaded until arrived().
+    """
+
+    def __init__(self, manifest=MANIFEST, budget_bytes=THEME_BUDGET_BYTES, write_cache=True):
+        self.specs = manifest["themes"]
+        self.budget_bytes = budget_bytes
+        self.write_cache = write_cache
+        self._loaded = OrderedDict()   # name -> Theme, least recently used first
+        self._pending = {}             # name -> Future from asset_atlas.load_async
+        self._pinned = ()
+        self.crossfade = Crossfade()  # its surfaces count against the budget too
+        self.missing = set()
+        self.loads = 0
+        self.evictions = 0
+
+    def preload(self, name):
+        """Start loading `name` in the background (no-op if loaded or loading)."""
+        if name in self._loaded or name in self._pending or name in self.missing:
+            return
+        self._pending[name] = asset_atlas.load_async(
+            write_cache=self.write_cache,
+            sprites=asset_atlas.theme_sprites(self.specs[name]),
+            group="theme-" + name,
+        )
+
+    def available(self, name):
+        return name not in self.missing
+
+    def arrived(self, name):
+        """A missing theme's atlas is here now: load it."""
+        self.missing.discard(name)
+        self.preload(name)
+
+    def _finish(self, name):
+        atlas = self._pending.pop(name).result()
+        theme = self._loaded[name] = Theme(name, atlas.sprites(), self.specs[name].get("skyline"))  # convert: main thread only
+        self.loads += 1
+        self._evict()
+        return theme
+
+    def get(self, name):
+        """The decoded theme, loading it now if a preload didn't get there first."""
+        theme = self._loaded.get(name)
+        if theme is not None:
+            self._loaded.move_to_end(name)
+            return theme
+        self.preload(name)
+        return self._finish(name)
+
+    def update(self, theme_state, score):
+        """Per frame: pin on-screen themes, collect finished loads, preload the next phase."""
+        if theme_state.transitioning:
+            self._pinned = (theme_state.transition_from, theme_state.transition_to)
+        else:
+            self._pinned = (theme_state.current_theme,)
+        for name in [n for n, f in self._pending.items() if f.done()]:
+            self._finish(name)
+        upcoming = desired_theme_for_score(score + PRELOAD_POINTS)
+        if upcoming != theme_state.current_theme:
+            self.preload(upcoming)
+        self._evict()  # the crossfade's surfaces arrive with the first transition
+
+    def _evict(self):
+        while self.resident_bytes() > self.budget_bytes:
+            victim = next((n for n in self._loaded if n not in self._pinned), None)
+            if victim is None:
+                break  # everything left is on screen
+            del self._loaded[victim]
+            self.evictions += 1
+
+    def resident(self):
+        return list(self._loaded)
+
+    def resident_bytes(self):
+        return sum(t.bytes for t in self._loaded.values()) + self.crossfade.memory_bytes()
+
+
+CROSSFADE_LEVELS = 10  # distinct blend steps per transition
+
+
+class Crossfade:
+    """
+    Day/night crossfade that costs one full-screen blit per frame, plus a
+    fade of the skyline bands' rows.
+    The blend lives in one work surface, re-blended only when the quantized t
+    reaches a new level. The incoming background is blended from a private
+    copy, so no alpha is ever set on a theme's own background (the dirty-rect
+    renderer restores from those). Both surfaces are made by the first
+    transition and reused by every one after it; ThemeLibrary counts them
+    against its budget.
+    """
+
+    def __init__(self, levels=CROSSFADE_LEVELS):
+        self.levels = levels
+        self._pair = None
+        self._level = None
+        self._work = None  # the blend at self._level
+        self._to = None    # private copy of the incoming background (its skyline rows composited per frame)
+
+    def draw(self, target, theme_from, theme_to, t, world_x=0):
+        """world_x: the world scroll, for the skylines (parallax.py)."""
+        level = int(t * self.levels + 0.5)
+        if level <= 0 or level >= self.levels:
+            theme = theme_from if level <= 0 else theme_to
+            target.blit(theme.background, (0, 0))
+            theme.draw_skyline(target, world_x)
+            return
+
+        bg_from, bg_to = theme_from.background, theme_to.background
+        if self._work is None:
+            self._work = bg_from.copy()
+            self._to = bg_to.copy()
+        if self._pair != (bg_from, bg_to):
+            self._pair = (bg_from, bg_to)
+            self._to.blit(bg_to, (0, 0))
+            self._level = None
+        self._to.set_alpha(level * 255 // self.levels)
+        if level != self._level:
+            self._level = level
+            self._work.blit(bg_from, (0, 0))
+            self._work.blit(self._to, (0, 0))
+        target.blit(self._work, (0, 0))
+
+        # the skylines scroll, so they can't be in the blend: redo the fade
+        # over just the rows either band covers
+        bands = [th.skyline for th in (theme_from, theme_to) if th.skyline is not None]
+        if not bands:
+            return
+        rows = bands[0].unionall(bands[1:])
+        target.blit(bg_from, rows, rows)
+        theme_from.draw_skyline(target, world_x)
+        self._to.blit(bg_to, rows, rows)
+        theme_to.draw_skyline(self._to, world_x)
+        target.blit(self._to, rows, rows)
+
+    def release(self):
+        """Transition over: the next one re-copies its backgrounds (the surfaces are kept)."""
+        self._pair = None
+        self._level = None
+
+    def memory_bytes(self):
+        if self._work is None:
+            return 0
+        return sum(s.get_pitch() * s.get_height() for s in (self._work, self._to))
@@ -0,0 +1,133 @@
+import time
+import pygame
+
+# Voice manager for sound effects. Plain Sound.play() grabs any free channel,
+# so flap spam can occupy all of them and a score/hit sound gets dropped. Here
+# every sound belongs to a category with a priority, a few reserved channels
+# and a voice cap; repeats inside a cooldown are coalesced into the voice
+# that's already playing, and when a category is out of channels the oldest
+# voice of equal or lower priority is stolen.
+
+# category -> (priority, reserved channels, max simultaneous voices)
+CATEGORIES = {
+    "impact": (3, 2, 3),
+    "score":  (2, 1, 2),
+    "flap":   (1, 2, 2),
+    "ui":     (0, 1, 1),
+}
+
+# sound name -> (category, cooldown ms)
+SOUND_RULES = {
+    "crash":  ("impact", 0),
+    "fall":   ("impact", 0),
+    "point":  ("score", 0),
+    "jump":   ("flap", 60),
+    "swoosh": ("ui", 80),
+}
+
+
+class VoiceManager:
+    def __init__(self, num_channels=None, categories=CATEGORIES, rules=SOUND_RULES):
+        """Call after the mixer is initialized; owns every mixer channel."""
+        if num_channels is None:
+            num_channels = pygame.mixer.get_num_channels()
+        self.categories = categories
+        self.rules = rules
+        self.channels = [pygame.mixer.Channel(i) for i in range(num_channels)]
+        self._owner = [None] * num_channels       # category of the last voice started
+        self._started = [0.0] * num_channels      # when it started (ms)
+
+        # reserved channels first, in priority order; the rest are shared
+        self._reserved = {}
+        i = 0
+        for cat in sorted(categories, key=lambda c: -categories[c][0]):
+            n = min(categories[cat][1], num_channels - i)
+            self._reserved[cat] = list(range(i, i + n))
+            i += n
+        self._shared = list(range(i, num_channels))
+        # keep plain Sound.play() (anything not routed through us) off the reserved ones
+        pygame.mixer.set_reserved(i)
+
+        self._last_play = {}
+        self.stats = {cat: {"played": 0, "coalesced": 0, "stolen": 0, "dropped": 0} for cat in categories}
+        self.peak_voices = 0
+
+    def _busy(self, i):
+        return self._owner[i] is not None and self.channels[i].get_busy()
+
+    def voices(self, category=None):
+        """Channels currently playing (optionally only `category`'s)."""
+        return sum(1 for i in range(len(self.channels))
+                   if self._busy(i) and (category is None or self._owner[i] == category))
+
+    def _pick(self, cat, priority):
+        """(channel index, stolen?) or (None, False) if nothing may be used."""
+        own = self._reserved[cat]
+        for i in own:
+            if not self._busy(i):
+                return i, False
+        at_cap = self.voices(cat) >= self.categories[cat][2]
+        if not at_cap:
+            for i in self._shared:
+                if not self._busy(i):
+                    return i, False
+        # steal: oldest voice of ours when capped, else oldest of equal/lower priority
+        if at_cap:
+            candidates = [i for i in own + self._shared if self._owner[i] == cat]
+        else:
+            candidates = own + [i for i in self._shared if self._owner[i] is not None
+                                and self.categories[self._owner[i]][0] <= priority]
+        if not candidates:
+            return None, False
+        i = min(candidates, key=lambda i: self._started[i])
+        return i, self._busy(i)
+
+    def play(self, name, sound, now=None):
+        """Play `sound` under `name`'s rules. Returns the Channel or None (coalesced/dropped)."""
+        cat, cooldown = self.rules.get(name, ("ui", 0))
+        stats = self.stats[cat]
+        if now is None:
+            now = time.monotonic() * 1000.0
+        last = self._last_play.get(name)
+        if last is not None and now - last < cooldown:
+            stats["coalesced"] += 1
+            return None
+
+        i, stolen = self._pick(cat, self.categories[cat][0])
+        if i is None:
+            stats["dropped"] += 1
+            return None
+        if stolen:
+            stats["stolen"] += 1
+        ch = self.channels[i]
+        ch.play(sound)
+        self._owner[i] = cat
+        self._started[i] = now
+        self._last_play[name] = now
+        stats["played"] += 1
+        busy = self.voices()
+        if busy > self.peak_voices:
+            self.peak_voices = busy
+        return ch
+
+    def stop_all(self):
+        for ch in self.channels:
+            ch.stop()
+
+    def report(self):
+        """Stats snapshot: per-category counters plus channel use."""
+        return {
+            "categories": {cat: dict(s) for cat, s in self.stats.items()},
+            "voices": self.voices(),
+            "peak_voices": self.peak_voices,
+            "channels": len(self.channels),
+        }
+
+    def summary(self):
+        """One line for the console: channel use and each category's nonzero counters."""
+        parts = []
+        for cat, s in self.stats.items():
+            counts = [f"{n} {what}" for what, n in s.items() if n]
+            if counts:
+                parts.append(f"{cat} " + ", ".join(counts))
+        return f"Voices: peak {self.peak_voices} of {len(self.channels)} channels; " + ("; ".join(parts) or "nothing played")
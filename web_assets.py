@@ -0,0 +1,205 @@
+import asyncio
+import json
+import shutil
+import sys
+import time
+from pathlib import Path
+import asset_atlas
+import theme_changer
+
+# Web fast start. The pygbag APK only holds what the first frame needs (code,
+# font, the "sprites" atlas and the first theme); everything else is served
+# next to index.html and streamed in after the first frame, one job at a time
+# on the asyncio loop. On desktop every file is already local and fetch()
+# returns right away, so the same jobs just finish loading in the background.
+#
+#   python web_assets.py prepare             -> bake atlases, write pygbag.ini (what the APK leaves out)
+#   python web_assets.py publish build/web   -> copy the streamed files next to index.html, print sizes
+
+IS_WEB = sys.platform == "emscripten"
+ROOT = Path(__file__).parent
+INI_PATH = ROOT / "pygbag.ini"
+
+FIRST_FRAME_GROUPS = ("sprites", "theme-" + theme_changer.THEME_ORDER[0])
+# everything else in assets/ stays out of the APK
+APK_ASSETS = ("PressStart2P.ttf", asset_atlas.INDEX_NAME, "collision_masks.bin")
+# served with the page but not read by the game (the splash overlay's image)
+PAGE_FILES = ("assets/game-title.png",)
+# never needed in the browser
+DESKTOP_ONLY_DIRS = ("/sounds", "/replays", "/traces", "/clips", "/tests")
+DESKTOP_ONLY_FILES = ("benchmark.py", "batch_sim.py", "courses.py", "flappy_env.py", "README.md", "pyproject.toml",
+                      "uv.lock", "package-lock.json", "pygbag.log", "pygbag.ini", "requests.jsonl",
+                      "scores.db")
+
+
+def atlas_file(group):
+    """Path of a group's baked atlas, relative to the game folder (and the page)."""
+    sprites = asset_atlas.groups()[group]
+    key = asset_atlas.group_key(sprites=sprites, group=group)
+    return asset_atlas.cache_path(key, group=group).relative_to(ROOT).as_posix()
+
+
+def streamed_groups():
+    return [g for g in asset_atlas.groups() if g not in FIRST_FRAME_GROUPS]
+
+
+def sound_files():
+    import sound_effects as sfx
+    names = list(sfx.SOUND_FILES.values()) + [sfx.MUSIC_FILE]
+    return [sfx.sound_file(name) for name in names]
+
+
+_fetches = {}  # relpath -> Task, so the streamer and a loader never download a file twice
+
+
+async def fetch(relpath):
+    """
+    Local path of `relpath` (relative to the game folder). On web a file that
+    isn't in the APK is downloaded from the same path next to index.html first.
+    """
+    path = ROOT / relpath
+    if not IS_WEB or path.exists():
+        return path
+    task = _fetches.get(relpath)
+    if task is None:
+        task = _fetches[relpath] = asyncio.ensure_future(_download(relpath, path))
+    try:
+        await task
+    except Exception:
+        _fetches.pop(relpath, None)  # let the next caller retry
+        raise
+    return path
+
+
+async def _download(relpath, path):
+    import platform  # pygbag's: fopen() fetches through the browser
+    path.parent.mkdir(parents=True, exist_ok=True)
+    async with platform.fopen(relpath, "rb") as remote:
+        data = remote.read()
+    tmp = path.with_name(path.name + ".part")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+class LoadTimes:
+    """Startup milestones (ms since start) and per-asset fetch/decode times."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.marks = []    # (label, ms since start)
+        self.assets = []   # (label, fetch ms, decode ms, bytes, ms since start)
+        self.reported = False   # the full breakdown has been printed
+
+    def now(self):
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def mark(self, label):
+        """`label` just finished."""
+        self.marks.append((label, self.now()))
+
+    def asset(self, label, fetch_ms, decode_ms, nbytes):
+        self.assets.append((label, fetch_ms, decode_ms, nbytes, self.now()))
+
+    def report(self, prefix=None):
+        """The whole breakdown, or only the assets whose label starts with `prefix`."""
+        lines = []
+        if prefix is None:
+            self.reported = True
+            prev = 0.0
+            steps = []
+            for label, at in self.marks:
+                steps.append(f"{label} {at - prev:.0f}")
+                prev = at
+            lines.append(f"Startup {prev:.0f} ms: " + ", ".join(steps))
+        for label, fetch_ms, decode_ms, nbytes, at in self.assets:
+            if prefix is not None and not label.startswith(prefix):
+                continue
+            lines.append(f"  {label:<16} fetch {fetch_ms:7.1f} ms  decode {decode_ms:6.1f} ms"
+                         f"  {nbytes / 1024:8.1f} KB  ready at {at:.0f} ms")
+        return "\n".join(lines)
+
+
+class AssetStreamer:
+    """
+    Jobs run in order as one asyncio task, yielding a frame between jobs: each
+    fetches its files, then runs its `ready` callback on the main thread
+    (decode, hand the result to the game).
+    """
+
+    def __init__(self, times):
+        self.times = times
+        self.done = False
+        self._jobs = []
+        self._task = None
+
+    def add(self, label, files, ready=None):
+        self._jobs.append((label, list(files), ready))
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def _run(self):
+        for label, files, ready in self._jobs:
+            try:
+                start = time.perf_counter()
+                nbytes = 0
+                for relpath in files:
+                    path = await fetch(relpath)
+                    if path.exists():
+                        nbytes += path.stat().st_size
+                fetched = time.perf_counter()
+                if ready is not None:
+                    ready()
+                self.times.asset(label, (fetched - start) * 1000.0,
+                                 (time.perf_counter() - fetched) * 1000.0, nbytes)
+            except Exception as e:
+                print(f"Streaming {label} failed: {e}")
+            await asyncio.sleep(0)
+        self.done = True
+        print(self.times.report())
+
+
+# ---- build side ----
+
+def prepare():
+    """Bake every atlas and write pygbag.ini so the APK holds only the first-frame set."""
+    asset_atlas.bake_all()
+    keep = set(APK_ASSETS) | {Path(atlas_file(g)).name for g in FIRST_FRAME_GROUPS}
+    ignore_files = sorted({p.name for p in asset_atlas.ASSETS.rglob("*") if p.is_file()} - keep)
+    ignore_files += DESKTOP_ONLY_FILES
+    with open(INI_PATH, "w") as f:
+        f.write("[DEPENDENCIES]\n")
+        f.write(f"ignoreDirs = {json.dumps(list(DESKTOP_ONLY_DIRS))}\n")
+        f.write(f"ignoreFiles = {json.dumps(ignore_files)}\n")
+    print(f"Wrote {INI_PATH.name}: APK assets {sorted(keep)}, {len(ignore_files)} files left out")
+
+
+def publish(web_dir):
+    """Copy the streamed files (and the page's own) to web_dir; sounds use pygbag's -pygbag.ogg encodes."""
+    web_dir = Path(web_dir)
+    streamed = [atlas_file(g) for g in streamed_groups()] + sound_files()
+    total = 0
+    for relpath in streamed + list(PAGE_FILES):
+        src = ROOT / relpath
+        web_variant = src.with_name(f"{src.stem}-pygbag{src.suffix}")
+        if src.suffix == ".ogg" and web_variant.exists():
+            src = web_variant
+        dst = web_dir / relpath
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src, dst)
+        size = dst.stat().st_size
+        total += size
+        print(f"  {relpath:<48} {size / 1024:8.1f} KB  <- {src.relative_to(ROOT).as_posix()}")
+    apk = sum(p.stat().st_size for p in web_dir.glob("*.apk"))
+    print(f"APK (first frame) {apk / 1024:.1f} KB, streamed + page files {total / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "prepare":
+        prepare()
+    elif len(sys.argv) >= 3 and sys.argv[1] == "publish":
+        publish(sys.argv[2])
+    else:
+        print("usage: python web_assets.py prepare | publish <build/web>")
+        sys.exit(2)